@@ -0,0 +1,42 @@
+"""Pré-carregamento do PDF em segundo plano, depois que a janela fica ociosa.
+
+Com os imports sob demanda, o primeiro "Gerar Escala" pagaria pela
+importação do reportlab, pela carga das métricas das fontes e pela montagem
+dos estilos. ``agendar(root)`` faz esse trabalho numa thread assim que o
+laço de eventos do Tk fica ocioso, sem bloquear a interface, e só uma vez
+por processo. Defina ``ESCALA_SEM_AQUECIMENTO=1`` para desligar.
+"""
+import os
+import threading
+
+import instrumentacao
+
+VARIAVEL_AMBIENTE = 'ESCALA_SEM_AQUECIMENTO'
+
+_trava = threading.Lock()
+_iniciado = False
+
+
+def _aquecer():
+    with instrumentacao.atual().trecho('aquecimento'):
+        try:
+            import renderizacao_pdf
+            renderizacao_pdf.aquecer()
+        except Exception as e:
+            # Só uma otimização: a geração importa tudo de novo se precisar
+            print(f"Erro ao pré-carregar o PDF: {e}")
+
+
+def iniciar():
+    """Inicia o pré-carregamento numa thread, se ainda não foi iniciado"""
+    global _iniciado
+    with _trava:
+        if _iniciado or os.environ.get(VARIAVEL_AMBIENTE):
+            return
+        _iniciado = True
+    threading.Thread(target=_aquecer, name='aquecimento-pdf', daemon=True).start()
+
+
+def agendar(root):
+    """Pré-carrega o PDF quando a janela ``root`` ficar ociosa"""
+    root.after_idle(iniciar)
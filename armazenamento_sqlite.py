@@ -0,0 +1,207 @@
+"""Armazenamento opcional em SQLite para os dados das duas escalas.
+
+Substitui os arquivos JSON sem mudar quem os usa: ``ler(documento)`` e
+``salvar(documento, dados)`` recebem e devolvem as mesmas estruturas dos
+arquivos (``servico`` = dados_servico.json; ``pessoas``, ``carrinhos``,
+``pontos`` e ``config`` = os arquivos de data_tpl).
+
+O banco guarda os documentos, não os consulta: cada item (designação,
+pessoa, data especial, ponto, carrinho) é uma linha com a sua posição e o
+item completo em JSON, e a leitura devolve o documento inteiro. ``salvar``
+compara com o último estado lido ou gravado e, numa única transação, só
+regrava as posições que mudaram; a comparação e a serialização continuam
+percorrendo o documento todo.
+
+Para migrar os arquivos JSON existentes (eles são mantidos como cópia):
+    python armazenamento_sqlite.py --banco escalas.db
+Com ``escalas.db`` na pasta do programa (ou ``ESCALA_BANCO`` apontando para
+um banco), o programa passa a usar o banco; veja ``persistencia.ler``.
+"""
+import argparse
+import copy
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+VERSAO_ESQUEMA = 2
+
+# Documento -> tabelas que o compõem
+DOCUMENTOS = {
+    'servico': ('designacoes', 'pessoas_servico', 'datas_especiais'),
+    'pessoas': ('pessoas_tpl',),
+    'carrinhos': ('carrinhos',),
+    'pontos': ('pontos',),
+    'config': ('config',),
+}
+
+TABELAS = [tabela for tabelas in DOCUMENTOS.values() for tabela in tabelas]
+
+ESQUEMA = tuple(
+    f"CREATE TABLE IF NOT EXISTS {tabela} ("
+    f"posicao INTEGER PRIMARY KEY, nome TEXT NOT NULL, dados TEXT NOT NULL)"
+    for tabela in TABELAS
+)
+
+# Tabelas auxiliares da versão 1 do esquema, que nunca eram lidas
+TABELAS_ANTIGAS = ('pessoa_designacao', 'disponibilidade_tpl', 'horarios_ponto', 'carrinho_ponto')
+
+
+def _itens(documento, dados):
+    """Decompõe um documento em {tabela: [(nome, valor), ...]} na ordem original"""
+    if documento == 'servico':
+        return {
+            'designacoes': [(cargo, None) for cargo in dados.get('designações', [])],
+            'pessoas_servico': list(dados.get('pessoas', {}).items()),
+            'datas_especiais': list(dados.get('datas_especiais', {}).items()),
+        }
+    if documento == 'config':
+        return {'config': list(dados.items())}
+    return {DOCUMENTOS[documento][0]: [(item['nome'], item) for item in dados]}
+
+
+def _documento(documento, tabelas):
+    """Operação inversa de ``_itens``"""
+    if documento == 'servico':
+        return {
+            'designações': [nome for nome, _ in tabelas['designacoes']],
+            'pessoas': dict(tabelas['pessoas_servico']),
+            'datas_especiais': dict(tabelas['datas_especiais']),
+        }
+    if documento == 'config':
+        return dict(tabelas['config'])
+    return [valor for _, valor in tabelas[DOCUMENTOS[documento][0]]]
+
+
+class BancoEscalas:
+    """Banco SQLite com os documentos das escalas"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        # A conexão é compartilhada entre threads, sempre sob a trava
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode = WAL")
+        self._trava = threading.RLock()
+        # tabela -> [(nome, cópia do valor)], na ordem das posições
+        self._gravados = {}
+        with self._trava:
+            versao = self._conexao.execute("PRAGMA user_version").fetchone()[0]
+            if versao < VERSAO_ESQUEMA:
+                self._atualizar_esquema(versao)
+
+    def fechar(self):
+        with self._trava:
+            self._conexao.close()
+
+    def ler(self, documento):
+        """O documento no mesmo formato do arquivo JSON correspondente"""
+        with self._trava:
+            tabelas = {tabela: self._ler_tabela(tabela) for tabela in DOCUMENTOS[documento]}
+        return _documento(documento, tabelas)
+
+    def salvar(self, documento, dados):
+        """Grava, numa transação, só as posições do documento que mudaram"""
+        with self._trava:
+            try:
+                with self._conexao:
+                    cursor = self._conexao.cursor()
+                    for tabela, itens in _itens(documento, dados).items():
+                        if tabela not in self._gravados:
+                            self._ler_tabela(tabela)
+                        self._sincronizar(cursor, tabela, itens)
+            except Exception:
+                # A transação foi desfeita: a comparação volta a partir do banco
+                for tabela in DOCUMENTOS[documento]:
+                    self._gravados.pop(tabela, None)
+                raise
+
+    def _atualizar_esquema(self, versao):
+        """Cria as tabelas ou converte as da versão 1, numa só transação"""
+        cursor = self._conexao.cursor()
+        cursor.execute("BEGIN")
+        try:
+            itens = {}
+            if versao == 1:
+                # Na versão 1 o nome era a chave e as posições podiam ter lacunas
+                existentes = {nome for nome, in cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'")}
+                for tabela in existentes.intersection(TABELAS):
+                    itens[tabela] = cursor.execute(
+                        f"SELECT nome, dados FROM {tabela} ORDER BY posicao").fetchall()
+                for tabela in TABELAS_ANTIGAS + tuple(TABELAS):
+                    cursor.execute(f"DROP TABLE IF EXISTS {tabela}")
+            for comando in ESQUEMA:
+                cursor.execute(comando)
+            for tabela, linhas in itens.items():
+                cursor.executemany(f"INSERT INTO {tabela} VALUES (?, ?, ?)",
+                                   [(posicao, nome, dados) for posicao, (nome, dados) in enumerate(linhas)])
+            cursor.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def _ler_tabela(self, tabela):
+        linhas = self._conexao.execute(
+            f"SELECT nome, dados FROM {tabela} ORDER BY posicao").fetchall()
+        # Uma cópia para quem leu (que pode alterá-la) e outra para a comparação
+        self._gravados[tabela] = [(nome, json.loads(dados)) for nome, dados in linhas]
+        return [(nome, json.loads(dados)) for nome, dados in linhas]
+
+    def _sincronizar(self, cursor, tabela, itens):
+        gravados = self._gravados[tabela]
+        # Posição a posição (nomes repetidos são aceitos, como nos arquivos
+        # JSON): uma edição ou renomeação regrava uma linha, um item novo no
+        # fim insere uma, e uma remoção regrava as seguintes
+        for posicao, (nome, valor) in enumerate(itens):
+            if posicao < len(gravados) and gravados[posicao] == (nome, valor):
+                continue
+            cursor.execute(f"INSERT OR REPLACE INTO {tabela} VALUES (?, ?, ?)",
+                           (posicao, nome, json.dumps(valor, ensure_ascii=False)))
+            copia = (nome, copy.deepcopy(valor))
+            if posicao < len(gravados):
+                gravados[posicao] = copia
+            else:
+                gravados.append(copia)
+        if len(gravados) > len(itens):
+            cursor.execute(f"DELETE FROM {tabela} WHERE posicao >= ?", (len(itens),))
+            del gravados[len(itens):]
+
+
+def migrar_de_json(banco, arquivo_servico='dados_servico.json', pasta_tpl='data_tpl'):
+    """Copia os arquivos JSON existentes para o banco; retorna os documentos migrados"""
+    migrados = []
+    arquivos = [('servico', arquivo_servico)] + [
+        (documento, os.path.join(pasta_tpl, f'{documento}.json'))
+        for documento in ('pessoas', 'carrinhos', 'pontos', 'config')
+    ]
+    for documento, caminho in arquivos:
+        if not os.path.isfile(caminho):
+            continue
+        with open(caminho, 'r', encoding='utf-8') as f:
+            banco.salvar(documento, json.load(f))
+        migrados.append(caminho)
+    return migrados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migra os arquivos JSON de dados para um banco SQLite")
+    parser.add_argument('--banco', default='escalas.db', help="Banco de destino (padrão: escalas.db)")
+    parser.add_argument('--servico', default='dados_servico.json', help="Arquivo da escala de serviço")
+    parser.add_argument('--tpl', default='data_tpl', help="Pasta dos dados da escala TPL")
+    args = parser.parse_args(argv)
+
+    banco = BancoEscalas(args.banco)
+    try:
+        migrados = migrar_de_json(banco, args.servico, args.tpl)
+    finally:
+        banco.fechar()
+    for caminho in migrados:
+        print(f"Migrado: {caminho}")
+    print(f"{len(migrados)} arquivo(s) migrado(s) para {args.banco}")
+    return 0 if migrados else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Benchmarks da escala de serviço com conjuntos de dados sintéticos.
+
+Mede separadamente o agendamento (motor) e a renderização do PDF, além do
+pico de memória de cada etapa, para cada combinação de parâmetros. Os
+resultados são gravados em JSON para comparação entre commits.
+
+Exemplos:
+    python benchmarks/bench_escala_servico.py --perfil rapido --saida base.json
+    python benchmarks/bench_escala_servico.py --perfil rapido --comparar base.json
+    python benchmarks/bench_escala_servico.py --pessoas 10000 --designacoes 100 --semanas 260 --sem-pdf
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import escala_servico_motor  # noqa: E402
+from dados_sinteticos import gerar_dados_servico  # noqa: E402
+
+PERFIS = {
+    'rapido': {
+        'pessoas': [10, 100, 1000],
+        'designacoes': [5, 20],
+        'densidade': [0.3],
+        'densidade_datas': [0.05],
+        'semanas': [4, 52],
+    },
+    'completo': {
+        'pessoas': [10, 100, 1000, 10000],
+        'designacoes': [5, 20, 100],
+        'densidade': [0.1, 0.5],
+        'densidade_datas': [0.0, 0.1],
+        'semanas': [1, 52, 260],
+    },
+}
+
+DATA_INICIAL = datetime(2026, 1, 4)
+
+
+def _medir(funcao, repeticoes):
+    """Executa ``funcao`` e retorna (tempos em segundos, pico de memória em bytes)"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    # Memória medida numa execução à parte: tracemalloc distorce os tempos
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return tempos, pico
+
+
+def _resumo_tempos(tempos):
+    return {
+        'min_s': round(min(tempos), 6),
+        'mediana_s': round(statistics.median(tempos), 6),
+        'repeticoes': len(tempos),
+    }
+
+
+def executar_caso(parametros, repeticoes, modo, com_pdf):
+    dados_brutos = gerar_dados_servico(
+        parametros['pessoas'], parametros['designacoes'], parametros['densidade'],
+        parametros['densidade_datas'], DATA_INICIAL, parametros['semanas'])
+    dados = escala_servico_motor.DadosEscala.de_dicionarios(
+        dados_brutos['designações'], dados_brutos['pessoas'], dados_brutos['datas_especiais'])
+
+    def agendar():
+        return escala_servico_motor.gerar_escala(dados, DATA_INICIAL, parametros['semanas'],
+                                                 modo, semente=0)
+
+    tempos, pico = _medir(agendar, repeticoes)
+    resultado = dict(parametros)
+    resultado['modo'] = modo
+    resultado['agendamento'] = dict(_resumo_tempos(tempos), pico_memoria_bytes=pico)
+
+    if com_pdf:
+        import escala_servico
+        escala = agendar()
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, 'escala.pdf')
+
+            def renderizar():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    escala_servico.gerar_pdf_escala(escala, arquivo)
+
+            tempos, pico = _medir(renderizar, repeticoes)
+            resultado['renderizacao'] = dict(_resumo_tempos(tempos), pico_memoria_bytes=pico,
+                                             tamanho_bytes=os.path.getsize(arquivo))
+    return resultado
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _chave(caso):
+    return (caso['pessoas'], caso['designacoes'], caso['densidade'],
+            caso['densidade_datas'], caso['semanas'], caso['modo'])
+
+
+def comparar(anterior, atual):
+    """Imprime a razão atual/anterior das medianas para os casos em comum"""
+    casos_anteriores = {_chave(caso): caso for caso in anterior['casos']}
+    print(f"\nComparação com {anterior.get('commit') or 'resultado anterior'} (atual/anterior):")
+    for caso in atual['casos']:
+        antigo = casos_anteriores.get(_chave(caso))
+        if antigo is None:
+            continue
+        partes = []
+        for etapa in ('agendamento', 'renderizacao'):
+            if etapa in caso and etapa in antigo:
+                razao = caso[etapa]['mediana_s'] / max(antigo[etapa]['mediana_s'], 1e-9)
+                partes.append(f"{etapa} {razao:.2f}x")
+        print(f"  {_descrever(caso)}: {', '.join(partes)}")
+
+
+def _descrever(caso):
+    return (f"pessoas={caso['pessoas']} designacoes={caso['designacoes']} "
+            f"densidade={caso['densidade']} datas={caso['densidade_datas']} "
+            f"semanas={caso['semanas']} modo={caso['modo']}")
+
+
+def _lista(tipo):
+    def converter(texto):
+        return [tipo(parte) for parte in texto.split(',')]
+    return converter
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da escala de serviço")
+    parser.add_argument('--perfil', choices=sorted(PERFIS), default='rapido')
+    parser.add_argument('--pessoas', type=_lista(int), help="Ex.: 10,100,1000")
+    parser.add_argument('--designacoes', type=_lista(int), help="Ex.: 5,20,100")
+    parser.add_argument('--densidade', type=_lista(float), help="Fração de designações por pessoa")
+    parser.add_argument('--densidade-datas', type=_lista(float), help="Fração de semanas com evento")
+    parser.add_argument('--semanas', type=_lista(int), help="Ex.: 1,52,260")
+    parser.add_argument('--modo', choices=escala_servico_motor.MODOS,
+                        default=escala_servico_motor.MODO_GULOSO)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--sem-pdf', action='store_true', help="Mede só o agendamento")
+    parser.add_argument('--saida', default='bench_escala_servico.json')
+    parser.add_argument('--comparar', metavar='RESULTADO_JSON',
+                        help="Resultado anterior para comparação")
+    args = parser.parse_args(argv)
+
+    grade = dict(PERFIS[args.perfil])
+    for nome in grade:
+        valor = getattr(args, nome)
+        if valor:
+            grade[nome] = valor
+
+    casos = []
+    for combinacao in itertools.product(*grade.values()):
+        parametros = dict(zip(grade.keys(), combinacao))
+        caso = executar_caso(parametros, args.repeticoes, args.modo, not args.sem_pdf)
+        casos.append(caso)
+        texto = f"agendamento {caso['agendamento']['mediana_s'] * 1000:.1f} ms"
+        if 'renderizacao' in caso:
+            texto += f", renderização {caso['renderizacao']['mediana_s'] * 1000:.1f} ms"
+        print(f"{_descrever(caso)}: {texto}")
+
+    resultado = {
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'casos': casos,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4, ensure_ascii=False)
+    print(f"Resultados salvos em: {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(json.load(f), resultado)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
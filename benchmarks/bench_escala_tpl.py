@@ -0,0 +1,216 @@
+"""Benchmarks da escala TPL (carrinhos) com conjuntos de dados sintéticos.
+
+Mede separadamente o agendamento (``escala_tpl_motor``) e a renderização do
+PDF, além do pico de memória de cada etapa, para cada combinação de
+parâmetros. Cada caso registra também uma assinatura (SHA-256) das linhas
+geradas: na comparação com um resultado anterior, uma assinatura diferente
+indica que a escala mudou, e não só o tempo.
+
+Exemplos:
+    python benchmarks/bench_escala_tpl.py --perfil rapido --saida base.json
+    python benchmarks/bench_escala_tpl.py --perfil rapido --comparar base.json
+    python benchmarks/bench_escala_tpl.py --pessoas 500 --pontos 40 --semanas 52 --sem-pdf
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import escala_tpl_motor  # noqa: E402
+from dados_sinteticos import gerar_dados_tpl  # noqa: E402
+
+PERFIS = {
+    'rapido': {
+        'pessoas': [30, 200],
+        'pontos': [10],
+        'carrinhos': [3],
+        'densidade': [0.3],
+        'semanas': [4, 52],
+    },
+    'completo': {
+        'pessoas': [30, 200, 1000],
+        'pontos': [10, 50],
+        'carrinhos': [3, 15],
+        'densidade': [0.1, 0.4],
+        'semanas': [4, 52],
+    },
+}
+
+DATA_INICIAL = datetime(2026, 1, 5)
+
+
+def _medir(funcao, repeticoes):
+    """Executa ``funcao`` e retorna (tempos em segundos, pico de memória em bytes)"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    # Memória medida numa execução à parte: tracemalloc distorce os tempos
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return tempos, pico
+
+
+def _resumo_tempos(tempos):
+    return {
+        'min_s': round(min(tempos), 6),
+        'mediana_s': round(statistics.median(tempos), 6),
+        'repeticoes': len(tempos),
+    }
+
+
+def _assinatura(dias):
+    resumo = hashlib.sha256()
+    for dia in dias:
+        resumo.update(json.dumps([dia.data.strftime('%Y-%m-%d'), dia.linhas],
+                                 ensure_ascii=False).encode('utf-8'))
+    return resumo.hexdigest()
+
+
+def executar_caso(parametros, repeticoes, com_pdf):
+    brutos = gerar_dados_tpl(parametros['pessoas'], parametros['pontos'],
+                             parametros['carrinhos'], parametros['densidade'])
+    dados = escala_tpl_motor.DadosTPL.de_listas(
+        brutos['pessoas'], brutos['pontos'], brutos['carrinhos'], brutos['config'])
+
+    def agendar():
+        # Consome o gerador sem guardar os dias, como faz o PDF
+        for _ in escala_tpl_motor.gerar_dias(dados, DATA_INICIAL, parametros['semanas']):
+            pass
+
+    tempos, pico = _medir(agendar, repeticoes)
+    dias = list(escala_tpl_motor.gerar_dias(dados, DATA_INICIAL, parametros['semanas']))
+    resultado = dict(parametros)
+    resultado['agendamento'] = dict(_resumo_tempos(tempos), pico_memoria_bytes=pico)
+    resultado['linhas'] = sum(len(dia.linhas) for dia in dias)
+    resultado['assinatura'] = _assinatura(dias)
+
+    if com_pdf:
+        import renderizacao_pdf
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, 'escala.pdf')
+
+            def renderizar():
+                renderizacao_pdf.gerar_pdf_tpl(dias, arquivo)
+
+            tempos, pico = _medir(renderizar, repeticoes)
+            resultado['renderizacao'] = dict(_resumo_tempos(tempos), pico_memoria_bytes=pico,
+                                             tamanho_bytes=os.path.getsize(arquivo))
+    return resultado
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _chave(caso):
+    return (caso['pessoas'], caso['pontos'], caso['carrinhos'], caso['densidade'],
+            caso['semanas'])
+
+
+def comparar(anterior, atual):
+    """Imprime a razão atual/anterior das medianas; retorna os casos cuja escala mudou"""
+    casos_anteriores = {_chave(caso): caso for caso in anterior['casos']}
+    mudaram = []
+    print(f"\nComparação com {anterior.get('commit') or 'resultado anterior'} (atual/anterior):")
+    for caso in atual['casos']:
+        antigo = casos_anteriores.get(_chave(caso))
+        if antigo is None:
+            continue
+        partes = []
+        for etapa in ('agendamento', 'renderizacao'):
+            if etapa in caso and etapa in antigo:
+                razao = caso[etapa]['mediana_s'] / max(antigo[etapa]['mediana_s'], 1e-9)
+                partes.append(f"{etapa} {razao:.2f}x")
+        if caso['assinatura'] != antigo.get('assinatura'):
+            partes.append("ESCALA DIFERENTE")
+            mudaram.append(caso)
+        print(f"  {_descrever(caso)}: {', '.join(partes)}")
+    return mudaram
+
+
+def _descrever(caso):
+    return (f"pessoas={caso['pessoas']} pontos={caso['pontos']} "
+            f"carrinhos={caso['carrinhos']} densidade={caso['densidade']} "
+            f"semanas={caso['semanas']}")
+
+
+def _lista(tipo):
+    def converter(texto):
+        return [tipo(parte) for parte in texto.split(',')]
+    return converter
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da escala TPL")
+    parser.add_argument('--perfil', choices=sorted(PERFIS), default='rapido')
+    parser.add_argument('--pessoas', type=_lista(int), help="Ex.: 30,200,1000")
+    parser.add_argument('--pontos', type=_lista(int), help="Ex.: 10,50")
+    parser.add_argument('--carrinhos', type=_lista(int), help="Ex.: 3,15")
+    parser.add_argument('--densidade', type=_lista(float),
+                        help="Chance de disponibilidade em cada faixa")
+    parser.add_argument('--semanas', type=_lista(int), help="Ex.: 4,52")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--sem-pdf', action='store_true', help="Mede só o agendamento")
+    parser.add_argument('--saida', default='bench_escala_tpl.json')
+    parser.add_argument('--comparar', metavar='RESULTADO_JSON',
+                        help="Resultado anterior para comparação")
+    args = parser.parse_args(argv)
+
+    grade = dict(PERFIS[args.perfil])
+    for nome in grade:
+        valor = getattr(args, nome)
+        if valor:
+            grade[nome] = valor
+
+    casos = []
+    for combinacao in itertools.product(*grade.values()):
+        parametros = dict(zip(grade.keys(), combinacao))
+        caso = executar_caso(parametros, args.repeticoes, not args.sem_pdf)
+        casos.append(caso)
+        texto = f"agendamento {caso['agendamento']['mediana_s'] * 1000:.1f} ms"
+        if 'renderizacao' in caso:
+            texto += f", renderização {caso['renderizacao']['mediana_s'] * 1000:.1f} ms"
+        print(f"{_descrever(caso)}: {texto}")
+
+    resultado = {
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'casos': casos,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4, ensure_ascii=False)
+    print(f"Resultados salvos em: {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            if comparar(json.load(f), resultado):
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
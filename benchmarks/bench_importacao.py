@@ -0,0 +1,149 @@
+"""Tempo de importação dos módulos do programa, medido com ``python -X importtime``.
+
+Cada módulo é importado num processo novo, várias vezes, e fica registrado o
+menor tempo acumulado e quais dependências pesadas (reportlab, tkcalendar,
+babel, o pool de processos, os módulos de interface) ele puxou. Com
+``--comparar``, a execução falha se um módulo passar a importar uma
+dependência pesada que não importava, ou se ficar mais lento que o
+resultado de referência além da tolerância.
+
+A referência versionada é ``benchmarks/importacao_base.json``:
+    python benchmarks/bench_importacao.py --comparar benchmarks/importacao_base.json
+    python benchmarks/bench_importacao.py --saida benchmarks/importacao_base.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCIA = os.path.join(RAIZ, 'benchmarks', 'importacao_base.json')
+
+MODULOS = [
+    'modulo_selector',
+    'escala_servico_motor',
+    'escala_servico',
+    'escala_servico_cli',
+    'escala_lote',
+    'escala_tpl_motor',
+    'exportacao',
+    'escala_servico_gui',
+    'escala_tpl_gui',
+    'renderizacao_pdf',
+]
+
+PESADOS = (
+    'reportlab',
+    'tkcalendar',
+    'babel',
+    'concurrent.futures.process',
+    'escala_servico_gui',
+    'escala_tpl_gui',
+    'renderizacao_pdf',
+)
+
+
+def _importar(modulo):
+    """Importa ``modulo`` num processo novo; retorna (tempo acumulado em µs, pesados)"""
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+                              cwd=RAIZ, capture_output=True, text=True)
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{processo.stderr}")
+    acumulado = None
+    pesados = set()
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or '|' not in linha:
+            continue
+        _, cumulativo, nome = linha.split('|')
+        nome = nome.strip()
+        if nome == modulo:
+            acumulado = int(cumulativo)
+        for pesado in PESADOS:
+            if pesado != modulo and (nome == pesado or nome.startswith(pesado + '.')):
+                pesados.add(pesado)
+    return acumulado, pesados
+
+
+def medir(modulos, repeticoes):
+    resultados = {}
+    for modulo in modulos:
+        tempos = []
+        for _ in range(repeticoes):
+            acumulado, pesados = _importar(modulo)
+            tempos.append(acumulado)
+        resultados[modulo] = {
+            'acumulado_ms': round(min(tempos) / 1000, 2),
+            'pesados': sorted(pesados),
+        }
+    return resultados
+
+
+def comparar(referencia, atual, tolerancia):
+    """Imprime as diferenças e retorna a lista de regressões"""
+    regressoes = []
+    print(f"\nComparação com {referencia.get('commit') or 'a referência'} (atual/referência):")
+    for modulo, dados in atual['modulos'].items():
+        antigo = referencia['modulos'].get(modulo)
+        if antigo is None:
+            continue
+        razao = dados['acumulado_ms'] / max(antigo['acumulado_ms'], 0.01)
+        novos = sorted(set(dados['pesados']) - set(antigo['pesados']))
+        print(f"  {modulo:<22} {razao:5.2f}x" + (f"  novos: {', '.join(novos)}" if novos else ''))
+        if novos:
+            regressoes.append(f"{modulo} passou a importar {', '.join(novos)}")
+        if razao > tolerancia:
+            regressoes.append(f"{modulo} ficou {razao:.2f}x mais lento")
+    return regressoes
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de importação dos módulos")
+    parser.add_argument('--modulos', type=lambda texto: texto.split(','), default=MODULOS,
+                        help="Módulos separados por vírgula (padrão: todos)")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--saida', help="Grava o resultado em JSON")
+    parser.add_argument('--comparar', metavar='RESULTADO_JSON', nargs='?', const=REFERENCIA,
+                        help="Referência para comparação (padrão: a versionada)")
+    parser.add_argument('--tolerancia', type=float, default=2.0,
+                        help="Razão máxima de tempo aceita na comparação (padrão: 2.0)")
+    args = parser.parse_args(argv)
+
+    resultado = {
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'modulos': medir(args.modulos, args.repeticoes),
+    }
+    for modulo, dados in resultado['modulos'].items():
+        pesados = f"  ({', '.join(dados['pesados'])})" if dados['pesados'] else ''
+        print(f"{modulo:<22} {dados['acumulado_ms']:>8.1f} ms{pesados}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=4, ensure_ascii=False)
+        print(f"Resultados salvos em: {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            regressoes = comparar(json.load(f), resultado, args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        if regressoes:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Gerador de conjuntos de dados sintéticos para os benchmarks."""
+import random
+from datetime import timedelta
+
+
+def gerar_dados_servico(num_pessoas, num_designacoes, densidade=0.3, densidade_datas=0.05,
+                        data_inicial=None, semanas=52, semente=0):
+    """Monta um conjunto no formato de dados_servico.json.
+
+    ``densidade`` é a fração das designações para a qual cada pessoa é apta
+    (ao menos uma). ``densidade_datas`` é a fração das semanas do horizonte
+    que recebe uma data especial; um terço delas dura vários dias.
+    """
+    rng = random.Random(semente)
+    designacoes = [f"Designação {i + 1}" for i in range(num_designacoes)]
+    por_pessoa = max(1, round(densidade * num_designacoes))
+    pessoas = {
+        f"Pessoa {i + 1}": rng.sample(designacoes, por_pessoa)
+        for i in range(num_pessoas)
+    }
+
+    datas_especiais = {}
+    if data_inicial is not None and densidade_datas > 0:
+        for semana in rng.sample(range(semanas), round(densidade_datas * semanas)):
+            inicio = data_inicial + timedelta(days=semana * 7 + rng.randrange(7))
+            if rng.random() < 1 / 3:
+                chave = (f"{inicio.strftime('%d/%m/%Y')} a "
+                         f"{(inicio + timedelta(days=2)).strftime('%d/%m/%Y')}")
+            else:
+                chave = inicio.strftime('%d/%m/%Y')
+            datas_especiais[chave] = f"Evento {len(datas_especiais) + 1}"
+
+    return {
+        'designações': designacoes,
+        'pessoas': pessoas,
+        'datas_especiais': datas_especiais,
+    }
+
+
+def gerar_dados_tpl(num_pessoas, num_pontos, num_carrinhos, densidade=0.3, fracao_casais=0.3,
+                    duracao=60, semente=0):
+    """Monta um conjunto no formato dos arquivos de data_tpl.
+
+    Cada ponto funciona em faixas de manhã e/ou de tarde em alguns dias da
+    semana, e cada carrinho atende alguns pontos. ``densidade`` é a chance
+    de cada pessoa estar disponível em cada faixa de cada dia;
+    ``fracao_casais`` é a fração das pessoas que forma casais.
+    """
+    rng = random.Random(semente)
+    dias = ('Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo')
+    faixas = ('07:00-09:00', '09:00-12:00', '13:00-15:00', '15:00-17:00', '17:00-19:00')
+
+    pessoas = []
+    for i in range(num_pessoas):
+        horarios = {}
+        for dia in dias:
+            livres = [faixa for faixa in faixas if rng.random() < densidade]
+            if livres:
+                horarios[dia] = livres
+        pessoas.append({'nome': f"Pessoa {i + 1}", 'sexo': rng.choice('MF'),
+                        'has_spouse': False, 'horarios': horarios})
+    casais = round(fracao_casais * num_pessoas) // 2
+    for i in range(casais):
+        marido, esposa = pessoas[2 * i], pessoas[2 * i + 1]
+        marido.update(sexo='M', has_spouse=True, spouse=esposa['nome'])
+        esposa.update(sexo='F', has_spouse=True, spouse=marido['nome'])
+
+    pontos = []
+    for i in range(num_pontos):
+        horarios = {}
+        for dia in rng.sample(dias, rng.randint(2, 7)):
+            horarios[dia] = sorted(rng.sample(faixas, rng.randint(1, 3)))
+        pontos.append({'nome': f"Ponto {i + 1}", 'horarios': horarios})
+
+    nomes_pontos = [ponto['nome'] for ponto in pontos]
+    carrinhos = [
+        {'nome': f"Carrinho {i + 1}",
+         'pontos': rng.sample(nomes_pontos, min(len(nomes_pontos), rng.randint(1, 4)))}
+        for i in range(num_carrinhos)
+    ]
+    return {
+        'pessoas': pessoas,
+        'pontos': pontos,
+        'carrinhos': carrinhos,
+        'config': {'duracao_padrao': duracao},
+    }
@@ -18,7 +18,9 @@ build_exe_options = {
         "reportlab.graphics.barcode.usps4s",
         "reportlab.graphics.barcode.ecc200datamatrix"
     ],
-    "includes": ["tkinter", "tkcalendar"],
+    # Os módulos são importados sob demanda pelo modulo_selector
+    "includes": ["tkinter", "tkcalendar", "escala_servico_gui", "escala_tpl_gui", "renderizacao_pdf",
+                 "armazenamento_sqlite", "sqlite3"],
     "include_files": [
         ("dados_servico.json", "dados_servico.json") if os.path.exists("dados_servico.json") else None,
         ("data_tpl/pessoas.json", "data_tpl/pessoas.json") if os.path.exists("data_tpl/pessoas.json") else None,
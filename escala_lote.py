@@ -0,0 +1,208 @@
+"""Geração em lote, sem interface gráfica, para vários conjuntos de dados.
+
+Cada conjunto de dados é uma pasta com um ``dados_servico.json`` (escala de
+serviço) e/ou uma pasta ``data_tpl`` (escala TPL). A pasta informada e as
+suas subpastas imediatas são examinadas; os conjuntos encontrados são
+gerados em paralelo em um pool de processos, e os arquivos gerados e um
+resumo (``resumo.json``) são gravados na pasta de saída.
+
+Exemplo:
+    python escala_lote.py congregacoes --data-inicial 05/01/2026 --semanas 8 --saida escalas
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import escala_servico_motor
+import escala_tpl_motor
+import exportacao
+
+ARQUIVO_SERVICO = 'dados_servico.json'
+PASTA_TPL = 'data_tpl'
+
+TIPO_SERVICO = 'servico'
+TIPO_TPL = 'tpl'
+
+
+def descobrir_conjuntos(diretorio):
+    """Lista ``(nome, tipo, caminho)`` dos conjuntos de dados em ``diretorio``"""
+    pastas = [diretorio] + sorted(
+        os.path.join(diretorio, nome)
+        for nome in os.listdir(diretorio)
+        if os.path.isdir(os.path.join(diretorio, nome)) and nome != PASTA_TPL
+    )
+    conjuntos = []
+    for pasta in pastas:
+        nome = os.path.basename(os.path.normpath(pasta))
+        arquivo_servico = os.path.join(pasta, ARQUIVO_SERVICO)
+        if os.path.isfile(arquivo_servico):
+            conjuntos.append((nome, TIPO_SERVICO, arquivo_servico))
+        pasta_tpl = os.path.join(pasta, PASTA_TPL)
+        if os.path.isdir(pasta_tpl):
+            conjuntos.append((nome, TIPO_TPL, pasta_tpl))
+    return conjuntos
+
+
+def _gerar_servico(nome, caminho, opcoes):
+    dados = escala_servico_motor.DadosEscala.de_arquivo(caminho)
+    if opcoes['tentativas'] > 1:
+        escala = escala_servico_motor.gerar_melhor_escala(
+            dados, opcoes['data_inicial'], opcoes['semanas'], opcoes['tentativas'],
+            opcoes['modo'], opcoes['semente'], processos=1)
+    else:
+        escala = escala_servico_motor.gerar_escala(
+            dados, opcoes['data_inicial'], opcoes['semanas'], opcoes['modo'], opcoes['semente'])
+
+    base = os.path.join(opcoes['saida'], f"{nome}_servico")
+    arquivos = [base + '.json']
+    exportacao.exportar_servico(escala, base + '.json')
+    if not opcoes['sem_pdf']:
+        # Importado só aqui: reportlab só é necessário quando há PDF.
+        # Direto na renderização, sem as mensagens do menu no stdout do lote
+        import renderizacao_pdf
+        renderizacao_pdf.gerar_pdf_servico(escala.iterar_linhas(), escala.cargos, base + '.pdf')
+        arquivos.append(base + '.pdf')
+
+    vagas, variancia_pessoa, variancia_designacao = escala_servico_motor.pontuar_escala(escala, dados)
+    return {
+        'arquivos': arquivos,
+        'semente': escala.semente,
+        'vagas_nao_preenchidas': vagas,
+        'variancia_pessoa': variancia_pessoa,
+        'variancia_designacao': variancia_designacao,
+    }
+
+
+def _gerar_tpl(nome, caminho, opcoes):
+    dados = escala_tpl_motor.DadosTPL.de_pasta(caminho)
+    base = os.path.join(opcoes['saida'], f"{nome}_tpl")
+    arquivos = [base + '.json']
+    # Os dias são gerados uma vez só e guardados para o JSON e o PDF
+    dias = list(escala_tpl_motor.gerar_dias(dados, opcoes['data_inicial'], opcoes['semanas']))
+    exportacao.exportar_tpl(dias, base + '.json')
+    if not opcoes['sem_pdf']:
+        # Importado só aqui: reportlab só é necessário quando há PDF
+        import renderizacao_pdf
+        renderizacao_pdf.gerar_pdf_tpl(dias, base + '.pdf')
+        arquivos.append(base + '.pdf')
+
+    return {
+        'arquivos': arquivos,
+        'dias': len(dias),
+        'vagas_nao_preenchidas': sum(
+            (linha[3] == '-') + (linha[4] in ('-', '?')) for dia in dias for linha in dia.linhas),
+    }
+
+
+GERADORES = {
+    TIPO_SERVICO: _gerar_servico,
+    TIPO_TPL: _gerar_tpl,
+}
+
+
+def gerar_conjunto(tarefa):
+    """Tarefa executada em cada processo: gera um conjunto e devolve o resumo"""
+    nome, tipo, caminho, opcoes = tarefa
+    resumo = {'nome': nome, 'tipo': tipo, 'origem': caminho}
+    inicio = time.perf_counter()
+    try:
+        resumo.update(GERADORES[tipo](nome, caminho, opcoes))
+        resumo['status'] = 'ok'
+    except Exception as e:
+        resumo['status'] = 'erro'
+        resumo['erro'] = str(e)
+    resumo['segundos'] = round(time.perf_counter() - inicio, 4)
+    return resumo
+
+
+def gerar_lote(diretorio, saida, data_inicial, semanas, modo=escala_servico_motor.MODO_GULOSO,
+               semente=None, tentativas=1, processos=None, sem_pdf=False, ao_concluir=None):
+    """Gera todos os conjuntos de ``diretorio`` em paralelo e grava o resumo.
+
+    ``ao_concluir`` é chamado com o resumo de cada conjunto assim que ele
+    termina. Retorna a lista de resumos, na ordem em que os conjuntos foram
+    encontrados.
+    """
+    os.makedirs(saida, exist_ok=True)
+    opcoes = {
+        'saida': saida,
+        'data_inicial': data_inicial,
+        'semanas': semanas,
+        'modo': modo,
+        'semente': semente,
+        'tentativas': tentativas,
+        'sem_pdf': sem_pdf,
+    }
+    tarefas = [(nome, tipo, caminho, opcoes) for nome, tipo, caminho in descobrir_conjuntos(diretorio)]
+
+    resumos = [None] * len(tarefas)
+    inicio = time.perf_counter()
+    if tarefas:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = {executor.submit(gerar_conjunto, tarefa): i for i, tarefa in enumerate(tarefas)}
+            for futuro in as_completed(futuros):
+                resumo = futuro.result()
+                resumos[futuros[futuro]] = resumo
+                if ao_concluir:
+                    ao_concluir(resumo)
+
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'data_inicial': data_inicial.strftime('%d/%m/%Y'),
+        'semanas': semanas,
+        'modo': modo,
+        'segundos': round(time.perf_counter() - inicio, 4),
+        'conjuntos': resumos,
+    }
+    with open(os.path.join(saida, 'resumo.json'), 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=4, ensure_ascii=False)
+    return resumos
+
+
+def _imprimir_resumo(resumo):
+    detalhe = resumo.get('erro') or f"{resumo.get('vagas_nao_preenchidas', 0)} vaga(s) sem pessoa"
+    print(f"[{resumo['status']}] {resumo['nome']} ({resumo['tipo']}) "
+          f"em {resumo['segundos']:.2f}s - {detalhe}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera escalas em lote para vários conjuntos de dados")
+    parser.add_argument('diretorio', help="Pasta com os conjuntos de dados")
+    parser.add_argument('--data-inicial', required=True, help="Data inicial (DD/MM/AAAA)")
+    parser.add_argument('--semanas', type=int, required=True, help="Número de semanas")
+    parser.add_argument('--saida', default='escalas', help="Pasta de saída (padrão: escalas)")
+    parser.add_argument('--processos', type=int, default=None,
+                        help="Número de processos (padrão: um por núcleo)")
+    parser.add_argument('--modo', choices=escala_servico_motor.MODOS,
+                        default=escala_servico_motor.MODO_GULOSO)
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('--tentativas', type=int, default=1,
+                        help="Mantém a mais justa entre N tentativas por conjunto")
+    parser.add_argument('--sem-pdf', action='store_true', help="Grava só o JSON da escala")
+    args = parser.parse_args(argv)
+
+    try:
+        data_inicial = datetime.strptime(args.data_inicial, "%d/%m/%Y")
+    except ValueError:
+        parser.error("Data inválida. Use o formato DD/MM/AAAA")
+    if args.semanas < 1 or args.tentativas < 1:
+        parser.error("O número de semanas e de tentativas deve ser maior que zero")
+    if not os.path.isdir(args.diretorio):
+        parser.error(f"Pasta não encontrada: {args.diretorio}")
+
+    resumos = gerar_lote(args.diretorio, args.saida, data_inicial, args.semanas, args.modo,
+                         args.semente, args.tentativas, args.processos, args.sem_pdf,
+                         ao_concluir=_imprimir_resumo)
+    if not resumos:
+        print("Nenhum conjunto de dados encontrado.")
+        return 1
+    print(f"Resumo salvo em: {os.path.join(args.saida, 'resumo.json')}")
+    return 1 if any(r['status'] == 'erro' for r in resumos) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
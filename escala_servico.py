@@ -1,75 +1,47 @@
-import random
-from collections import defaultdict
-import json
 import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 from datetime import datetime, timedelta
-
-print("O arquivo será salvo em:", os.getcwd())
+import escala_servico_motor
+import exportacao
+from escala_servico_motor import Escala
+from repositorio_servico import RepositorioServico
 
 ARQUIVO_DADOS = 'dados_servico.json'
-cargos = []
-pessoas = {}
-datas_especiais = {} 
+# Dados do programa; leia sempre um retrato (repositorio.retrato) e edite
+# pelos métodos do repositório, que publicam uma nova versão
+repositorio = RepositorioServico(ARQUIVO_DADOS)
 
 def carregar_dados():
-    global cargos, pessoas, datas_especiais
-    try:
-        with open(ARQUIVO_DADOS, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-            cargos = dados.get('designações', [])
-            pessoas = dados.get('pessoas', {})
-            datas_especiais = dados.get('datas_especiais', {})
-    except FileNotFoundError:
-        cargos = []
-        pessoas = {}
-        datas_especiais = {}
-        salvar_dados()  # Criar arquivo inicial
-    except Exception as e:
-        print(f"Erro ao carregar dados: {e}")
-        cargos = []
-        pessoas = {}
-        datas_especiais = {}
-        salvar_dados()  # Criar arquivo inicial
+    return repositorio.carregar()
 
 def salvar_dados():
-    try:
-        dados = {
-            'designações': cargos,
-            'pessoas': pessoas,
-            'datas_especiais': datas_especiais
-        }
-        with open(ARQUIVO_DADOS, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Erro ao salvar dados: {e}")
+    repositorio.salvar()
 
 def cadastrar_data_especial():
     while True:
         try:
-            data_str = input("Digite a data do evento (DD/MM): ")
-            ano_atual = datetime.now().year
-            data_str_completa = f"{data_str}/{ano_atual}"
-            data = datetime.strptime(data_str_completa, "%d/%m/%Y")
+            data_str = input("Digite a data do evento (DD/MM ou DD/MM/AAAA): ").strip()
+            if data_str.count('/') == 1:
+                data_str = f"{data_str}/{datetime.now().year}"
+            data = datetime.strptime(data_str, "%d/%m/%Y")
             
-            data_key = data.strftime("%d/%m")
+            dias_str = input("Quantos dias dura o evento? (Enter para 1): ").strip()
+            dias = int(dias_str) if dias_str else 1
+            if dias < 1:
+                raise ValueError
+            data_key = escala_servico_motor.formatar_data_especial(data, data + timedelta(days=dias - 1))
             
             evento = input("Digite a descrição do evento: ").strip()
             if evento:
-                datas_especiais[data_key] = evento
-                salvar_dados()
+                repositorio.definir_data_especial(data_key, evento)
                 print("Evento cadastrado com sucesso!")
                 break
             else:
                 print("A descrição do evento não pode estar vazia.")
         except ValueError:
-            print("Data inválida. Use o formato DD/MM (exemplo: 20/06)")
+            print("Data inválida. Use o formato DD/MM ou DD/MM/AAAA (exemplo: 20/06/2025)")
 
 def editar_data_especial():
+    datas_especiais = repositorio.retrato.datas_especiais
     if not datas_especiais:
         print("Não há datas especiais cadastradas.")
         return
@@ -78,12 +50,11 @@ def editar_data_especial():
     for data, evento in datas_especiais.items():
         print(f"{data}: {evento}")
     
-    data_str = input("\nDigite a data que deseja editar (DD/MM): ").strip()
+    data_str = input("\nDigite a data que deseja editar (como listada acima): ").strip()
     if data_str in datas_especiais:
         novo_evento = input("Digite a nova descrição do evento: ").strip()
         if novo_evento:
-            datas_especiais[data_str] = novo_evento
-            salvar_dados()
+            repositorio.definir_data_especial(data_str, novo_evento)
             print("Evento atualizado com sucesso!")
         else:
             print("A descrição do evento não pode estar vazia.")
@@ -91,6 +62,7 @@ def editar_data_especial():
         print("Data não encontrada.")
 
 def excluir_data_especial():
+    datas_especiais = repositorio.retrato.datas_especiais
     if not datas_especiais:
         print("Não há datas especiais cadastradas.")
         return
@@ -99,34 +71,49 @@ def excluir_data_especial():
     for data, evento in datas_especiais.items():
         print(f"{data}: {evento}")
     
-    data_str = input("\nDigite a data que deseja excluir (DD/MM): ").strip()
+    data_str = input("\nDigite a data que deseja excluir (como listada acima): ").strip()
     if data_str in datas_especiais:
         confirmacao = input(f"Tem certeza que deseja excluir o evento de {data_str}? (s/n): ").lower()
         if confirmacao == 's':
-            del datas_especiais[data_str]
-            salvar_dados()
+            repositorio.excluir_data_especial(data_str)
             print("Evento excluído com sucesso!")
     else:
         print("Data não encontrada.")
 
 def listar_datas_especiais():
+    datas_especiais = repositorio.retrato.datas_especiais
     if not datas_especiais:
         print("Não há datas especiais cadastradas.")
         return
     
     print("\n--- DATAS ESPECIAIS ---")
-    for data, evento in sorted(datas_especiais.items()):
-        print(f"{data}: {evento}")
+    for data in sorted(datas_especiais, key=escala_servico_motor.chave_ordenacao_data_especial):
+        print(f"{data}: {datas_especiais[data]}")
+
+def migrar_datas_especiais(ano=None):
+    """Adiciona o ano às datas especiais cadastradas no formato antigo (DD/MM)"""
+    if ano is None:
+        ano = datetime.now().year
+    return repositorio.migrar_datas_especiais(ano)
+
+def migrar_datas_especiais_menu():
+    try:
+        ano_str = input(f"Ano das datas sem ano (Enter para {datetime.now().year}): ").strip()
+        ano = int(ano_str) if ano_str else None
+    except ValueError:
+        print("Ano inválido.")
+        return
+    alteradas = migrar_datas_especiais(ano)
+    print(f"{alteradas} data(s) especial(is) convertida(s).")
 
 def verificar_evento_especial(inicio, fim):
     """Verifica se há algum evento especial no intervalo de datas"""
-    data_atual = inicio
-    while data_atual <= fim:
-        data_str = data_atual.strftime("%d/%m")
-        if data_str in datas_especiais:
-            return datas_especiais[data_str]
-        data_atual += timedelta(days=1)
-    return None
+    return escala_servico_motor.verificar_evento_especial(
+        repositorio.retrato.datas_especiais, inicio, fim)
+
+def obter_dados_escala():
+    """Retrato dos dados atuais para uso no motor de geração"""
+    return repositorio.retrato
 
 def menu():
     carregar_dados()
@@ -144,6 +131,7 @@ def menu():
         print("10. Editar data especial")
         print("11. Excluir data especial")
         print("12. Listar datas especiais")
+        print("13. Adicionar ano às datas especiais antigas")
         print("0. Sair")
         opcao = input("Escolha uma opção: ")
 
@@ -171,6 +159,8 @@ def menu():
             excluir_data_especial()
         elif opcao == '12':
             listar_datas_especiais()
+        elif opcao == '13':
+            migrar_datas_especiais_menu()
         elif opcao == '0':
             salvar_dados()
             break
@@ -179,14 +169,13 @@ def menu():
 
 def cadastrar_cargo():
     nome = input("Nome da designação: ").strip()
-    if nome and nome not in cargos:
-        cargos.append(nome)
-        salvar_dados()
+    if nome and repositorio.adicionar_cargo(nome):
         print("Designação cadastrada.")
     else:
         print("Designação já existe ou inválida.")
 
 def cadastrar_pessoa():
+    cargos = repositorio.retrato.cargos
     if not cargos:
         print("Cadastre ao menos uma designação antes de adicionar pessoas.")
         return
@@ -207,20 +196,19 @@ def cadastrar_pessoa():
     if not selecionados:
         print("É necessário selecionar ao menos uma designação.")
         return
-    pessoas[nome] = list(selecionados)
-    salvar_dados()
+    repositorio.definir_pessoa(nome, selecionados)
     print("Pessoa cadastrada com sucesso.")
 
 def editar_pessoa():
+    retrato = repositorio.retrato
+    cargos = retrato.cargos
     nome = input("Nome da pessoa a editar: ").strip()
-    if nome not in pessoas:
+    if nome not in retrato.pessoas:
         print("Pessoa não encontrada.")
         return
-    novo_nome = input("Novo nome (pressione Enter para manter o atual): ").strip()
-    if novo_nome:
-        pessoas[novo_nome] = pessoas.pop(nome)
-        nome = novo_nome
-    print("Cargos atuais:", pessoas[nome])
+    novo_nome = input("Novo nome (pressione Enter para manter o atual): ").strip() or nome
+    designacoes = retrato.pessoas[nome]
+    print("Cargos atuais:", list(designacoes))
     print("Deseja atualizar as designações? (s/n)")
     if input().lower() == 's':
         print("Selecione os novos cargos:")
@@ -234,42 +222,36 @@ def editar_pessoa():
             except:
                 pass
         if selecionados:
-            pessoas[nome] = list(selecionados)
+            designacoes = selecionados
         else:
             print("Nenhuma designação selecionada. Mantida as designações anteriores.")
-    salvar_dados()
+    repositorio.definir_pessoa(novo_nome, designacoes, nome_anterior=nome)
 
 def excluir_cargo():
     nome = input("Nome da designação a excluir: ").strip()
-    if nome in cargos:
-        cargos.remove(nome)
-        for p in list(pessoas):
-            if nome in pessoas[p]:
-                pessoas[p].remove(nome)
-                if not pessoas[p]:
-                    print(f"{p} ficou sem designação e será desconsiderado na escala.")
-        salvar_dados()
+    sem_designacao = repositorio.excluir_cargo(nome)
+    if sem_designacao is not None:
+        for p in sem_designacao:
+            print(f"{p} ficou sem designação e será desconsiderado na escala.")
         print("Designação excluída.")
     else:
         print("Designação não encontrada.")
 
 def excluir_pessoa():
     nome = input("Nome da pessoa a excluir: ").strip()
-    if nome in pessoas:
-        del pessoas[nome]
-        salvar_dados()
+    if repositorio.excluir_pessoa(nome):
         print("Pessoa excluída com sucesso.")
     else:
         print("Pessoa não encontrada.")
 
 def listar_cargos():
     print("\n--- DESIGNAÇÕES ---")
-    for c in cargos:
+    for c in repositorio.retrato.cargos:
         print("-", c)
 
 def listar_pessoas():
     print("\n--- PESSOAS ---")
-    for nome, lista_cargos in pessoas.items():
+    for nome, lista_cargos in repositorio.retrato.pessoas.items():
         status = "(SEM DESIGNAÇÃO!)" if not lista_cargos else ""
         print(f"{nome} - Designações: {', '.join(lista_cargos)} {status}")
 
@@ -284,201 +266,26 @@ def obter_data_inicial():
         except ValueError:
             print("Data inválida. Use o formato DD/MM (exemplo: 02/06)")
 
-def gerar_intervalo_datas(data_inicial, num_semanas):
-    intervalos = []
-    for i in range(num_semanas):
-        inicio = data_inicial + timedelta(days=i*7)
-        fim = inicio + timedelta(days=6)
-        intervalos.append((inicio, fim))
-    return intervalos
-
-def formatar_intervalo_data(inicio, fim):
-    return f"{inicio.strftime('%d/%m')} a {fim.strftime('%d/%m')}"
-
 def gerar_pdf_escala(escala, nome_arquivo='escala.pdf'):
-    doc = SimpleDocTemplate(
-        nome_arquivo,
-        pagesize=A4,
-        rightMargin=20,
-        leftMargin=20,
-        topMargin=20,
-        bottomMargin=30
-    )
-    elementos = []
-    
-    # Definir cores personalizadas
-    cor_borda = colors.HexColor('#999898')
-    cor_cabecalho = colors.HexColor('#d9d9d9')
-    cor_titulo = colors.HexColor('#4a6da7')
-    cor_evento = colors.HexColor('#FFEB9C')  
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    titulo_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        alignment=1,  
-        spaceAfter=0,
-        textColor=colors.white,  
-        leading=20
-    )
-    subtitulo_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        alignment=1,  
-        spaceAfter=0,
-        textColor=colors.white,  
-        leading=5
-    )
-    
-    # Estilo para o cabeçalho da tabela
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Normal'],
-        fontSize=8.5,
-        alignment=1,
-        textColor=colors.black,
-        leading=10
-    )
-
-    # Estilo para a coluna Semana
-    week_style = ParagraphStyle(
-        'WeekStyle',
-        parent=styles['Normal'],
-        fontSize=9,
-        alignment=1,
-        textColor=colors.black,
-        leading=12
-    )
-    
-    # Criar título com fundo colorido
-    titulo = Paragraph("<b>Congregação Coqueiros</b>", titulo_style)
-    titulo_table = Table([[titulo]], colWidths=[doc.width])
-    titulo_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), cor_titulo),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    elementos.append(titulo_table)
-    
-    # Criar subtítulo com fundo colorido
-    subtitulo = Paragraph("<b>Designações de serviço para as reuniões</b>", subtitulo_style)
-    subtitulo_table = Table([[subtitulo]], colWidths=[doc.width])
-    subtitulo_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), cor_titulo),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 2),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-    ]))
-    elementos.append(subtitulo_table)
-    elementos.append(Spacer(1, 5))
-    
-    # Preparar dados para a tabela
-    dados_tabela = []
-    # Cabeçalho
-    cabecalho = [Paragraph("<b>Período</b>", header_style)] + [Paragraph(f"<b>{cargo}</b>", header_style) for cargo in cargos]
-    dados_tabela.append(cabecalho)
-    
-    # Lista para armazenar as linhas que contêm eventos especiais
-    linhas_eventos = []
-    linha_atual = 1  
-    
-    for linha in escala:
-        if 'evento_especial' in linha:
-            # Linha de evento especial
-            evento_style = ParagraphStyle(
-                'EventoStyle',
-                parent=styles['Normal'],
-                fontSize=9,
-                alignment=1,
-                textColor=colors.black,
-                leading=12
-            )
-            # Primeira coluna é o período, as demais serão mescladas
-            dados = [
-                Paragraph(f"<b>{linha['intervalo']}</b>", week_style),
-                Paragraph(f"<b>{linha['evento_especial']}</b>", evento_style)
-            ] + [''] * (len(cargos) - 1)
-            dados_tabela.append(dados)
-            # Guardar o índice desta linha para mesclar depois
-            linhas_eventos.append(linha_atual)
-        else:
-            # Linha normal da escala
-            dados = [Paragraph(f"<b>{linha['intervalo']}</b>", week_style)] + [linha.get(c, '-') for c in cargos]
-            dados_tabela.append(dados)
-        linha_atual += 1
-
-    # Calcular larguras das colunas
-    largura_disponivel = doc.width
-    num_colunas = len(cabecalho)
-    
-    # Primeira coluna (Período) um pouco maior para acomodar as datas
-    larguras_colunas = [largura_disponivel * 0.12]  # 12% para coluna Período
-    largura_restante = largura_disponivel * 0.88
-    largura_por_coluna = largura_restante / (num_colunas - 1)
-    larguras_colunas.extend([largura_por_coluna] * (num_colunas - 1))
-    
-    # Criar tabela com larguras específicas e altura da primeira linha maior
-    tabela = Table(dados_tabela, colWidths=larguras_colunas, rowHeights=[40] + [25] * (len(dados_tabela)-1))
-    
-    # Estilo da tabela
-    estilo = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), cor_cabecalho),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        # Ajustar padding do cabeçalho
-        ('TOPPADDING', (0, 0), (-1, 0), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-        ('LEFTPADDING', (0, 0), (-1, 0), 2),
-        ('RIGHTPADDING', (0, 0), (-1, 0), 2),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        # Definir grade com nova cor e espessura
-        ('GRID', (0, 0), (-1, -1), 0.5, cor_borda),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        # Ajustar padding das células de conteúdo
-        ('TOPPADDING', (0, 1), (-1, -1), 3),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
-        ('LEFTPADDING', (0, 1), (-1, -1), 2),
-        ('RIGHTPADDING', (0, 1), (-1, -1), 2),
-        # Permitir quebra de linha no cabeçalho
-        ('WORDWRAP', (0, 0), (-1, 0), True),
-        # Garantir que a primeira coluna (Semana) use a fonte em negrito
-        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-        # Mudar a cor do texto do cabeçalho para preto
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-    ])
-
-    # Adicionar mesclagem para as linhas com eventos especiais
-    for linha in linhas_eventos:
-        # Mesclar todas as células após a primeira coluna
-        estilo.add('SPAN', (1, linha), (-1, linha))
-        # Ajustar o alinhamento vertical para a célula mesclada
-        estilo.add('VALIGN', (1, linha), (-1, linha), 'MIDDLE')
-        # Adicionar cor de fundo amarela para toda a linha
-        estilo.add('BACKGROUND', (0, linha), (-1, linha), cor_evento)
-    
-    tabela.setStyle(estilo)
-    
-    elementos.append(tabela)
-    doc.build(elementos)
+    """Gera o PDF a partir de uma Escala do motor (ou de uma lista de linhas)"""
+    cargos_escala = repositorio.retrato.cargos
+    if isinstance(escala, Escala):
+        cargos_escala = escala.cargos
+        escala = escala.iterar_linhas()
+
+    # Importado só aqui: reportlab é o import mais caro do programa
+    import renderizacao_pdf
+    renderizacao_pdf.gerar_pdf_servico(escala, cargos_escala, nome_arquivo)
     print(f"\nEscala gerada com sucesso! Arquivo salvo como '{nome_arquivo}'")
 
 def gerar_escala():
-    if not cargos:
+    # Um só retrato da validação até o fim da geração
+    dados = obter_dados_escala()
+    if not dados.cargos:
         print("Cadastre designações primeiro.")
         return
 
-    validos = {p: c for p, c in pessoas.items() if c}
+    validos = {p: c for p, c in dados.pessoas.items() if c}
     if not validos:
         print("Nenhuma pessoa com designação válida cadastrada.")
         return
@@ -494,95 +301,45 @@ def gerar_escala():
         print("Valor inválido.")
         return
 
-    # Gerar intervalos de datas
-    intervalos = gerar_intervalo_datas(data_inicial, semanas)
-
-    escala = []
-    uso_pessoa = defaultdict(int)
-    uso_pessoa_designacao = defaultdict(lambda: defaultdict(int))
-
-    for inicio, fim in intervalos:
-        # Verificar se há evento especial no período
-        evento = verificar_evento_especial(inicio, fim)
-        if evento:
-            # Se houver evento especial, adicionar linha especial
-            escala.append({
-                'intervalo': formatar_intervalo_data(inicio, fim),
-                'evento_especial': evento
-            })
-            continue
-
-        # Se não houver evento especial, gerar escala normal
-        alocados = set()
-        linha = {'intervalo': formatar_intervalo_data(inicio, fim)}
-        cargos_sorteio = cargos[:]
-        random.shuffle(cargos_sorteio)
-
-        for cargo in cargos_sorteio:
-            candidatos = [p for p in validos if cargo in validos[p] and p not in alocados]
-            if not candidatos:
-                linha[cargo] = "-"
-                continue
-            candidatos.sort(key=lambda x: (uso_pessoa_designacao[x][cargo], uso_pessoa[x]))
-            escolhido = candidatos[0]
-            linha[cargo] = escolhido
-            alocados.add(escolhido)
-            uso_pessoa[escolhido] += 1
-            uso_pessoa_designacao[escolhido][cargo] += 1
-
-        escala.append(linha)
-
+    escala = calcular_escala(data_inicial, semanas, dados=dados)
     gerar_pdf_escala(escala)
 
-def gerar_escala_com_data(data_inicial, semanas, nome_arquivo='escala.pdf'):
+def calcular_escala(data_inicial, semanas, modo=escala_servico_motor.MODO_GULOSO,
+                    semente=None, tentativas=1, base=None, a_partir_de=None, dados=None,
+                    progresso=None, cancelar=None):
+    """Calcula a escala (sem gerar PDF); com tentativas > 1 mantém a mais justa.
+
+    Com ``base`` (uma escala anterior), as semanas antes de ``a_partir_de``
+    são mantidas e só as seguintes são recalculadas. Usa o retrato ``dados``
+    ou, sem ele, o retrato atual do repositório. ``progresso`` e ``cancelar``
+    são repassados ao motor (ver o módulo ``progresso``).
+    """
+    if dados is None:
+        dados = obter_dados_escala()
+    if tentativas > 1:
+        return escala_servico_motor.gerar_melhor_escala(
+            dados, data_inicial, semanas, tentativas, modo, semente,
+            base=base, a_partir_de=a_partir_de, progresso=progresso, cancelar=cancelar)
+    return escala_servico_motor.gerar_escala(
+        dados, data_inicial, semanas, modo, semente, base=base, a_partir_de=a_partir_de,
+        progresso=progresso, cancelar=cancelar)
+
+def gerar_escala_com_data(data_inicial, semanas, nome_arquivo='escala.pdf',
+                          modo=escala_servico_motor.MODO_GULOSO, semente=None, tentativas=1,
+                          base=None, a_partir_de=None):
     """Gera a escala a partir de uma data específica e número de semanas"""
-    if not cargos:
-        raise Exception("Cadastre designações primeiro.")
-
-    validos = {p: c for p, c in pessoas.items() if c}
-    if not validos:
-        raise Exception("Nenhuma pessoa com designação válida cadastrada.")
-
-    # Gerar intervalos de datas
-    intervalos = gerar_intervalo_datas(data_inicial, semanas)
-
-    escala = []
-    uso_pessoa = defaultdict(int)
-    uso_pessoa_designacao = defaultdict(lambda: defaultdict(int))
-
-    for inicio, fim in intervalos:
-        # Verificar se há evento especial no período
-        evento = verificar_evento_especial(inicio, fim)
-        if evento:
-            # Se houver evento especial, adicionar linha especial
-            escala.append({
-                'intervalo': formatar_intervalo_data(inicio, fim),
-                'evento_especial': evento
-            })
-            continue
-
-        # Se não houver evento especial, gerar escala normal
-        alocados = set()
-        linha = {'intervalo': formatar_intervalo_data(inicio, fim)}
-        cargos_sorteio = cargos[:]
-        random.shuffle(cargos_sorteio)
-
-        for cargo in cargos_sorteio:
-            candidatos = [p for p in validos if cargo in validos[p] and p not in alocados]
-            if not candidatos:
-                linha[cargo] = "-"
-                continue
-            candidatos.sort(key=lambda x: (uso_pessoa_designacao[x][cargo], uso_pessoa[x]))
-            escolhido = candidatos[0]
-            linha[cargo] = escolhido
-            alocados.add(escolhido)
-            uso_pessoa[escolhido] += 1
-            uso_pessoa_designacao[escolhido][cargo] += 1
-
-        escala.append(linha)
-
-    gerar_pdf_escala(escala, nome_arquivo)
+    escala = calcular_escala(data_inicial, semanas, modo, semente, tentativas, base, a_partir_de)
+    salvar_escala_como(escala, nome_arquivo)
     return nome_arquivo
 
+def salvar_escala_como(escala, nome_arquivo):
+    """Grava a escala em PDF ou, pela extensão, em CSV, JSON, HTML ou iCalendar"""
+    if exportacao.formato_do_arquivo(nome_arquivo) in exportacao.FORMATOS:
+        exportacao.exportar_servico(escala, nome_arquivo)
+        print(f"\nEscala exportada com sucesso! Arquivo salvo como '{nome_arquivo}'")
+    else:
+        gerar_pdf_escala(escala, nome_arquivo)
+
 if __name__ == '__main__':
-    menu()
+    print("O arquivo será salvo em:", os.getcwd())
+    menu()
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""Linha de comando da escala de serviço, sem interface gráfica e sem input().
+
+Subcomandos:
+    gerar         gera a escala (PDF, JSON, CSV, HTML ou iCalendar) a partir de uma data inicial
+    importar      importa designações, pessoas e datas especiais de outro arquivo
+    exportar      exporta os dados cadastrados para outro arquivo
+    validar       verifica a consistência dos dados cadastrados
+    migrar-datas  adiciona o ano às datas especiais antigas (DD/MM)
+
+Com ``--perfil arquivo.json`` grava um trace das etapas da execução
+(``--perfil -`` imprime um resumo na saída de erro).
+
+Códigos de saída: 0 sucesso, 1 falha na geração ou validação,
+2 uso incorreto da linha de comando, 3 arquivo de dados (ou escala anterior
+de ``--continuar``) ausente ou inválido.
+
+Exemplo:
+    python escala_servico_cli.py gerar --data-inicial 05/01/2026 --semanas 8 --saida escala.pdf
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import escala_servico_motor
+import exportacao
+import instrumentacao
+import persistencia
+
+SAIDA_OK = 0
+SAIDA_FALHA = 1
+SAIDA_USO = 2
+SAIDA_DADOS = 3
+
+ARQUIVO_DADOS = 'dados_servico.json'
+FORMATOS = ('pdf',) + exportacao.FORMATOS
+
+
+class ErroDados(Exception):
+    """Arquivo de dados ausente ou inválido"""
+
+
+def _e_banco(caminho):
+    return os.path.splitext(caminho)[1].lower() == '.db'
+
+
+def _banco(caminho):
+    import armazenamento_sqlite
+    return armazenamento_sqlite.BancoEscalas(caminho)
+
+
+def ler_arquivo_dados(caminho):
+    """Lê um arquivo no formato de dados_servico.json (ou um banco SQLite ``.db``)"""
+    with instrumentacao.atual().trecho('carregar', arquivo=caminho):
+        return _ler_arquivo_dados(caminho)
+
+
+def _ler_arquivo_dados(caminho):
+    if _e_banco(caminho):
+        if not os.path.isfile(caminho):
+            raise ErroDados(f"Arquivo de dados não encontrado: {caminho}")
+        banco = _banco(caminho)
+        try:
+            return banco.ler('servico')
+        finally:
+            banco.fechar()
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except FileNotFoundError:
+        raise ErroDados(f"Arquivo de dados não encontrado: {caminho}")
+    except (OSError, ValueError) as e:
+        raise ErroDados(f"Arquivo de dados inválido ({caminho}): {e}")
+    if not isinstance(dados, dict):
+        raise ErroDados(f"Arquivo de dados inválido ({caminho}): esperado um objeto JSON")
+    try:
+        return {
+            'designações': list(dados.get('designações', [])),
+            'pessoas': {nome: list(lista) for nome, lista in dict(dados.get('pessoas', {})).items()},
+            'datas_especiais': dict(dados.get('datas_especiais', {})),
+        }
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ErroDados(f"Arquivo de dados inválido ({caminho}): {e}")
+
+
+def gravar_arquivo_dados(caminho, dados):
+    """Grava os dados no mesmo formato usado por escala_servico.salvar_dados"""
+    if _e_banco(caminho):
+        banco = _banco(caminho)
+        try:
+            banco.salvar('servico', dados)
+        finally:
+            banco.fechar()
+        return
+    persistencia.gravar_json_atomico(caminho, dados)
+
+
+def ler_escala_anterior(caminho):
+    """Lê a escala anterior de ``--continuar`` (JSON salvo por salvar_escala)"""
+    try:
+        with instrumentacao.atual().trecho('carregar', arquivo=caminho):
+            return escala_servico_motor.carregar_escala(caminho)
+    except FileNotFoundError:
+        raise ErroDados(f"Escala anterior não encontrada: {caminho}")
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ErroDados(f"Escala anterior inválida ({caminho}): {e}")
+
+
+def _dados_escala(dados):
+    return escala_servico_motor.DadosEscala.de_dicionarios(
+        dados['designações'], dados['pessoas'], dados['datas_especiais'])
+
+
+def _data(texto):
+    try:
+        return datetime.strptime(texto, "%d/%m/%Y")
+    except ValueError:
+        raise argparse.ArgumentTypeError("Data inválida. Use o formato DD/MM/AAAA")
+
+
+def _positivo(texto):
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Informe um número inteiro")
+    if valor < 1:
+        raise argparse.ArgumentTypeError("O valor deve ser maior que zero")
+    return valor
+
+
+def comando_gerar(args):
+    dados = _dados_escala(ler_arquivo_dados(args.dados))
+    formato = args.formato or os.path.splitext(args.saida)[1].lstrip('.').lower() or 'pdf'
+    if formato not in FORMATOS:
+        print(f"Formato não suportado: {formato}", file=sys.stderr)
+        return SAIDA_USO
+
+    base = ler_escala_anterior(args.continuar) if args.continuar else None
+    if args.tentativas > 1:
+        escala = escala_servico_motor.gerar_melhor_escala(
+            dados, args.data_inicial, args.semanas, args.tentativas, args.modo, args.semente,
+            args.processos, base=base, a_partir_de=args.a_partir_de)
+    else:
+        escala = escala_servico_motor.gerar_escala(
+            dados, args.data_inicial, args.semanas, args.modo, args.semente,
+            base=base, a_partir_de=args.a_partir_de)
+
+    if formato in exportacao.FORMATOS:
+        exportacao.exportar_servico(escala, args.saida, formato)
+    else:
+        # Importado só aqui: reportlab só é necessário para o PDF
+        import renderizacao_pdf
+        renderizacao_pdf.gerar_pdf_servico(escala.iterar_linhas(), escala.cargos, args.saida)
+    if base is not None:
+        alteradas = escala_servico_motor.semanas_alteradas(base, escala)
+        print(f"Semanas alteradas: {', '.join(str(i + 1) for i in alteradas) or 'nenhuma'}")
+    print(f"Semente: {escala.semente}")
+    print(f"Vagas não preenchidas: {escala.vagas_nao_preenchidas()}")
+    return SAIDA_OK
+
+
+def comando_importar(args):
+    origem = ler_arquivo_dados(args.arquivo)
+    if args.substituir or not os.path.exists(args.dados):
+        destino = origem
+    else:
+        destino = ler_arquivo_dados(args.dados)
+        for cargo in origem['designações']:
+            if cargo not in destino['designações']:
+                destino['designações'].append(cargo)
+        destino['pessoas'].update(origem['pessoas'])
+        destino['datas_especiais'].update(origem['datas_especiais'])
+    gravar_arquivo_dados(args.dados, destino)
+    print(f"{len(origem['designações'])} designação(ões), {len(origem['pessoas'])} pessoa(s) "
+          f"e {len(origem['datas_especiais'])} data(s) especial(is) importadas.")
+    return SAIDA_OK
+
+
+def comando_exportar(args):
+    gravar_arquivo_dados(args.arquivo, ler_arquivo_dados(args.dados))
+    print(f"Dados exportados para: {args.arquivo}")
+    return SAIDA_OK
+
+
+def comando_validar(args):
+    erros, avisos = escala_servico_motor.validar_dados(_dados_escala(ler_arquivo_dados(args.dados)))
+    for erro in erros:
+        print(f"ERRO: {erro}")
+    for aviso in avisos:
+        print(f"AVISO: {aviso}")
+    if erros or (args.estrito and avisos):
+        return SAIDA_FALHA
+    print("Dados válidos.")
+    return SAIDA_OK
+
+
+def comando_migrar_datas(args):
+    dados = ler_arquivo_dados(args.dados)
+    migradas = escala_servico_motor.migrar_datas_especiais(dados['datas_especiais'], args.ano)
+    alteradas = len(set(migradas) - set(dados['datas_especiais']))
+    if alteradas:
+        dados['datas_especiais'] = migradas
+        gravar_arquivo_dados(args.dados, dados)
+    print(f"{alteradas} data(s) especial(is) convertida(s).")
+    return SAIDA_OK
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Escala de serviço pela linha de comando")
+    parser.add_argument('--dados', default=ARQUIVO_DADOS,
+                        help=f"Arquivo de dados, JSON ou banco SQLite .db (padrão: {ARQUIVO_DADOS})")
+    parser.add_argument('--perfil', metavar='DESTINO',
+                        help="Grava um trace das etapas em DESTINO (JSON) ou '-' para um resumo")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    gerar = subparsers.add_parser('gerar', help="Gera a escala")
+    gerar.add_argument('--data-inicial', type=_data, help="Data inicial (DD/MM/AAAA)")
+    gerar.add_argument('--semanas', type=_positivo, required=True, help="Número total de semanas")
+    gerar.add_argument('--saida', default='escala.pdf', help="Arquivo de saída (padrão: escala.pdf)")
+    gerar.add_argument('--formato', choices=FORMATOS,
+                       help="Formato de saída (padrão: pela extensão do arquivo)")
+    gerar.add_argument('--semente', type=int, help="Semente para reproduzir uma escala")
+    gerar.add_argument('--modo', choices=escala_servico_motor.MODOS,
+                       default=escala_servico_motor.MODO_GULOSO)
+    gerar.add_argument('--tentativas', type=_positivo, default=1,
+                       help="Mantém a mais justa entre N tentativas")
+    gerar.add_argument('--processos', type=_positivo, help="Processos usados nas tentativas")
+    gerar.add_argument('--continuar', metavar='ESCALA_JSON',
+                       help="Escala anterior (JSON) a estender ou retomar")
+    gerar.add_argument('--a-partir-de', type=int, metavar='SEMANA',
+                       help="Com --continuar, recalcula a partir desta semana (1 = primeira)")
+    gerar.set_defaults(funcao=comando_gerar)
+
+    importar = subparsers.add_parser('importar', help="Importa dados de outro arquivo")
+    importar.add_argument('arquivo')
+    importar.add_argument('--substituir', action='store_true',
+                          help="Substitui os dados atuais em vez de mesclar")
+    importar.set_defaults(funcao=comando_importar)
+
+    exportar = subparsers.add_parser('exportar', help="Exporta os dados cadastrados")
+    exportar.add_argument('arquivo')
+    exportar.set_defaults(funcao=comando_exportar)
+
+    validar = subparsers.add_parser('validar', help="Verifica a consistência dos dados")
+    validar.add_argument('--estrito', action='store_true', help="Avisos também contam como falha")
+    validar.set_defaults(funcao=comando_validar)
+
+    migrar = subparsers.add_parser('migrar-datas', help="Adiciona o ano às datas especiais antigas")
+    migrar.add_argument('--ano', type=int, default=datetime.now().year)
+    migrar.set_defaults(funcao=comando_migrar_datas)
+    return parser
+
+
+def main(argv=None):
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    if args.comando == 'gerar':
+        if args.data_inicial is None and not args.continuar:
+            parser.error("Informe --data-inicial (ou --continuar)")
+        if args.a_partir_de is not None:
+            if not args.continuar:
+                parser.error("--a-partir-de exige --continuar")
+            if args.a_partir_de < 1:
+                parser.error("--a-partir-de deve ser maior que zero")
+            args.a_partir_de -= 1
+    if args.perfil:
+        coletor = instrumentacao.ativar()
+    try:
+        return args.funcao(args)
+    except ErroDados as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return SAIDA_DADOS
+    except Exception as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return SAIDA_FALHA
+    finally:
+        if args.perfil:
+            instrumentacao.desativar()
+            coletor.salvar(args.perfil)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkcalendar import Calendar
+import aquecimento
 import escala_servico
-from datetime import datetime
+import escala_servico_motor
+import exportacao
+import progresso as progresso_geracao
+import tarefa_gui
+from datetime import datetime, timedelta
 import os
 import platform
 import subprocess
@@ -83,13 +88,9 @@ class EditarPessoaDialog:
         # Ordenar designações alfabeticamente
         designacoes = sorted([self.lista_designacoes.get(i) for i in sel])
         
-        # Se o nome mudou, remover o antigo e adicionar o novo
-        if novo_nome != self.nome_original:
-            del escala_servico.pessoas[self.nome_original]
-        
-        # Atualizar dados
-        escala_servico.pessoas[novo_nome] = designacoes
-        escala_servico.salvar_dados()
+        # Atualizar dados (se o nome mudou, a pessoa é renomeada)
+        escala_servico.repositorio.definir_pessoa(
+            novo_nome, designacoes, nome_anterior=self.nome_original)
         
         # Chamar callback de atualização
         self.callback_atualizar()
@@ -101,7 +102,7 @@ class GerarEscalaDialog:
     def __init__(self, parent, callback_gerar):
         self.top = tk.Toplevel(parent)
         self.top.title("Gerar Escala")
-        self.top.geometry("400x420")  # Increased height for better spacing
+        self.top.geometry("400x540")  # Increased height for better spacing
         self.top.transient(parent)  # Make the modal dependent on the main window
         self.top.grab_set()  # Make it modal
         
@@ -128,6 +129,23 @@ class GerarEscalaDialog:
         self.spinbox_semanas = ttk.Spinbox(main_frame, from_=1, to=52)
         self.spinbox_semanas.pack(pady=10)  # Increased padding
         
+        # Optimal mode: fill every designation that can be filled
+        self.modo_otimo = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame,
+                       text="Preencher o máximo de designações",
+                       variable=self.modo_otimo).pack(pady=5)
+        
+        # Best of N attempts and optional seed for reproducible results
+        opcoes_frame = ttk.Frame(main_frame)
+        opcoes_frame.pack(pady=5)
+        ttk.Label(opcoes_frame, text="Tentativas:").grid(row=0, column=0, sticky='e', padx=5, pady=2)
+        self.spinbox_tentativas = ttk.Spinbox(opcoes_frame, from_=1, to=1000, width=8)
+        self.spinbox_tentativas.set(1)
+        self.spinbox_tentativas.grid(row=0, column=1, sticky='w', pady=2)
+        ttk.Label(opcoes_frame, text="Semente (opcional):").grid(row=1, column=0, sticky='e', padx=5, pady=2)
+        self.entry_semente = ttk.Entry(opcoes_frame, width=12)
+        self.entry_semente.grid(row=1, column=1, sticky='w', pady=2)
+        
         # Style for button
         style = ttk.Style()
         style.configure('Modal.TButton', padding=(20, 15))  # Increased vertical padding
@@ -145,8 +163,17 @@ class GerarEscalaDialog:
             if semanas < 1:
                 raise ValueError("O número de semanas deve ser maior que zero")
             
+            modo = (escala_servico_motor.MODO_OTIMO if self.modo_otimo.get()
+                    else escala_servico_motor.MODO_GULOSO)
+            
+            tentativas = int(self.spinbox_tentativas.get())
+            if tentativas < 1:
+                raise ValueError("O número de tentativas deve ser maior que zero")
+            semente_str = self.entry_semente.get().strip()
+            semente = int(semente_str) if semente_str else None
+            
             # Call the callback with the selected values
-            callback(data, semanas)
+            callback(data, semanas, modo, semente, tentativas)
             
             # Close the dialog
             self.top.destroy()
@@ -183,6 +210,9 @@ class EscalaApp:
         
         # Update all lists after creating tabs
         self.atualizar_todas_listas()
+        
+        # Preload the PDF stack once the window is idle
+        aquecimento.agendar(self.root)
     
     def criar_footer(self):
         """Create footer with generate schedule button"""
@@ -214,7 +244,8 @@ class EscalaApp:
         """Open the generate schedule dialog"""
         dialog = GerarEscalaDialog(self.root, self.gerar_escala)
 
-    def gerar_escala(self, data, semanas):
+    def gerar_escala(self, data, semanas, modo=escala_servico_motor.MODO_GULOSO,
+                     semente=None, tentativas=1):
         """Generate schedule with the selected date and number of weeks"""
         try:
             # Open dialog to select directory and filename
@@ -226,36 +257,57 @@ class EscalaApp:
                 initialdir=os.getcwd(),
                 initialfile=nome_arquivo_sugerido,
                 defaultextension=".pdf",
-                filetypes=[("Arquivos PDF", "*.pdf"), ("Todos os arquivos", "*.*")]
+                filetypes=[("Arquivos PDF", "*.pdf")] + exportacao.TIPOS_ARQUIVO
+                          + [("Todos os arquivos", "*.*")]
             )
             
             if not caminho_completo:  # If user cancelled selection
                 return
             
-            # Generate schedule
-            escala_servico.gerar_escala_com_data(data_obj, semanas, caminho_completo)
-            messagebox.showinfo("Sucesso", f"Escala gerada com sucesso!\nSalva em: {caminho_completo}")
-            
-            # Open the PDF
-            try:
-                if platform.system() == 'Darwin':  # macOS
-                    subprocess.run(['open', caminho_completo])
-                elif platform.system() == 'Windows':  # Windows
-                    os.startfile(caminho_completo)
-                else:  # Linux
-                    subprocess.run(['xdg-open', caminho_completo])
-            except Exception as e:
-                messagebox.showwarning(
-                    "Aviso",
-                    f"PDF gerado com sucesso, mas não foi possível abri-lo automaticamente.\n"
-                    f"O arquivo está salvo em:\n{caminho_completo}"
-                )
-                
+            # Generate in the background; the window keeps responding
+            retrato = escala_servico.repositorio.retrato
+
+            def tarefa(progresso, cancelar):
+                escala = escala_servico.calcular_escala(
+                    data_obj, semanas, modo, semente, tentativas, dados=retrato,
+                    progresso=progresso, cancelar=cancelar)
+                progresso_geracao.verificar(cancelar)
+                escala_servico.salvar_escala_como(escala, caminho_completo)
+                return escala
+
+            tarefa_gui.executar(
+                self.root, tarefa,
+                ao_concluir=lambda escala: self.escala_gerada(escala, caminho_completo),
+                ao_falhar=lambda erro: messagebox.showerror("Erro", str(erro)))
+
         except ValueError:
             messagebox.showerror("Erro", "Número de semanas inválido")
         except Exception as e:
             messagebox.showerror("Erro", str(e))
 
+    def escala_gerada(self, escala, caminho_completo):
+        """Report the generated schedule and open the file"""
+        messagebox.showinfo(
+            "Sucesso",
+            f"Escala gerada com sucesso!\nSalva em: {caminho_completo}\n"
+            f"Semente: {escala.semente}"
+        )
+
+        # Open the generated file
+        try:
+            if platform.system() == 'Darwin':  # macOS
+                subprocess.run(['open', caminho_completo])
+            elif platform.system() == 'Windows':  # Windows
+                os.startfile(caminho_completo)
+            else:  # Linux
+                subprocess.run(['xdg-open', caminho_completo])
+        except Exception as e:
+            messagebox.showwarning(
+                "Aviso",
+                f"Arquivo gerado com sucesso, mas não foi possível abri-lo automaticamente.\n"
+                f"O arquivo está salvo em:\n{caminho_completo}"
+            )
+
     def atualizar_todas_listas(self):
         """Atualiza todas as listas da interface"""
         self.atualizar_lista_designacoes()
@@ -385,9 +437,9 @@ class EscalaApp:
                                       yscrollcommand=scrollbar.set)
         
         # Configurar colunas
-        self.lista_datas.heading('data', text='Data Início')
+        self.lista_datas.heading('data', text='Data')
         self.lista_datas.heading('descricao', text='Descrição')
-        self.lista_datas.column('data', width=50, minwidth=50)
+        self.lista_datas.column('data', width=170, minwidth=80)
         self.lista_datas.column('descricao', width=350, minwidth=200)
         
         self.lista_datas.pack(side=tk.LEFT, fill='both', expand=True)
@@ -402,6 +454,11 @@ class EscalaApp:
                           date_pattern='dd/mm/yyyy')
         self.cal.pack(pady=5)
         
+        ttk.Label(frame_cadastro, text="Duração (dias):").pack(pady=5)
+        self.spinbox_dias_evento = ttk.Spinbox(frame_cadastro, from_=1, to=31, width=5)
+        self.spinbox_dias_evento.set(1)
+        self.spinbox_dias_evento.pack(pady=5)
+        
         ttk.Label(frame_cadastro, text="Evento:").pack(pady=5)
         self.entry_evento = ttk.Entry(frame_cadastro, width=40)  # Aumentando a largura do campo
         self.entry_evento.pack(pady=5)
@@ -425,11 +482,16 @@ class EscalaApp:
                                     text="🗑️ Remover Tudo", 
                                     command=self.confirmar_remover_todas_datas)
         btn_remover_tudo.pack()
+        
+        # Botão para converter datas antigas (DD/MM) para o formato com ano
+        ttk.Button(frame_remover_tudo,
+                  text="Adicionar ano às datas antigas",
+                  command=self.migrar_datas_especiais).pack(pady=5)
     
     # Métodos de atualização das listas
     def atualizar_lista_designacoes(self):
         self.lista_designacoes.delete(0, tk.END)
-        for cargo in escala_servico.cargos:
+        for cargo in escala_servico.repositorio.retrato.cargos:
             self.lista_designacoes.insert(tk.END, cargo)
     
     def atualizar_lista_pessoas(self):
@@ -438,15 +500,16 @@ class EscalaApp:
             self.lista_pessoas.delete(item)
         
         # Inserir dados atualizados em ordem alfabética
-        for nome in sorted(escala_servico.pessoas.keys()):
-            cargos = escala_servico.pessoas[nome]
+        pessoas = escala_servico.repositorio.retrato.pessoas
+        for nome in sorted(pessoas.keys()):
+            cargos = pessoas[nome]
             # Ordenar cargos alfabeticamente
             cargos_ordenados = sorted(cargos)
             self.lista_pessoas.insert('', 'end', values=(nome, ', '.join(cargos_ordenados)))
     
     def atualizar_lista_designacoes_selecao(self):
         self.lista_designacoes_pessoa.delete(0, tk.END)
-        for cargo in escala_servico.cargos:
+        for cargo in escala_servico.repositorio.retrato.cargos:
             self.lista_designacoes_pessoa.insert(tk.END, cargo)
     
     def atualizar_lista_datas(self):
@@ -454,16 +517,16 @@ class EscalaApp:
         for item in self.lista_datas.get_children():
             self.lista_datas.delete(item)
         
-        # Inserir dados atualizados
-        for data, evento in sorted(escala_servico.datas_especiais.items()):
-            self.lista_datas.insert('', 'end', values=(data, evento))
+        # Inserir dados atualizados em ordem cronológica
+        datas_especiais = escala_servico.repositorio.retrato.datas_especiais
+        datas = sorted(datas_especiais, key=escala_servico_motor.chave_ordenacao_data_especial)
+        for data in datas:
+            self.lista_datas.insert('', 'end', values=(data, datas_especiais[data]))
     
     # Métodos de ação
     def adicionar_designacao(self):
         nome = self.entry_designacao.get().strip()
-        if nome and nome not in escala_servico.cargos:
-            escala_servico.cargos.append(nome)
-            escala_servico.salvar_dados()
+        if nome and escala_servico.repositorio.adicionar_cargo(nome):
             self.atualizar_todas_listas()
             self.entry_designacao.delete(0, tk.END)
         else:
@@ -472,12 +535,8 @@ class EscalaApp:
     def remover_designacao(self):
         sel = self.lista_designacoes.curselection()
         if sel:
-            cargo = escala_servico.cargos[sel[0]]
-            escala_servico.cargos.remove(cargo)
-            for p in list(escala_servico.pessoas):
-                if cargo in escala_servico.pessoas[p]:
-                    escala_servico.pessoas[p].remove(cargo)
-            escala_servico.salvar_dados()
+            cargo = self.lista_designacoes.get(sel[0])
+            escala_servico.repositorio.excluir_cargo(cargo)
             self.atualizar_todas_listas()
     
     def adicionar_pessoa(self):
@@ -485,9 +544,8 @@ class EscalaApp:
         sel = self.lista_designacoes_pessoa.curselection()
         if nome and sel:
             # Ordenar cargos alfabeticamente
-            cargos_selecionados = sorted([escala_servico.cargos[i] for i in sel])
-            escala_servico.pessoas[nome] = cargos_selecionados
-            escala_servico.salvar_dados()
+            cargos_selecionados = sorted([self.lista_designacoes_pessoa.get(i) for i in sel])
+            escala_servico.repositorio.definir_pessoa(nome, cargos_selecionados)
             self.atualizar_todas_listas()
             self.entry_nome.delete(0, tk.END)
             self.lista_designacoes_pessoa.selection_clear(0, tk.END)
@@ -500,9 +558,7 @@ class EscalaApp:
         if sel:
             item = self.lista_pessoas.item(sel[0])
             nome = item['values'][0]
-            if nome in escala_servico.pessoas:
-                del escala_servico.pessoas[nome]
-                escala_servico.salvar_dados()
+            if escala_servico.repositorio.excluir_pessoa(nome):
                 self.atualizar_todas_listas()
     
     def atualizar_designacoes_pessoa(self):
@@ -512,19 +568,26 @@ class EscalaApp:
             item = self.lista_pessoas.item(sel_pessoa[0])
             nome = item['values'][0]
             # Ordenar cargos alfabeticamente
-            cargos_selecionados = sorted([escala_servico.cargos[i] for i in sel_designacoes])
-            escala_servico.pessoas[nome] = cargos_selecionados
-            escala_servico.salvar_dados()
+            cargos_selecionados = sorted([self.lista_designacoes_pessoa.get(i)
+                                          for i in sel_designacoes])
+            escala_servico.repositorio.definir_pessoa(nome, cargos_selecionados)
             self.atualizar_todas_listas()
     
     def adicionar_data_especial(self):
         data = self.cal.get_date()
         evento = self.entry_evento.get().strip()
+        try:
+            dias = int(self.spinbox_dias_evento.get())
+            if dias < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Erro", "Duração do evento inválida")
+            return
         if evento:
             data_obj = datetime.strptime(data, "%d/%m/%Y")
-            data_key = data_obj.strftime("%d/%m")
-            escala_servico.datas_especiais[data_key] = evento
-            escala_servico.salvar_dados()
+            data_key = escala_servico_motor.formatar_data_especial(
+                data_obj, data_obj + timedelta(days=dias - 1))
+            escala_servico.repositorio.definir_data_especial(data_key, evento)
             self.atualizar_todas_listas()
             self.entry_evento.delete(0, tk.END)
         else:
@@ -535,11 +598,22 @@ class EscalaApp:
         if sel:
             item = self.lista_datas.item(sel[0])
             data = item['values'][0]
-            if data in escala_servico.datas_especiais:
-                del escala_servico.datas_especiais[data]
-                escala_servico.salvar_dados()
+            if escala_servico.repositorio.excluir_data_especial(data):
                 self.atualizar_todas_listas()
     
+    def migrar_datas_especiais(self):
+        """Converte as datas especiais sem ano (DD/MM) para o ano atual"""
+        ano = datetime.now().year
+        resposta = messagebox.askokcancel(
+            "Confirmação",
+            f"As datas especiais cadastradas sem ano passarão a valer apenas para {ano}.\n"
+            "Deseja continuar?"
+        )
+        if resposta:
+            alteradas = escala_servico.migrar_datas_especiais(ano)
+            self.atualizar_todas_listas()
+            messagebox.showinfo("Sucesso", f"{alteradas} data(s) especial(is) convertida(s).")
+    
     def focar_lista_designacoes(self):
         """Após digitar o nome, foca na lista de designações"""
         self.lista_designacoes_pessoa.focus_set()
@@ -552,14 +626,15 @@ class EscalaApp:
         # Obter dados da pessoa selecionada
         item = self.lista_pessoas.item(sel[0])
         nome = item['values'][0]
-        designacoes_atuais = escala_servico.pessoas[nome]
+        retrato = escala_servico.repositorio.retrato
+        designacoes_atuais = retrato.pessoas[nome]
         
         # Criar diálogo de edição
         dialog = EditarPessoaDialog(
             self.root,
             nome,
             designacoes_atuais,
-            escala_servico.cargos,
+            retrato.cargos,
             self.atualizar_todas_listas
         )
         
@@ -568,7 +643,7 @@ class EscalaApp:
 
     def confirmar_remover_todas_datas(self):
         """Abre um modal de confirmação para remover todas as datas especiais"""
-        if not escala_servico.datas_especiais:
+        if not escala_servico.repositorio.retrato.datas_especiais:
             messagebox.showinfo("Informação", "Não há datas especiais cadastradas.")
             return
             
@@ -580,8 +655,7 @@ class EscalaApp:
         )
         
         if resposta:
-            escala_servico.datas_especiais.clear()
-            escala_servico.salvar_dados()
+            escala_servico.repositorio.limpar_datas_especiais()
             self.atualizar_todas_listas()
             messagebox.showinfo("Sucesso", "Todas as datas especiais foram removidas.")
 
@@ -0,0 +1,859 @@
+"""Motor de geração da escala de serviço, independente de interface e de PDF.
+
+O motor recebe um retrato dos dados (designações, pessoas e datas especiais),
+uma data inicial e um número de semanas, e devolve um objeto ``Escala``.
+A renderização (PDF ou outro formato) é uma etapa separada e opcional.
+"""
+import bisect
+import heapq
+import json
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import instrumentacao
+import progresso as progresso_geracao
+
+# Modos de preenchimento de cada semana
+MODO_GULOSO = 'guloso'  # Sorteia a ordem das designações e preenche uma a uma
+MODO_OTIMO = 'otimo'    # Atribuição de custo mínimo com preenchimento máximo
+MODOS = (MODO_GULOSO, MODO_OTIMO)
+
+
+@dataclass(frozen=True)
+class DadosEscala:
+    """Retrato imutável dos dados usados na geração da escala.
+
+    Os dicionários nunca são alterados depois de criado o retrato: uma edição
+    cria um novo retrato (ver ``repositorio_servico``), com ``versao`` seguinte.
+    """
+    cargos: Tuple[str, ...] = ()
+    pessoas: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    datas_especiais: Dict[str, str] = field(default_factory=dict)
+    versao: int = 0
+
+    @classmethod
+    def de_dicionarios(cls, cargos, pessoas, datas_especiais):
+        """Cria o retrato a partir das estruturas usadas por escala_servico"""
+        return cls(
+            cargos=tuple(cargos),
+            pessoas={nome: tuple(lista) for nome, lista in pessoas.items()},
+            datas_especiais=dict(datas_especiais),
+        )
+
+    @classmethod
+    def de_arquivo(cls, caminho):
+        """Carrega o retrato a partir de um arquivo no formato de dados_servico.json"""
+        with instrumentacao.atual().trecho('carregar', arquivo=caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        return cls.de_dicionarios(
+            dados.get('designações', []),
+            dados.get('pessoas', {}),
+            dados.get('datas_especiais', {}),
+        )
+
+    def para_dicionario(self):
+        """Converte o retrato para o formato de dados_servico.json"""
+        return {
+            'designações': list(self.cargos),
+            'pessoas': {nome: list(lista) for nome, lista in self.pessoas.items()},
+            'datas_especiais': dict(self.datas_especiais),
+        }
+
+
+@dataclass
+class SemanaEscala:
+    """Uma semana da escala: as designações preenchidas ou um evento especial"""
+    inicio: datetime
+    fim: datetime
+    designacoes: Dict[str, Optional[str]] = field(default_factory=dict)
+    evento_especial: Optional[str] = None
+
+    @property
+    def intervalo(self):
+        return formatar_intervalo_data(self.inicio, self.fim)
+
+    def como_linha(self):
+        """Converte a semana para o formato de linha usado por gerar_pdf_escala"""
+        linha = {'intervalo': self.intervalo}
+        if self.evento_especial is not None:
+            linha['evento_especial'] = self.evento_especial
+            return linha
+        for cargo, pessoa in self.designacoes.items():
+            linha[cargo] = pessoa if pessoa is not None else '-'
+        return linha
+
+    def para_dicionario(self):
+        """Representação em JSON da semana, como em ``Escala.para_dicionario``"""
+        return {
+            'inicio': self.inicio.strftime('%Y-%m-%d'),
+            'fim': self.fim.strftime('%Y-%m-%d'),
+            'designacoes': self.designacoes,
+            'evento_especial': self.evento_especial,
+        }
+
+
+@dataclass
+class Contadores:
+    """Contadores de justiça acumulados por nome, que podem ser persistidos"""
+    uso_pessoa: Dict[str, int] = field(default_factory=dict)
+    uso_pessoa_designacao: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def registrar(self, pessoa, cargo):
+        self.uso_pessoa[pessoa] = self.uso_pessoa.get(pessoa, 0) + 1
+        por_cargo = self.uso_pessoa_designacao.setdefault(pessoa, {})
+        por_cargo[cargo] = por_cargo.get(cargo, 0) + 1
+
+    def copiar(self):
+        return Contadores(
+            dict(self.uso_pessoa),
+            {pessoa: dict(usos) for pessoa, usos in self.uso_pessoa_designacao.items()}
+        )
+
+    def para_dicionario(self):
+        return {
+            'uso_pessoa': dict(self.uso_pessoa),
+            'uso_pessoa_designacao': {p: dict(u) for p, u in self.uso_pessoa_designacao.items()},
+        }
+
+    @classmethod
+    def de_dicionario(cls, dados):
+        return cls(
+            {p: int(u) for p, u in dados.get('uso_pessoa', {}).items()},
+            {p: {c: int(n) for c, n in usos.items()}
+             for p, usos in dados.get('uso_pessoa_designacao', {}).items()}
+        )
+
+
+@dataclass
+class Escala:
+    """Resultado da geração: as designações em ordem e as semanas geradas.
+
+    ``contadores_iniciais`` guarda o histórico anterior à primeira semana,
+    para que a escala possa ser estendida ou retomada depois.
+    """
+    cargos: Tuple[str, ...]
+    semanas: List[SemanaEscala] = field(default_factory=list)
+    semente: Optional[int] = None
+    contadores_iniciais: Contadores = field(default_factory=Contadores)
+
+    def contadores(self, ate_semana=None):
+        """Contadores acumulados do histórico e das semanas anteriores a ``ate_semana``"""
+        contadores = self.contadores_iniciais.copiar()
+        for semana in self.semanas[:ate_semana]:
+            if semana.evento_especial is not None:
+                continue
+            for cargo, pessoa in semana.designacoes.items():
+                if pessoa is not None:
+                    contadores.registrar(pessoa, cargo)
+        return contadores
+
+    def para_dicionario(self):
+        """Representação em JSON, usada para salvar e retomar a escala"""
+        return {
+            'designações': list(self.cargos),
+            'semente': self.semente,
+            'contadores_iniciais': self.contadores_iniciais.para_dicionario(),
+            'semanas': [semana.para_dicionario() for semana in self.semanas],
+        }
+
+    @classmethod
+    def de_dicionario(cls, dados):
+        return cls(
+            cargos=tuple(dados.get('designações', [])),
+            semente=dados.get('semente'),
+            contadores_iniciais=Contadores.de_dicionario(dados.get('contadores_iniciais', {})),
+            semanas=[
+                SemanaEscala(
+                    datetime.strptime(semana['inicio'], '%Y-%m-%d'),
+                    datetime.strptime(semana['fim'], '%Y-%m-%d'),
+                    dict(semana.get('designacoes') or {}),
+                    semana.get('evento_especial'),
+                )
+                for semana in dados.get('semanas', [])
+            ],
+        )
+
+    def linhas(self):
+        """Lista de linhas no formato aceito por gerar_pdf_escala"""
+        return [semana.como_linha() for semana in self.semanas]
+
+    def iterar_linhas(self):
+        """Como ``linhas``, mas produzidas uma a uma (para o PDF em fluxo)"""
+        return (semana.como_linha() for semana in self.semanas)
+
+    def vagas_nao_preenchidas(self):
+        """Quantidade de designações que ficaram sem pessoa ('-')"""
+        return sum(
+            1
+            for semana in self.semanas
+            if semana.evento_especial is None
+            for pessoa in semana.designacoes.values()
+            if pessoa is None
+        )
+
+
+def salvar_escala(escala, caminho):
+    """Salva a escala gerada em JSON para ser estendida ou retomada depois"""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(escala.para_dicionario(), f, indent=4, ensure_ascii=False)
+
+
+def carregar_escala(caminho):
+    """Carrega uma escala salva com salvar_escala"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return Escala.de_dicionario(json.load(f))
+
+
+def semanas_alteradas(anterior, nova):
+    """Índices das semanas que diferem entre duas versões da escala"""
+    alteradas = []
+    for i in range(max(len(anterior.semanas), len(nova.semanas))):
+        if i >= len(anterior.semanas) or i >= len(nova.semanas):
+            alteradas.append(i)
+        elif anterior.semanas[i].como_linha() != nova.semanas[i].como_linha():
+            alteradas.append(i)
+    return alteradas
+
+
+def gerar_intervalo_datas(data_inicial, num_semanas):
+    intervalos = []
+    for i in range(num_semanas):
+        inicio = data_inicial + timedelta(days=i*7)
+        fim = inicio + timedelta(days=6)
+        intervalos.append((inicio, fim))
+    return intervalos
+
+
+def formatar_intervalo_data(inicio, fim):
+    return f"{inicio.strftime('%d/%m')} a {fim.strftime('%d/%m')}"
+
+
+def validar_dados(dados):
+    """Verifica a consistência dos dados; retorna ``(erros, avisos)``"""
+    erros = []
+    avisos = []
+    if not dados.cargos:
+        erros.append("Nenhuma designação cadastrada.")
+    repetidas = sorted({cargo for cargo in dados.cargos if dados.cargos.count(cargo) > 1})
+    for cargo in repetidas:
+        erros.append(f"Designação repetida: {cargo}")
+    if not any(dados.pessoas.values()):
+        erros.append("Nenhuma pessoa com designação válida cadastrada.")
+
+    cargos = set(dados.cargos)
+    aptos = {cargo: 0 for cargo in dados.cargos}
+    for nome, lista_cargos in sorted(dados.pessoas.items()):
+        if not lista_cargos:
+            avisos.append(f"{nome} está sem designação e será desconsiderado na escala.")
+        for cargo in lista_cargos:
+            if cargo in cargos:
+                aptos[cargo] += 1
+            else:
+                erros.append(f"{nome} tem uma designação não cadastrada: {cargo}")
+    for cargo, quantidade in aptos.items():
+        if quantidade == 0:
+            avisos.append(f"Nenhuma pessoa apta para a designação: {cargo}")
+
+    for chave in dados.datas_especiais:
+        try:
+            inicio, _ = interpretar_data_especial(chave)
+        except ValueError as e:
+            erros.append(str(e))
+            continue
+        if inicio is None:
+            avisos.append(f"Data especial sem ano (repete todo ano): {chave}")
+    return erros, avisos
+
+
+def interpretar_data_especial(chave):
+    """Interpreta a chave de uma data especial.
+
+    Formatos aceitos:
+    - ``DD/MM/AAAA``: um único dia;
+    - ``DD/MM/AAAA a DD/MM/AAAA``: evento de vários dias (inclusivo);
+    - ``DD/MM``: formato antigo, sem ano, que se repete todo ano.
+
+    Retorna ``(inicio, fim)`` como ``date`` ou, no formato antigo,
+    ``(None, (dia, mes))``. Lança ``ValueError`` para chaves inválidas.
+    """
+    partes = [parte.strip() for parte in chave.split(' a ')]
+    if len(partes) == 2:
+        inicio = datetime.strptime(partes[0], "%d/%m/%Y").date()
+        fim = datetime.strptime(partes[1], "%d/%m/%Y").date()
+        if fim < inicio:
+            raise ValueError(f"Intervalo de datas invertido: {chave}")
+        return inicio, fim
+    if len(partes) == 1 and partes[0].count('/') == 2:
+        dia = datetime.strptime(partes[0], "%d/%m/%Y").date()
+        return dia, dia
+    if len(partes) == 1 and partes[0].count('/') == 1:
+        # Validar com um ano bissexto para aceitar 29/02
+        dia = datetime.strptime(f"{partes[0]}/2000", "%d/%m/%Y").date()
+        return None, (dia.day, dia.month)
+    raise ValueError(f"Data especial inválida: {chave}")
+
+
+def formatar_data_especial(inicio, fim=None):
+    """Monta a chave de uma data especial com ano (e intervalo, se houver)"""
+    if fim is None or fim == inicio:
+        return inicio.strftime("%d/%m/%Y")
+    return f"{inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')}"
+
+
+def chave_ordenacao_data_especial(chave):
+    """Chave para listar datas especiais em ordem cronológica"""
+    try:
+        inicio, fim = interpretar_data_especial(chave)
+    except ValueError:
+        return (2, chave)
+    if inicio is None:
+        dia, mes = fim
+        return (0, mes, dia)
+    return (1, inicio.toordinal(), fim.toordinal())
+
+
+def migrar_datas_especiais(datas_especiais, ano):
+    """Converte as chaves antigas ``DD/MM`` para ``DD/MM/AAAA`` no ano informado.
+
+    Chaves que já têm ano são mantidas. Retorna um novo dicionário.
+    """
+    migradas = {}
+    for chave, evento in datas_especiais.items():
+        try:
+            inicio, fim = interpretar_data_especial(chave)
+        except ValueError:
+            migradas[chave] = evento
+            continue
+        if inicio is None:
+            dia, mes = fim
+            try:
+                chave = formatar_data_especial(date(ano, mes, dia))
+            except ValueError:
+                # 29/02 em ano não bissexto: manter no formato antigo
+                pass
+        migradas.setdefault(chave, evento)
+    return migradas
+
+
+class IndiceDatasEspeciais:
+    """Índice ordenado de intervalos de datas especiais para um horizonte.
+
+    É montado uma vez por geração: as chaves são interpretadas, as datas sem
+    ano são expandidas para cada ano do horizonte e os intervalos ficam
+    ordenados pelo início (em ordinais de data). Cada consulta semanal é uma
+    busca binária.
+    """
+
+    def __init__(self, datas_especiais, inicio, fim):
+        inicio = _ordinal(inicio)
+        fim = _ordinal(fim)
+        intervalos = []
+        for chave, evento in datas_especiais.items():
+            try:
+                data_inicio, data_fim = interpretar_data_especial(chave)
+            except ValueError:
+                continue
+            if data_inicio is not None:
+                a, b = data_inicio.toordinal(), data_fim.toordinal()
+                if b >= inicio and a <= fim:
+                    intervalos.append((a, b, evento))
+                continue
+            dia, mes = data_fim
+            for ano in range(date.fromordinal(inicio).year, date.fromordinal(fim).year + 1):
+                try:
+                    a = date(ano, mes, dia).toordinal()
+                except ValueError:
+                    continue
+                if inicio <= a <= fim:
+                    intervalos.append((a, a, evento))
+        intervalos.sort(key=lambda intervalo: (intervalo[0], intervalo[1]))
+        self._inicios = [a for a, _, _ in intervalos]
+        self._fins = [b for _, b, _ in intervalos]
+        self._eventos = [evento for _, _, evento in intervalos]
+        # Maior fim entre os intervalos 0..i, para achar os que cobrem um dia
+        self._fim_maximo = []
+        maior = None
+        for b in self._fins:
+            maior = b if maior is None or b > maior else maior
+            self._fim_maximo.append(maior)
+
+    def consultar(self, inicio, fim):
+        """Evento do primeiro dia do intervalo ``[inicio, fim]`` que tem evento"""
+        inicio = _ordinal(inicio)
+        fim = _ordinal(fim)
+        j = bisect.bisect_right(self._inicios, inicio)
+        # Intervalos que começaram até o primeiro dia e ainda o cobrem
+        i = j - 1
+        while i >= 0 and self._fim_maximo[i] >= inicio:
+            if self._fins[i] >= inicio:
+                return self._eventos[i]
+            i -= 1
+        # Senão, o primeiro intervalo que começa dentro da semana
+        if j < len(self._inicios) and self._inicios[j] <= fim:
+            return self._eventos[j]
+        return None
+
+
+def _ordinal(dia):
+    if isinstance(dia, datetime):
+        dia = dia.date()
+    return dia.toordinal()
+
+
+def verificar_evento_especial(datas_especiais, inicio, fim):
+    """Verifica se há algum evento especial no intervalo de datas"""
+    return IndiceDatasEspeciais(datas_especiais, inicio, fim).consultar(inicio, fim)
+
+
+@dataclass(frozen=True)
+class IndiceElegibilidade:
+    """Índice invertido designação -> conjunto de pessoas aptas, em bits.
+
+    Cada pessoa válida recebe um índice inteiro (na ordem de cadastro) e cada
+    designação guarda um inteiro cujo bit ``i`` indica que a pessoa ``i`` pode
+    exercê-la. Assim, encontrar candidatos é uma operação AND de máscaras.
+    """
+    nomes: Tuple[str, ...]
+    mascaras: Tuple[int, ...]
+
+    @classmethod
+    def construir(cls, cargos, pessoas):
+        """Monta o índice uma única vez por geração"""
+        posicao_cargo = {cargo: i for i, cargo in enumerate(cargos)}
+        mascaras = [0] * len(cargos)
+        nomes = []
+        for nome, lista_cargos in pessoas.items():
+            if not lista_cargos:
+                continue
+            bit = 1 << len(nomes)
+            nomes.append(nome)
+            for cargo in lista_cargos:
+                i = posicao_cargo.get(cargo)
+                if i is not None:
+                    mascaras[i] |= bit
+        return cls(tuple(nomes), tuple(mascaras))
+
+
+def iterar_bits(mascara):
+    """Índices dos bits ligados, do menor para o maior"""
+    while mascara:
+        bit = mascara & -mascara
+        yield bit.bit_length() - 1
+        mascara ^= bit
+
+
+class FilasCandidatos:
+    """Heaps por designação com as pessoas aptas, ordenadas pelos contadores.
+
+    A chave de cada entrada é ``(uso na designação, uso total, índice)``, a
+    mesma ordem usada antes na ordenação completa dos candidatos. Quando os
+    contadores de uma pessoa mudam, novas entradas são inseridas e as antigas
+    ficam obsoletas (verificadas pela versão da pessoa) e são descartadas
+    preguiçosamente ao chegarem ao topo.
+    """
+
+    def __init__(self, indice, cargos, contadores=None):
+        self.uso_pessoa = [0] * len(indice.nomes)
+        self.uso_pessoa_designacao = [[0] * len(cargos) for _ in indice.nomes]
+        if contadores is not None:
+            posicao_cargo = {cargo: c for c, cargo in enumerate(cargos)}
+            for p, nome in enumerate(indice.nomes):
+                self.uso_pessoa[p] = contadores.uso_pessoa.get(nome, 0)
+                for cargo, uso in contadores.uso_pessoa_designacao.get(nome, {}).items():
+                    if cargo in posicao_cargo:
+                        self.uso_pessoa_designacao[p][posicao_cargo[cargo]] = uso
+        # Entradas de heap examinadas, para a instrumentação
+        self.examinados = 0
+        self._versao = [0] * len(indice.nomes)
+        self._cargos_pessoa = [[] for _ in indice.nomes]
+        self._heaps = []
+        for c, mascara in enumerate(indice.mascaras):
+            heap = [
+                (self.uso_pessoa_designacao[p][c], self.uso_pessoa[p], p, 0)
+                for p in iterar_bits(mascara)
+            ]
+            for _, _, p, _ in heap:
+                self._cargos_pessoa[p].append(c)
+            heapq.heapify(heap)
+            self._heaps.append(heap)
+        # Cada pessoa apta tem exatamente uma entrada válida por heap
+        self._aptos = [len(heap) for heap in self._heaps]
+
+    def escolher(self, c, alocados):
+        """Pessoa apta de menor chave para a designação ``c`` fora de ``alocados``"""
+        heap = self._heaps[c]
+        versao = self._versao
+        adiados = []
+        escolhido = None
+        while heap:
+            self.examinados += 1
+            _, _, p, v = heap[0]
+            if v != versao[p]:
+                heapq.heappop(heap)
+            elif alocados >> p & 1:
+                adiados.append(heapq.heappop(heap))
+            else:
+                escolhido = p
+                break
+        for entrada in adiados:
+            heapq.heappush(heap, entrada)
+        return escolhido
+
+    def registrar(self, p, c):
+        """Contabiliza a designação ``c`` para a pessoa ``p`` e atualiza os heaps"""
+        self.uso_pessoa[p] += 1
+        self.uso_pessoa_designacao[p][c] += 1
+        self._versao[p] += 1
+        versao = self._versao[p]
+        uso = self.uso_pessoa[p]
+        uso_designacao = self.uso_pessoa_designacao[p]
+        for cargo in self._cargos_pessoa[p]:
+            heap = self._heaps[cargo]
+            heapq.heappush(heap, (uso_designacao[cargo], uso, p, versao))
+            # Compactar quando as entradas obsoletas dominam o heap
+            if len(heap) > 2 * self._aptos[cargo] + 64:
+                self._compactar(cargo)
+
+    def _compactar(self, c):
+        versao = self._versao
+        vivos = [e for e in self._heaps[c] if e[3] == versao[e[2]]]
+        heapq.heapify(vivos)
+        self._heaps[c] = vivos
+
+
+def atribuicao_custo_minimo(custos):
+    """Resolve a atribuição de custo mínimo (método húngaro) de linhas a colunas.
+
+    ``custos`` é uma matriz ``n x m`` com ``n <= m``; ``float('inf')`` marca
+    pares proibidos. Deve existir ao menos uma atribuição completa viável.
+    Retorna, para cada linha, o índice da coluna atribuída.
+    """
+    n = len(custos)
+    m = len(custos[0]) if n else 0
+    inf = float('inf')
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    dono = [0] * (m + 1)
+    caminho = [0] * (m + 1)
+    for i in range(1, n + 1):
+        dono[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        usado = [False] * (m + 1)
+        while True:
+            usado[j0] = True
+            i0 = dono[j0]
+            linha = custos[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not usado[j]:
+                    atual = linha[j - 1] - ui0 - v[j]
+                    if atual < minv[j]:
+                        minv[j] = atual
+                        caminho[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if usado[j]:
+                    u[dono[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if dono[j0] == 0:
+                break
+        while j0:
+            j1 = caminho[j0]
+            dono[j0] = dono[j1]
+            j0 = j1
+    resultado = [None] * n
+    for j in range(1, m + 1):
+        if dono[j]:
+            resultado[dono[j] - 1] = j - 1
+    return resultado
+
+
+def _atribuir_semana_otima(indice, filas, num_cargos):
+    """Preenche uma semana inteira resolvendo uma atribuição de custo mínimo.
+
+    O custo de dar a designação ``c`` à pessoa ``p`` segue a mesma ordem do
+    modo guloso: primeiro o uso de ``p`` em ``c``, depois o uso total de ``p``.
+    Cada designação tem ainda uma coluna "vaga" própria, tão cara que só é
+    usada quando não há atribuição completa; assim o preenchimento é máximo.
+    Retorna ``{c: p}`` para as designações preenchidas.
+    """
+    uso_pessoa = filas.uso_pessoa
+    uso_pessoa_designacao = filas.uso_pessoa_designacao
+    peso = max(uso_pessoa, default=0) + 1
+
+    # Basta considerar as num_cargos pessoas mais baratas de cada designação:
+    # as demais designações ocupam no máximo num_cargos - 1 delas.
+    linhas = [c for c in range(num_cargos) if indice.mascaras[c]]
+    if not linhas:
+        return {}
+    limite = len(linhas)
+    colunas = set()
+    for c in linhas:
+        colunas.update(heapq.nsmallest(
+            limite,
+            iterar_bits(indice.mascaras[c]),
+            key=lambda p: (uso_pessoa_designacao[p][c], uso_pessoa[p], p)
+        ))
+    colunas = sorted(colunas)
+    filas.examinados += len(linhas) * len(colunas)
+
+    inf = float('inf')
+    custos = []
+    maior_custo = 0
+    for c in linhas:
+        mascara = indice.mascaras[c]
+        linha = []
+        for p in colunas:
+            if mascara >> p & 1:
+                custo = uso_pessoa_designacao[p][c] * peso + uso_pessoa[p]
+                maior_custo = max(maior_custo, custo)
+                linha.append(custo)
+            else:
+                linha.append(inf)
+        custos.append(linha)
+    custo_vaga = limite * (maior_custo + 1) + 1
+    for r, linha in enumerate(custos):
+        linha.extend(custo_vaga if k == r else inf for k in range(limite))
+
+    atribuicao = {}
+    for c, coluna in zip(linhas, atribuicao_custo_minimo(custos)):
+        if coluna < len(colunas):
+            atribuicao[c] = colunas[coluna]
+    return atribuicao
+
+
+def nova_semente():
+    """Semente aleatória para uma geração que deve poder ser reproduzida"""
+    return int.from_bytes(os.urandom(4), 'big')
+
+
+def gerar_escala(dados, data_inicial, semanas, modo=MODO_GULOSO, semente=None,
+                 base=None, a_partir_de=None, contadores=None, progresso=None, cancelar=None):
+    """Gera a escala a partir de uma data específica e número de semanas.
+
+    ``modo`` escolhe como cada semana é preenchida: ``MODO_GULOSO`` (padrão,
+    designação por designação em ordem sorteada) ou ``MODO_OTIMO``
+    (atribuição de custo mínimo, que nunca deixa vaga evitável).
+    O sorteio de cada semana usa um gerador próprio derivado de ``semente``
+    e da data da semana; a mesma semente com os mesmos dados sempre produz
+    a mesma escala.
+
+    Para estender ou retomar uma escala, passe em ``base`` a escala anterior:
+    as semanas antes de ``a_partir_de`` (padrão: todas as de ``base``) são
+    mantidas como estão e só as seguintes são recalculadas, continuando os
+    contadores de justiça. ``semanas`` é o total de semanas do resultado e
+    ``data_inicial`` pode ser ``None`` para usar o início de ``base``.
+    ``contadores`` informa o histórico anterior à primeira semana; com
+    ``base``, o padrão é o histórico salvo nela. Sem ``semente``, usa-se a
+    semente de ``base``, para que semanas sem mudanças saiam iguais.
+
+    ``progresso(feitas, total)`` é chamado a cada semana, contando as
+    mantidas de ``base`` como feitas; acionar o evento ``cancelar`` interrompe
+    a geração com ``progresso.GeracaoCancelada`` (ver o módulo ``progresso``).
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de geração inválido: {modo}")
+    if not dados.cargos:
+        raise Exception("Cadastre designações primeiro.")
+
+    congeladas = []
+    if base is not None:
+        if base.semanas:
+            if data_inicial is None:
+                data_inicial = base.semanas[0].inicio
+            elif data_inicial.date() != base.semanas[0].inicio.date():
+                raise ValueError("A data inicial não coincide com a da escala anterior")
+        if a_partir_de is None:
+            a_partir_de = len(base.semanas)
+        if a_partir_de < 0:
+            raise ValueError("A semana de retomada não pode ser negativa")
+        congeladas = base.semanas[:min(a_partir_de, semanas)]
+        if contadores is None:
+            contadores = base.contadores_iniciais
+        if semente is None:
+            semente = base.semente
+    if data_inicial is None:
+        raise ValueError("Informe a data inicial")
+    if contadores is None:
+        contadores = Contadores()
+    if semente is None:
+        semente = nova_semente()
+
+    escala = Escala(cargos=dados.cargos, semente=semente,
+                    contadores_iniciais=contadores.copiar())
+    escala.semanas.extend(congeladas)
+    intervalos = gerar_intervalo_datas(data_inicial, semanas)
+    instr = instrumentacao.atual()
+    # Um só trecho para todos os índices da geração
+    with instr.trecho('indices'):
+        indice = IndiceElegibilidade.construir(dados.cargos, dados.pessoas)
+        if not indice.nomes:
+            raise Exception("Nenhuma pessoa com designação válida cadastrada.")
+        filas = FilasCandidatos(indice, dados.cargos, escala.contadores())
+        eventos = IndiceDatasEspeciais(
+            dados.datas_especiais,
+            data_inicial,
+            intervalos[-1][1] if intervalos else data_inicial
+        )
+
+    for feitas, (inicio, fim) in enumerate(intervalos[len(congeladas):], len(congeladas) + 1):
+        progresso_geracao.verificar(cancelar)
+        with instr.trecho('semana', inicio=inicio.date()):
+            escala.semanas.append(_gerar_semana(dados, indice, filas, eventos, modo, semente, inicio, fim))
+        progresso_geracao.informar(progresso, feitas, len(intervalos))
+
+    instr.contar('semanas', len(intervalos) - len(congeladas))
+    instr.contar('candidatos_examinados', filas.examinados)
+    instr.contar('vagas_nao_preenchidas', sum(
+        1
+        for semana in escala.semanas[len(congeladas):]
+        if semana.evento_especial is None
+        for pessoa in semana.designacoes.values()
+        if pessoa is None
+    ))
+    return escala
+
+
+def _gerar_semana(dados, indice, filas, eventos, modo, semente, inicio, fim):
+    """Preenche uma semana da escala, atualizando os contadores em ``filas``"""
+    # Verificar se há evento especial no período
+    evento = eventos.consultar(inicio, fim)
+    if evento:
+        return SemanaEscala(inicio, fim, evento_especial=evento)
+
+    # Se não houver evento especial, gerar escala normal
+    designacoes = dict.fromkeys(dados.cargos)
+    if modo == MODO_OTIMO:
+        for c, escolhido in _atribuir_semana_otima(indice, filas, len(dados.cargos)).items():
+            designacoes[dados.cargos[c]] = indice.nomes[escolhido]
+            filas.registrar(escolhido, c)
+        return SemanaEscala(inicio, fim, designacoes)
+
+    alocados = 0
+    cargos_sorteio = list(range(len(dados.cargos)))
+    random.Random(semente * 1000003 + inicio.toordinal()).shuffle(cargos_sorteio)
+
+    for c in cargos_sorteio:
+        if not indice.mascaras[c] & ~alocados:
+            continue
+        # Menor (uso na designação, uso total); empate fica com a ordem de cadastro
+        escolhido = filas.escolher(c, alocados)
+        designacoes[dados.cargos[c]] = indice.nomes[escolhido]
+        alocados |= 1 << escolhido
+        filas.registrar(escolhido, c)
+
+    return SemanaEscala(inicio, fim, designacoes)
+
+
+def _variancia(valores):
+    if not valores:
+        return 0.0
+    media = sum(valores) / len(valores)
+    return sum((v - media) ** 2 for v in valores) / len(valores)
+
+
+def pontuar_escala(escala, dados):
+    """Pontuação de justiça de uma escala; quanto menor, melhor.
+
+    Retorna ``(vagas não preenchidas, variância das designações por pessoa,
+    variância média por designação)``. As variâncias consideram todas as
+    pessoas aptas, inclusive as que não foram escaladas.
+    """
+    uso_pessoa = {nome: 0 for nome, lista in dados.pessoas.items() if lista}
+    uso_designacao = {cargo: {} for cargo in escala.cargos}
+    for nome, lista_cargos in dados.pessoas.items():
+        for cargo in lista_cargos:
+            if cargo in uso_designacao:
+                uso_designacao[cargo][nome] = 0
+    for semana in escala.semanas:
+        if semana.evento_especial is not None:
+            continue
+        for cargo, pessoa in semana.designacoes.items():
+            if pessoa is not None:
+                uso_pessoa[pessoa] = uso_pessoa.get(pessoa, 0) + 1
+                uso_designacao[cargo][pessoa] = uso_designacao[cargo].get(pessoa, 0) + 1
+    variancias = [_variancia(list(usos.values())) for usos in uso_designacao.values() if usos]
+    return (
+        escala.vagas_nao_preenchidas(),
+        round(_variancia(list(uso_pessoa.values())), 9),
+        round(sum(variancias) / len(variancias), 9) if variancias else 0.0,
+    )
+
+
+def _pontuar_semente(argumentos):
+    """Tarefa executada em cada processo: gera e pontua uma semente"""
+    dados, data_inicial, semanas, modo, semente, extras = argumentos
+    escala = gerar_escala(dados, data_inicial, semanas, modo, semente, **extras)
+    return pontuar_escala(escala, dados), semente
+
+
+def _pontuar_lote(tarefas):
+    """Várias tentativas numa só tarefa do pool, para diluir o custo de envio"""
+    return [_pontuar_semente(tarefa) for tarefa in tarefas]
+
+
+def gerar_melhor_escala(dados, data_inicial, semanas, tentativas, modo=MODO_GULOSO,
+                        semente=None, processos=None, base=None, a_partir_de=None,
+                        contadores=None, progresso=None, cancelar=None):
+    """Gera ``tentativas`` escalas com sementes distintas e devolve a mais justa.
+
+    As sementes de cada tentativa derivam de ``semente``, então a busca
+    inteira é reprodutível. As tentativas são distribuídas em um pool de
+    processos (``processos=1`` executa tudo no processo atual). A escala
+    vencedora é gerada de novo a partir da sua semente, que fica registrada
+    em ``Escala.semente``. ``base``, ``a_partir_de`` e ``contadores`` têm o
+    mesmo significado que em ``gerar_escala``, assim como ``progresso`` e
+    ``cancelar``: o total é de ``semanas`` por tentativa mais as da geração
+    final, e o cancelamento é verificado entre as tentativas.
+    """
+    if tentativas < 1:
+        raise ValueError("O número de tentativas deve ser maior que zero")
+    if semente is None:
+        semente = nova_semente()
+    rng = random.Random(semente)
+    sementes = [rng.getrandbits(32) for _ in range(tentativas)]
+    extras = {'base': base, 'a_partir_de': a_partir_de, 'contadores': contadores}
+    tarefas = [(dados, data_inicial, semanas, modo, s, extras) for s in sementes]
+
+    total = (tentativas + 1) * semanas
+    resultados = []
+    if processos == 1 or tentativas == 1:
+        for tarefa in tarefas:
+            progresso_geracao.verificar(cancelar)
+            resultados.append(_pontuar_semente(tarefa))
+            progresso_geracao.informar(progresso, len(resultados) * semanas, total)
+    else:
+        # Importado só aqui: o pool de processos é caro de importar e raramente usado
+        from concurrent.futures import ProcessPoolExecutor
+        tamanho = max(1, tentativas // 32)
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = [executor.submit(_pontuar_lote, tarefas[i:i + tamanho])
+                       for i in range(0, len(tarefas), tamanho)]
+            for futuro in futuros:
+                if cancelar is not None and cancelar.is_set():
+                    # Descarta as tentativas que ainda não começaram
+                    for pendente in futuros:
+                        pendente.cancel()
+                    progresso_geracao.verificar(cancelar)
+                resultados.extend(futuro.result())
+                progresso_geracao.informar(progresso, len(resultados) * semanas, total)
+
+    _, vencedora = min(resultados, key=lambda resultado: resultado[0])
+    final = None
+    if progresso is not None:
+        def final(feitas, _):
+            progresso(tentativas * semanas + feitas, total)
+    return gerar_escala(dados, data_inicial, semanas, modo, vencedora, **extras,
+                        progresso=final, cancelar=cancelar)
@@ -1,14 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry, Calendar
-import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, KeepTogether
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
+import aquecimento
+import escala_tpl_motor
+import exportacao
+import instrumentacao
+import persistencia
+import tarefa_gui
+from progresso import GeracaoCancelada
 
 class DayScheduleFrame(ttk.LabelFrame):
     def __init__(self, parent, day_name):
@@ -21,8 +22,7 @@ class DayScheduleFrame(ttk.LabelFrame):
         
         # Get configuration for slot duration
         try:
-            with open('data_tpl/config.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = persistencia.ler('config', 'data_tpl/config.json')
             duration = config.get('duracao_padrao', 60)
         except:
             duration = 60
@@ -123,6 +123,9 @@ class TPLApp:
         # Create footer with generate button
         self.setup_footer()
         
+        # Preload the PDF stack once the window is idle
+        aquecimento.agendar(self.root)
+        
     def initialize_data_files(self):
         """Initialize JSON data files if they don't exist"""
         default_data = {
@@ -134,8 +137,7 @@ class TPLApp:
         
         for file_key, file_path in self.data_files.items():
             if not os.path.exists(file_path):
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(default_data[file_key], f, ensure_ascii=False, indent=4)
+                persistencia.gravar_json_atomico(file_path, default_data[file_key])
     
     def setup_pessoas_tab(self):
         """Setup the People management tab"""
@@ -208,7 +210,7 @@ class TPLApp:
             return
             
         nome = self.pessoas_listbox.get(self.pessoas_listbox.curselection())
-        pessoa = next((p for p in self.pessoas_data if p['nome'] == nome), None)
+        pessoa = self.find_by_name(self.pessoas_data, self.pessoas_index, nome)
         
         if pessoa:
             preview_text = f"""Nome: {pessoa['nome']}
@@ -295,7 +297,7 @@ Horários Disponíveis:"""
             return
             
         nome = self.carrinhos_listbox.get(self.carrinhos_listbox.curselection())
-        carrinho = next((c for c in self.carrinhos_data if c['nome'] == nome), None)
+        carrinho = self.find_by_name(self.carrinhos_data, self.carrinhos_index, nome)
         
         if carrinho:
             preview_text = f"""Nome: {carrinho['nome']}
@@ -378,7 +380,7 @@ Pontos Vinculados:"""
             return
             
         nome = self.pontos_listbox.get(self.pontos_listbox.curselection())
-        ponto = next((p for p in self.pontos_data if p['nome'] == nome), None)
+        ponto = self.find_by_name(self.pontos_data, self.pontos_index, nome)
         
         if ponto:
             preview_text = f"""Nome: {ponto['nome']}
@@ -405,14 +407,28 @@ Horários Disponíveis:"""
         )
         generate_btn.pack(pady=3)
         
+    @staticmethod
+    def index_by_name(items):
+        """Map each name to its position in ``items`` (the first one, if repeated)"""
+        index = {}
+        for i, item in enumerate(items):
+            index.setdefault(item['nome'], i)
+        return index
+        
+    @staticmethod
+    def find_by_name(items, index, nome):
+        """Item named ``nome`` through its ``index_by_name`` index, or None"""
+        i = index.get(nome)
+        return items[i] if i is not None else None
+        
     def load_pessoas(self):
         """Load people from JSON file"""
         try:
-            with open(self.data_files['pessoas'], 'r', encoding='utf-8') as f:
-                self.pessoas_data = json.load(f)
+            self.pessoas_data = persistencia.ler('pessoas', self.data_files['pessoas'])
         except FileNotFoundError:
             self.pessoas_data = []
             
+        self.pessoas_index = self.index_by_name(self.pessoas_data)
         self.update_pessoas_list()
         
     def update_pessoas_list(self):
@@ -431,11 +447,11 @@ Horários Disponíveis:"""
     def load_carrinhos(self):
         """Load carts from JSON file"""
         try:
-            with open(self.data_files['carrinhos'], 'r', encoding='utf-8') as f:
-                self.carrinhos_data = json.load(f)
+            self.carrinhos_data = persistencia.ler('carrinhos', self.data_files['carrinhos'])
         except FileNotFoundError:
             self.carrinhos_data = []
             
+        self.carrinhos_index = self.index_by_name(self.carrinhos_data)
         self.update_carrinhos_list()
         
     def update_carrinhos_list(self):
@@ -454,11 +470,11 @@ Horários Disponíveis:"""
     def load_pontos(self):
         """Load points from JSON file"""
         try:
-            with open(self.data_files['pontos'], 'r', encoding='utf-8') as f:
-                self.pontos_data = json.load(f)
+            self.pontos_data = persistencia.ler('pontos', self.data_files['pontos'])
         except FileNotFoundError:
             self.pontos_data = []
             
+        self.pontos_index = self.index_by_name(self.pontos_data)
         self.update_pontos_list()
         
     def update_pontos_list(self):
@@ -475,21 +491,21 @@ Horários Disponíveis:"""
         self.update_pontos_list()
         
     def save_pessoas_data(self):
-        """Save all people data to JSON file"""
-        with open(self.data_files['pessoas'], 'w', encoding='utf-8') as f:
-            json.dump(self.pessoas_data, f, ensure_ascii=False, indent=4)
+        """Save all people data to JSON file (debounced, in the background; only the changes in SQLite)"""
+        persistencia.salvar('pessoas', self.data_files['pessoas'], self.pessoas_data)
+        self.pessoas_index = self.index_by_name(self.pessoas_data)
         self.update_pessoas_list()
         
     def save_carrinhos_data(self):
-        """Save all carts data to JSON file"""
-        with open(self.data_files['carrinhos'], 'w', encoding='utf-8') as f:
-            json.dump(self.carrinhos_data, f, ensure_ascii=False, indent=4)
+        """Save all carts data to JSON file (debounced, in the background; only the changes in SQLite)"""
+        persistencia.salvar('carrinhos', self.data_files['carrinhos'], self.carrinhos_data)
+        self.carrinhos_index = self.index_by_name(self.carrinhos_data)
         self.update_carrinhos_list()
         
     def save_pontos_data(self):
-        """Save all points data to JSON file"""
-        with open(self.data_files['pontos'], 'w', encoding='utf-8') as f:
-            json.dump(self.pontos_data, f, ensure_ascii=False, indent=4)
+        """Save all points data to JSON file (debounced, in the background; only the changes in SQLite)"""
+        persistencia.salvar('pontos', self.data_files['pontos'], self.pontos_data)
+        self.pontos_index = self.index_by_name(self.pontos_data)
         self.update_pontos_list()
         
     def delete_pessoa(self):
@@ -560,8 +576,7 @@ Horários Disponíveis:"""
     def load_config(self):
         """Load configuration from JSON file"""
         try:
-            with open(self.data_files['config'], 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = persistencia.ler('config', self.data_files['config'])
                 
             # Convert minutes to hours and minutes
             total_minutes = config.get('duracao_padrao', 60)
@@ -591,8 +606,7 @@ Horários Disponíveis:"""
                 'duracao_padrao': total_minutes
             }
             
-            with open(self.data_files['config'], 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=4)
+            persistencia.salvar('config', self.data_files['config'], config, adiado=False)
                 
             messagebox.showinfo("Sucesso", "Configurações salvas com sucesso!")
         except ValueError:
@@ -612,7 +626,7 @@ Horários Disponíveis:"""
         pontos_sem_horario = []
         for carrinho in self.carrinhos_data:
             for ponto_nome in carrinho.get('pontos', []):
-                ponto = next((p for p in self.pontos_data if p['nome'] == ponto_nome), None)
+                ponto = self.find_by_name(self.pontos_data, self.pontos_index, ponto_nome)
                 if not ponto or not ponto.get('horarios'):
                     pontos_sem_horario.append(ponto_nome)
                     
@@ -704,461 +718,93 @@ Total de pessoas: {len(self.pessoas_data)}
             # Ask for save location with default name
             filename = filedialog.asksaveasfilename(
                 defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+                filetypes=[("PDF files", "*.pdf")] + exportacao.TIPOS_ARQUIVO + [("All files", "*.*")],
                 title="Salvar Escala",
                 initialfile=default_filename
             )
             
             if filename:
                 try:
-                    self.create_schedule_pdf(filename, selected_date, int(self.num_weeks.get()))
+                    num_weeks = int(self.num_weeks.get())
+                except ValueError as e:
+                    messagebox.showerror("Erro", f"Erro ao gerar a escala: {str(e)}")
+                    return
+
+                def done(_):
                     messagebox.showinfo("Sucesso", "Escala gerada com sucesso!")
                     os.startfile(filename)
                     dialog.destroy()
-                except Exception as e:
-                    messagebox.showerror("Erro", f"Erro ao gerar PDF: {str(e)}")
+
+                # Generate in the background; the progress window is modal, so
+                # the data can't be edited while the schedule is being built
+                tarefa_gui.executar(
+                    dialog,
+                    lambda progress, cancel: self.save_schedule(
+                        filename, selected_date, num_weeks, progress, cancel),
+                    ao_concluir=done,
+                    ao_falhar=lambda e: messagebox.showerror(
+                        "Erro", f"Erro ao gerar a escala: {str(e)}"))
         
         ttk.Button(btn_frame, text="Gerar",
                   command=generate).pack(side='right', padx=2)
         ttk.Button(btn_frame, text="Cancelar",
                   command=dialog.destroy).pack(side='right', padx=2)
         
-    def split_time_range(self, time_range, duration_minutes):
-        """Split a time range into slots based on duration"""
-        start, end = time_range.split('-')
-        start_minutes = self.time_to_minutes(start)
-        end_minutes = self.time_to_minutes(end)
-        
-        slots = []
-        current = start_minutes
-        while current + duration_minutes <= end_minutes:
-            slot_end = current + duration_minutes
-            slots.append(f"{self.minutes_to_time(current)}-{self.minutes_to_time(slot_end)}")
-            current = slot_end
-            
-        return slots
-        
-    def time_to_minutes(self, time_str):
-        """Convert time string (HH:MM) to minutes since midnight"""
-        hours, minutes = map(int, time_str.split(':'))
-        return hours * 60 + minutes
-        
-    def minutes_to_time(self, minutes):
-        """Convert minutes since midnight to time string (HH:MM)"""
-        hours = minutes // 60
-        mins = minutes % 60
-        return f"{hours:02d}:{mins:02d}"
-        
-    def get_time_range_minutes(self, time_range):
-        """Get start and end times in minutes for a time range"""
-        start, end = time_range.split('-')
-        return (self.time_to_minutes(start), self.time_to_minutes(end))
-        
-    def is_cart_available(self, cart_name, time_slot, cart_times_used):
-        """Check if cart is available for the given time slot"""
-        start_time, end_time = self.get_time_range_minutes(time_slot)
-        
-        # Check against all used time slots for this cart
-        for used_start, used_end in cart_times_used.get(cart_name, []):
-            if not (end_time <= used_start or start_time >= used_end):
-                return False
-                
-        return True
-        
-    def find_available_people(self, day, time_range):
-        """Find people available for the given day and time"""
-        available = []
-        
-        if not time_range or '-' not in time_range:
-            return available
-            
-        for pessoa in self.pessoas_data:
-            horarios = pessoa.get('horarios', {}).get(day, [])
-            
-            # Check if person is available at this time
-            for horario in horarios:
-                try:
-                    if self.time_ranges_overlap(horario, time_range):
-                        available.append(pessoa)
-                        break
-                except ValueError:
-                    # Skip invalid time ranges
-                    continue
-                    
-        return available
-        
-    def time_ranges_overlap(self, range1, range2):
-        """Check if two time ranges overlap"""
+    def save_schedule(self, filename, start_date, num_weeks, progress=None, cancel=None):
+        """Save the schedule as PDF or, by extension, as CSV, JSON, HTML or iCalendar.
+
+        ``progress`` and ``cancel`` are passed to the generator (see the
+        progresso module); a cancelled schedule leaves no partial file.
+        """
         try:
-            start1, end1 = range1.split('-')
-            start2, end2 = range2.split('-')
-            
-            # Convert to minutes since midnight
-            start1 = self.time_to_minutes(start1)
-            end1 = self.time_to_minutes(end1)
-            start2 = self.time_to_minutes(start2)
-            end2 = self.time_to_minutes(end2)
-            
-            return not (end1 <= start2 or end2 <= start1)
+            if exportacao.formato_do_arquivo(filename) in exportacao.FORMATOS:
+                exportacao.exportar_tpl(
+                    self.iter_schedule_days(start_date, num_weeks, progress, cancel), filename)
+            else:
+                self.create_schedule_pdf(filename, start_date, num_weeks, progress, cancel)
+        except GeracaoCancelada:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            raise
+
+    def create_schedule_pdf(self, filename, start_date, num_weeks, progress=None, cancel=None):
+        """Create the schedule PDF file.
+
+        Days are generated while the document is laid out, so only the
+        pages being built are kept in memory, whatever the number of weeks.
+        """
+        # Imported here so reportlab is only loaded when a PDF is generated
+        import renderizacao_pdf
+        days = self.iter_schedule_days(start_date, num_weeks, progress, cancel)
+        try:
+            renderizacao_pdf.gerar_pdf_tpl(days, filename)
+        except GeracaoCancelada:
+            raise
         except Exception as e:
-            raise ValueError(f"Invalid time range format: {str(e)}")
-        
-    def is_person_available(self, person_name, date, time_slot, person_time_used):
-        """Check if person is available for the given time slot"""
-        if person_name not in person_time_used:
-            person_time_used[person_name] = {}
-        if date not in person_time_used[person_name]:
-            person_time_used[person_name][date] = []
-            
-        start_time, end_time = self.get_time_range_minutes(time_slot)
-        
-        # Check against all used time slots for this person on this date
-        for used_start, used_end in person_time_used[person_name].get(date, []):
-            if not (end_time <= used_start or start_time >= used_end):
-                return False
-                
-        return True
-        
-    def create_balanced_pairs(self, people, designation_counts, date, time_slot, person_time_used):
-        """Create pairs of people following the rules and balancing designations"""
-        if not people:
-            return []
-            
-        # Filter out people who are already designated at this time
-        available_people = [
-            p for p in people 
-            if self.is_person_available(p['nome'], date, time_slot, person_time_used)
-        ]
-            
-        # Sort available people by number of designations (ascending)
-        sorted_people = sorted(available_people, key=lambda p: designation_counts[p['nome']])
-        
-        pairs = []
-        used = set()
-        
-        # First try to find a spouse pair among least designated people
-        for person in sorted_people:
-            if person['nome'] in used:
-                continue
-                
-            if person.get('has_spouse'):
-                spouse_name = person.get('spouse')
-                spouse = next((p for p in sorted_people 
-                             if p['nome'] == spouse_name 
-                             and p['nome'] not in used), None)
-                if spouse:
-                    # Check if this pair has significantly more designations than others
-                    avg_designations = sum(designation_counts.values()) / len(designation_counts)
-                    pair_designations = (designation_counts[person['nome']] + 
-                                       designation_counts[spouse['nome']]) / 2
-                    
-                    if pair_designations <= avg_designations + 2:  # Allow some variance
-                        pairs.append((person, spouse))
-                        used.add(person['nome'])
-                        used.add(spouse['nome'])
-                        return pairs
-                    
-        # If no suitable spouse pair found, try to pair same sex with balanced designations
-        for i, person1 in enumerate(sorted_people):
-            if person1['nome'] in used:
-                continue
-                
-            # Find another person of the same sex with similar designation count
-            for person2 in sorted_people[i+1:]:
-                if (person2['nome'] not in used and 
-                    person2['sexo'] == person1['sexo'] and
-                    abs(designation_counts[person1['nome']] - 
-                        designation_counts[person2['nome']]) <= 2):
-                    pairs.append((person1, person2))
-                    used.add(person1['nome'])
-                    used.add(person2['nome'])
-                    return pairs
-                    
-        # If no balanced pair found but we have one person, return the least designated person
-        if sorted_people:
-            pairs.append((sorted_people[0], None))
-            used.add(sorted_people[0]['nome'])
-            
-        return pairs
-        
-    def update_person_time_used(self, person_name, date, time_slot, person_time_used):
-        """Update the time tracking for a person"""
-        if person_name not in person_time_used:
-            person_time_used[person_name] = {}
-        if date not in person_time_used[person_name]:
-            person_time_used[person_name][date] = []
-            
-        start_time, end_time = self.get_time_range_minutes(time_slot)
-        person_time_used[person_name][date].append((start_time, end_time))
-        
-    def create_schedule_pdf(self, filename, start_date, num_weeks):
-        """Create the schedule PDF file"""
-        # Define custom colors
-        cor_header1 = colors.HexColor('#0070c0')  # Azul
-        cor_header2 = colors.HexColor('#ffc101')  # Amarelo
-        cor_row1 = colors.HexColor('#dfeaf7')     # Azul claro
-        cor_row2 = colors.HexColor('#fef2cb')     # Amarelo claro
-        
-        # Validate inputs
-        if not self.carrinhos_data:
-            raise ValueError("Não há carrinhos cadastrados")
-            
+            raise Exception(f"Erro ao gerar o arquivo PDF: {str(e)}")
+
+    def iter_schedule_days(self, start_date, num_weeks, progress=None, cancel=None):
+        """Validate the data and return a generator of the schedule days.
+
+        The days come from escala_tpl_motor.gerar_dias: each item is
+        (date, day_name, rows, day_count) for a day with designations, where
+        rows are [horario, carrinho, ponto, pessoa1, pessoa2] sorted by cart
+        and time, and day_count is the 1-based day index.
+        ``progress(done, total)`` is called after each week, and setting the
+        ``cancel`` event stops the generator with GeracaoCancelada.
+        """
         # Load configuration
         try:
-            with open(self.data_files['config'], 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            duration_minutes = config.get('duracao_padrao', 60)
+            with instrumentacao.atual().trecho('carregar', arquivo=self.data_files['config']):
+                config = persistencia.ler('config', self.data_files['config'])
         except FileNotFoundError:
-            duration_minutes = 60
-            
-        # Initialize designation counters and time tracking
-        designation_counts = {pessoa['nome']: 0 for pessoa in self.pessoas_data}
-        person_time_used = {}  # Format: {person_name: {date: [(start_time, end_time)]}}
-            
-        # Create document
-        doc = SimpleDocTemplate(filename, pagesize=landscape(A4))
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        cor_borda = colors.HexColor('#999898')
-        cor_cabecalho = colors.HexColor('#d9d9d9')
-        cor_titulo = colors.HexColor('#4a6da7')
-        
-        styles = getSampleStyleSheet()
-        titulo_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            alignment=1,  
-            spaceAfter=0,
-            textColor=colors.white,  
-            leading=20
-        )
-        subtitulo_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            alignment=1,  
-            spaceAfter=0,
-            textColor=colors.white,  
-            leading=5
-        )
-        
-        dia_style = ParagraphStyle(
-            'DayTitle',
-            parent=styles['Heading3'],
-            fontSize=12,
-            textColor=colors.black,
-            alignment=1,  # Center alignment
-            spaceAfter=0,
-            spaceBefore=20
-        )
-        
-        # Create title with colored background
-        titulo = Paragraph("<b>Congregação Coqueiros</b>", titulo_style)
-        titulo_table = Table([[titulo]], colWidths=[doc.width])
-        titulo_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), cor_titulo),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(titulo_table)
-        
-        # Create subtitle with colored background
-        subtitulo = Paragraph("<b>Escala de Carrinho</b>", subtitulo_style)
-        subtitulo_table = Table([[subtitulo]], colWidths=[doc.width])
-        subtitulo_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), cor_titulo),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-        ]))
-        elements.append(subtitulo_table)
-        elements.append(Spacer(1, 5))
-        
-        # Generate schedule for all days
-        current_date = start_date
-        for week in range(num_weeks):  # For each week
-            for day in range(7):  # For each day of the week
-                weekday = current_date.weekday()
-                day_name = ['Segunda', 'Terça', 'Quarta', 'Quinta', 
-                           'Sexta', 'Sábado', 'Domingo'][weekday]
-                
-                # Create data structure for this day
-                day_data = []  # List of [horario, carrinho, ponto, pessoa1, pessoa2]
-                
-                # Track used cart times to prevent conflicts
-                cart_times_used = {}  # Format: {cart_name: [(start_time, end_time)]}
-                
-                # For each cart
-                for carrinho in self.carrinhos_data:
-                    cart_name = carrinho['nome']
-                    cart_times_used[cart_name] = []
-                    
-                    # Get points for this cart
-                    pontos = [p for p in self.pontos_data if p['nome'] in carrinho['pontos']]
-                    
-                    # For each point
-                    for ponto in pontos:
-                        # Get available times for this day
-                        horarios = ponto.get('horarios', {}).get(day_name, [])
-                        
-                        # Split time ranges according to duration_minutes
-                        for horario in horarios:
-                            time_slots = self.split_time_range(horario, duration_minutes)
-                            
-                            for time_slot in time_slots:
-                                # Check if cart is already being used at this time
-                                if self.is_cart_available(cart_name, time_slot, cart_times_used):
-                                    # Find available people
-                                    pessoas_disponiveis = self.find_available_people(
-                                        day_name, time_slot)
-                                    
-                                    # Create pairs considering designation counts
-                                    pares = self.create_balanced_pairs(
-                                        pessoas_disponiveis, 
-                                        designation_counts,
-                                        current_date,
-                                        time_slot,
-                                        person_time_used
-                                    )
-                                    
-                                    # If no pairs available
-                                    if not pares:
-                                        if pessoas_disponiveis:  # If there's one person available
-                                            # Get the person with least designations who is available at this time
-                                            available_pessoas = [
-                                                p for p in pessoas_disponiveis 
-                                                if self.is_person_available(p['nome'], current_date, time_slot, person_time_used)
-                                            ]
-                                            if available_pessoas:
-                                                pessoa = min(available_pessoas, 
-                                                           key=lambda p: designation_counts[p['nome']])
-                                                day_data.append([
-                                                    time_slot,
-                                                    cart_name,
-                                                    ponto['nome'],
-                                                    pessoa['nome'],
-                                                    '?'
-                                                ])
-                                                designation_counts[pessoa['nome']] += 1
-                                                self.update_person_time_used(pessoa['nome'], current_date, time_slot, person_time_used)
-                                            else:
-                                                day_data.append([
-                                                    time_slot,
-                                                    cart_name,
-                                                    ponto['nome'],
-                                                    '-',
-                                                    '-'
-                                                ])
-                                        else:  # If no one is available
-                                            day_data.append([
-                                                time_slot,
-                                                cart_name,
-                                                ponto['nome'],
-                                                '-',
-                                                '-'
-                                            ])
-                                    else:
-                                        # Add a row for each pair
-                                        for pessoa1, pessoa2 in pares:
-                                            day_data.append([
-                                                time_slot,
-                                                cart_name,
-                                                ponto['nome'],
-                                                pessoa1['nome'] if pessoa1 else '-',
-                                                pessoa2['nome'] if pessoa2 else '?'
-                                            ])
-                                            # Update designation counts and time tracking
-                                            if pessoa1:
-                                                designation_counts[pessoa1['nome']] += 1
-                                                self.update_person_time_used(pessoa1['nome'], current_date, time_slot, person_time_used)
-                                            if pessoa2:
-                                                designation_counts[pessoa2['nome']] += 1
-                                                self.update_person_time_used(pessoa2['nome'], current_date, time_slot, person_time_used)
-                                            
-                                    # Mark this time slot as used for this cart
-                                    start_time, end_time = self.get_time_range_minutes(time_slot)
-                                    cart_times_used[cart_name].append((start_time, end_time))
-                
-                # Sort day_data by cart name and then by time
-                day_data.sort(key=lambda x: (x[1], x[0]))
-                
-                if day_data:  # Only create table if there are designations for this day
-                    # Create day elements
-                    day_elements = []
-                    
-                    # Add day title
-                    dia_titulo = Paragraph(f"<b>{day_name} - {current_date.strftime('%d/%m/%Y')}</b>", dia_style)
-                    day_elements.append(dia_titulo)
-                    day_elements.append(Spacer(1, 5))
-                    
-                    # Create table for this day
-                    headers = ['Horário', 'Carrinho', 'Ponto', 'Designações']  # Changed header
-                    table_data = [headers]
-                    
-                    # Add data rows with separate person columns
-                    for row in day_data:
-                        table_data.append([row[0], row[1], row[2], row[3], row[4]])
-                    
-                    # Create table with 5 columns (even though header shows 4) and repeat header
-                    table = Table(table_data, 
-                                colWidths=[2.5*cm, 3.5*cm, 7*cm, 3.5*cm, 3.5*cm],
-                                repeatRows=1)  # Repeat the first row (header)
-                    
-                    # Determine header color based on day count (1-based index)
-                    day_count = (current_date - start_date).days + 1
-                    header_color = cor_header1 if day_count % 2 == 1 else cor_header2
-                    header_text_color = colors.white if day_count % 2 == 1 else colors.black
-                    
-                    # Initialize table style
-                    style = [
-                        # Header styling
-                        ('BACKGROUND', (0, 0), (-1, 0), header_color),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), header_text_color),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 12),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('TOPPADDING', (0, 0), (-1, 0), 12),  # Added for vertical centering
-                        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#999898')),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        # Merge the last two columns in header row
-                        ('SPAN', (3, 0), (4, 0)),
-                    ]
-                    
-                    # Add row colors based on cart
-                    current_cart = None
-                    current_color = cor_row1
-                    
-                    for i, row in enumerate(table_data[1:], 1):  # Skip header row
-                        cart = row[1]  # Cart name is in second column
-                        if cart != current_cart:
-                            current_cart = cart
-                            current_color = cor_row2 if current_color == cor_row1 else cor_row1
-                        
-                        style.append(('BACKGROUND', (0, i), (-1, i), current_color))
-                        style.append(('TEXTCOLOR', (0, i), (-1, i), colors.black))
-                    
-                    table.setStyle(TableStyle(style))
-                    
-                    # Add table to day elements
-                    day_elements.append(table)
-                    
-                    # Keep all day elements together
-                    elements.append(KeepTogether(day_elements))
-                
-                current_date += timedelta(days=1)
-        
-        try:
-            # Build document
-            doc.build(elements)
-        except Exception as e:
-            raise Exception(f"Erro ao gerar o arquivo PDF: {str(e)}")
+            config = {}
+
+        dados = escala_tpl_motor.DadosTPL.de_listas(
+            self.pessoas_data, self.pontos_data, self.carrinhos_data, config)
+        return escala_tpl_motor.gerar_dias(dados, start_date, num_weeks, progress, cancel)
 
     def show_pessoa_dialog(self, pessoa=None):
         """Show dialog for creating/editing a person"""
@@ -1308,8 +954,7 @@ Total de pessoas: {len(self.pessoas_data)}
                     
             # Update or add person
             if pessoa:  # Editing
-                idx = next((i for i, p in enumerate(self.pessoas_data) 
-                          if p['nome'] == pessoa['nome']), None)
+                idx = self.pessoas_index.get(pessoa['nome'])
                 if idx is not None:
                     self.pessoas_data[idx] = new_pessoa
             else:  # New person
@@ -1317,8 +962,7 @@ Total de pessoas: {len(self.pessoas_data)}
                 
             # Update spouse's record if needed
             if new_pessoa['has_spouse']:
-                spouse_idx = next((i for i, p in enumerate(self.pessoas_data) 
-                                 if p['nome'] == new_pessoa['spouse']), None)
+                spouse_idx = self.pessoas_index.get(new_pessoa['spouse'])
                 if spouse_idx is not None:
                     spouse_data = self.pessoas_data[spouse_idx].copy()
                     spouse_data['has_spouse'] = True
@@ -1331,8 +975,7 @@ Total de pessoas: {len(self.pessoas_data)}
                 if (old_spouse and 
                     (not new_pessoa['has_spouse'] or 
                      new_pessoa['spouse'] != old_spouse)):
-                    old_spouse_idx = next((i for i, p in enumerate(self.pessoas_data) 
-                                         if p['nome'] == old_spouse), None)
+                    old_spouse_idx = self.pessoas_index.get(old_spouse)
                     if old_spouse_idx is not None:
                         self.pessoas_data[old_spouse_idx]['has_spouse'] = False
                         self.pessoas_data[old_spouse_idx].pop('spouse', None)
@@ -1365,7 +1008,7 @@ Total de pessoas: {len(self.pessoas_data)}
             return
             
         nome = self.pessoas_listbox.get(self.pessoas_listbox.curselection())
-        pessoa = next((p for p in self.pessoas_data if p['nome'] == nome), None)
+        pessoa = self.find_by_name(self.pessoas_data, self.pessoas_index, nome)
         if pessoa:
             self.show_pessoa_dialog(pessoa)
             
@@ -1486,8 +1129,7 @@ Total de pessoas: {len(self.pessoas_data)}
             
             # Update or add cart
             if carrinho:  # Editing
-                idx = next((i for i, c in enumerate(self.carrinhos_data) 
-                          if c['nome'] == carrinho['nome']), None)
+                idx = self.carrinhos_index.get(carrinho['nome'])
                 if idx is not None:
                     self.carrinhos_data[idx] = new_carrinho
             else:  # New cart
@@ -1512,7 +1154,7 @@ Total de pessoas: {len(self.pessoas_data)}
             return
             
         nome = self.carrinhos_listbox.get(self.carrinhos_listbox.curselection())
-        carrinho = next((c for c in self.carrinhos_data if c['nome'] == nome), None)
+        carrinho = self.find_by_name(self.carrinhos_data, self.carrinhos_index, nome)
         if carrinho:
             self.show_carrinho_dialog(carrinho)
             
@@ -1612,8 +1254,7 @@ Total de pessoas: {len(self.pessoas_data)}
                     
             # Update or add point
             if ponto:  # Editing
-                idx = next((i for i, p in enumerate(self.pontos_data) 
-                          if p['nome'] == ponto['nome']), None)
+                idx = self.pontos_index.get(ponto['nome'])
                 if idx is not None:
                     self.pontos_data[idx] = new_ponto
             else:  # New point
@@ -1644,6 +1285,6 @@ Total de pessoas: {len(self.pessoas_data)}
             return
             
         nome = self.pontos_listbox.get(self.pontos_listbox.curselection())
-        ponto = next((p for p in self.pontos_data if p['nome'] == nome), None)
+        ponto = self.find_by_name(self.pontos_data, self.pontos_index, nome)
         if ponto:
             self.show_ponto_dialog(ponto) 
\ No newline at end of file
@@ -0,0 +1,436 @@
+"""Motor de geração da escala TPL (carrinhos), independente de interface e de PDF.
+
+O motor recebe um retrato dos dados (pessoas, pontos, carrinhos e a duração
+de cada horário), uma data inicial e um número de semanas, e produz os dias
+da escala um a um, com as linhas de designação de cada dia. O PDF e os
+demais formatos são consumidores opcionais desses dias.
+"""
+import bisect
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Tuple
+
+import instrumentacao
+import progresso as progresso_geracao
+
+DIAS_SEMANA = ('Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo')
+DURACAO_PADRAO = 60  # Minutos de cada horário quando não há configuração
+
+ARQUIVOS = {
+    'pessoas': 'pessoas.json',
+    'carrinhos': 'carrinhos.json',
+    'pontos': 'pontos.json',
+    'config': 'config.json',
+}
+
+
+@dataclass(frozen=True)
+class DadosTPL:
+    """Retrato dos dados usados na geração da escala TPL.
+
+    Pessoas, pontos e carrinhos são os dicionários dos arquivos de
+    ``data_tpl``; o motor só os lê.
+    """
+    pessoas: Tuple[dict, ...] = ()
+    pontos: Tuple[dict, ...] = ()
+    carrinhos: Tuple[dict, ...] = ()
+    duracao_minutos: int = DURACAO_PADRAO
+
+    @classmethod
+    def de_listas(cls, pessoas, pontos, carrinhos, config=None):
+        """Cria o retrato a partir das listas usadas por escala_tpl_gui"""
+        return cls(
+            pessoas=tuple(pessoas),
+            pontos=tuple(pontos),
+            carrinhos=tuple(carrinhos),
+            duracao_minutos=(config or {}).get('duracao_padrao', DURACAO_PADRAO),
+        )
+
+    @classmethod
+    def de_pasta(cls, pasta):
+        """Carrega o retrato a partir de uma pasta no formato de data_tpl"""
+        listas = {}
+        with instrumentacao.atual().trecho('carregar', arquivo=pasta):
+            for documento, arquivo in ARQUIVOS.items():
+                try:
+                    with open(os.path.join(pasta, arquivo), 'r', encoding='utf-8') as f:
+                        listas[documento] = json.load(f)
+                except FileNotFoundError:
+                    listas[documento] = {} if documento == 'config' else []
+        return cls.de_listas(listas['pessoas'], listas['pontos'], listas['carrinhos'],
+                             listas['config'])
+
+
+class DiaTPL(NamedTuple):
+    """Um dia da escala com designações.
+
+    ``linhas`` são ``[horario, carrinho, ponto, pessoa1, pessoa2]``
+    ordenadas por carrinho e horário; ``numero`` é o índice do dia a partir
+    de 1, contado desde a data inicial.
+    """
+    data: datetime
+    nome_dia: str
+    linhas: List[List[str]]
+    numero: int
+
+
+# Horários
+#
+# Os textos ``HH:MM-HH:MM`` dos dados são convertidos uma vez só, em
+# ``HorariosTPL``; a geração trabalha apenas com pares (início, fim) em
+# minutos inteiros, e os textos voltam a existir só nas linhas produzidas.
+
+def minutos(texto):
+    """Converte ``HH:MM`` em minutos desde a meia-noite"""
+    horas, mins = map(int, texto.split(':'))
+    return horas * 60 + mins
+
+
+def formatar_minutos(valor):
+    """Converte minutos desde a meia-noite em ``HH:MM``"""
+    return f"{valor // 60:02d}:{valor % 60:02d}"
+
+
+def intervalo_minutos(horario):
+    """Início e fim, em minutos, de um horário ``HH:MM-HH:MM``"""
+    inicio, fim = horario.split('-')
+    return minutos(inicio), minutos(fim)
+
+
+def formatar_intervalo(inicio, fim):
+    """Converte um par de minutos no texto ``HH:MM-HH:MM``"""
+    return f"{formatar_minutos(inicio)}-{formatar_minutos(fim)}"
+
+
+def dividir_intervalo(inicio, fim, duracao):
+    """Divide o intervalo em intervalos consecutivos de ``duracao`` minutos"""
+    intervalos = []
+    atual = inicio
+    while atual + duracao <= fim:
+        intervalos.append((atual, atual + duracao))
+        atual += duracao
+    return intervalos
+
+
+def _intervalos_por_dia(horarios, invalidos_ignorados):
+    """Converte ``{nome do dia: [HH:MM-HH:MM]}`` numa tupla por dia da semana (0 = segunda)"""
+    por_dia = []
+    for nome_dia in DIAS_SEMANA:
+        intervalos = []
+        for horario in horarios.get(nome_dia, []):
+            try:
+                intervalos.append(intervalo_minutos(horario))
+            except Exception:
+                if not invalidos_ignorados:
+                    raise ValueError(f"Horário inválido: {horario}")
+        por_dia.append(tuple(intervalos))
+    return tuple(por_dia)
+
+
+class HorariosTPL:
+    """Horários das pessoas e dos pontos de um ``DadosTPL``, em minutos inteiros.
+
+    ``disponibilidade[i][dia]`` são os intervalos em que a pessoa
+    ``dados.pessoas[i]`` está disponível no dia da semana ``dia``; horários
+    inválidos são ignorados, como sempre foram. ``carrinhos`` tem, para cada
+    carrinho, o nome e a lista ``(nome do ponto, horários por dia)``, com as
+    faixas dos pontos já divididas em horários de ``duracao_minutos``.
+    """
+
+    def __init__(self, dados):
+        self.disponibilidade = [
+            _intervalos_por_dia(pessoa.get('horarios', {}), invalidos_ignorados=True)
+            for pessoa in dados.pessoas
+        ]
+        duracao = dados.duracao_minutos
+        horarios_pontos = {}
+        self.carrinhos = []
+        for carrinho in dados.carrinhos:
+            pontos = []
+            for ponto in dados.pontos:
+                if ponto['nome'] not in carrinho['pontos']:
+                    continue
+                chave = id(ponto)
+                if chave not in horarios_pontos:
+                    horarios_pontos[chave] = tuple(
+                        tuple(horario
+                              for faixa in faixas
+                              for horario in dividir_intervalo(*faixa, duracao))
+                        for faixas in _intervalos_por_dia(ponto.get('horarios', {}),
+                                                          invalidos_ignorados=False)
+                    )
+                pontos.append((ponto['nome'], horarios_pontos[chave]))
+            self.carrinhos.append((carrinho['nome'], pontos))
+
+
+# Disponibilidade
+
+class IndiceDisponibilidade:
+    """Quem está disponível em cada intervalo de cada dia da semana.
+
+    Para cada dia, os intervalos de todas as pessoas ficam ordenados pelo
+    início; uma consulta só percorre os que começam antes do fim do
+    intervalo pedido, e o resultado fica guardado, já que os mesmos
+    horários se repetem toda semana.
+    """
+
+    def __init__(self, disponibilidade):
+        self._por_dia = []
+        for dia in range(len(DIAS_SEMANA)):
+            entradas = sorted(
+                (inicio, fim, pessoa)
+                for pessoa, por_dia in enumerate(disponibilidade)
+                for inicio, fim in por_dia[dia]
+            )
+            self._por_dia.append(([entrada[0] for entrada in entradas], entradas))
+        self._consultas = {}
+
+    def consultar(self, dia, inicio, fim):
+        """Índices, em ordem de cadastro, das pessoas com algum intervalo que cobre ``inicio``-``fim``"""
+        chave = (dia, inicio, fim)
+        pessoas = self._consultas.get(chave)
+        if pessoas is None:
+            inicios, entradas = self._por_dia[dia]
+            # Só os intervalos que começam antes do fim podem se sobrepor
+            limite = bisect.bisect_left(inicios, fim)
+            pessoas = tuple(sorted({
+                pessoa for _, fim_disponivel, pessoa in entradas[:limite]
+                if fim_disponivel > inicio
+            }))
+            self._consultas[chave] = pessoas
+        return pessoas
+
+
+# Ocupação
+
+class Ocupacao:
+    """Intervalos já reservados de cada pessoa ou carrinho no dia em andamento.
+
+    Um recurso só recebe um intervalo que esteja livre, então os seus
+    intervalos nunca se sobrepõem e ficam ordenados pelo início: verificar
+    um intervalo é uma busca binária pelo vizinho de cada lado. As
+    designações de um dia não interferem nas de outro, por isso ``limpar()``
+    descarta tudo a cada novo dia e a memória não cresce com o horizonte.
+    """
+
+    def __init__(self):
+        self._reservas = {}  # recurso -> ([inícios], [fins])
+
+    def livre(self, recurso, inicio, fim):
+        reservas = self._reservas.get(recurso)
+        if reservas is None:
+            return True
+        inicios, fins = reservas
+        posicao = bisect.bisect_right(inicios, inicio)
+        if posicao and fins[posicao - 1] > inicio:
+            return False
+        return posicao == len(inicios) or inicios[posicao] >= fim
+
+    def reservar(self, recurso, inicio, fim):
+        """Reserva um intervalo que ``livre`` confirmou estar livre"""
+        inicios, fins = self._reservas.setdefault(recurso, ([], []))
+        posicao = bisect.bisect_right(inicios, inicio)
+        inicios.insert(posicao, inicio)
+        fins.insert(posicao, fim)
+
+    def liberar(self, recurso):
+        self._reservas.pop(recurso, None)
+
+    def limpar(self):
+        self._reservas.clear()
+
+
+class Pareamento:
+    """Forma a dupla de cada horário, seguindo as regras e equilibrando as designações.
+
+    Prefere um casal entre as pessoas menos designadas, se a média do casal
+    não passar de 2 acima da média geral; senão, duas pessoas do mesmo sexo
+    com até 2 designações de diferença; senão, só a pessoa menos designada.
+    Nos empates, vale a ordem de cadastro.
+
+    As pessoas são tratadas pelo índice em ``dados.pessoas``. O cônjuge de
+    cada uma é resolvido uma só vez e o total de designações é mantido a
+    cada ``registrar``, sem somar todas as contagens para a média. Em cada
+    horário, as pessoas livres vão para filas por sexo, divididas em baldes
+    pelo número de designações; como as contagens ficam equilibradas, são
+    poucos baldes, e as regras olham só o começo de cada fila em vez de
+    comparar as pessoas duas a duas.
+    """
+
+    def __init__(self, pessoas):
+        self.sexos = [pessoa.get('sexo') for pessoa in pessoas]
+        indices = {}
+        for indice, pessoa in enumerate(pessoas):
+            indices.setdefault(pessoa['nome'], indice)
+        self.conjuges = [
+            indices.get(pessoa.get('spouse')) if pessoa.get('has_spouse') else None
+            for pessoa in pessoas
+        ]
+        self.contagem = [0] * len(pessoas)
+        self.total = 0
+        self._nomes_distintos = len(indices)
+
+    def registrar(self, pessoa):
+        self.contagem[pessoa] += 1
+        self.total += 1
+
+    def formar(self, livres):
+        """Retorna o par ``(pessoa1, pessoa2 ou None)`` dentre ``livres``, ou None se vazio.
+
+        ``livres`` são os índices das pessoas livres no horário, em ordem de cadastro.
+        """
+        if not livres:
+            return None
+        contagem = self.contagem
+        conjuges = self.conjuges
+
+        # Primeiro, um casal entre as pessoas menos designadas
+        if any(conjuges[pessoa] is not None for pessoa in livres):
+            presentes = set(livres)
+            media = self.total / self._nomes_distintos
+            casal = min(
+                ((contagem[pessoa], pessoa) for pessoa in livres
+                 if conjuges[pessoa] in presentes
+                 # Permite alguma variação
+                 and (contagem[pessoa] + contagem[conjuges[pessoa]]) / 2 <= media + 2),
+                default=None,
+            )
+            if casal is not None:
+                return casal[1], conjuges[casal[1]]
+
+        # Filas por sexo: designações -> pessoas, em ordem de cadastro
+        filas = {}
+        for pessoa in livres:
+            filas.setdefault(self.sexos[pessoa], {}).setdefault(
+                contagem[pessoa], []).append(pessoa)
+
+        # Depois, duas pessoas do mesmo sexo com designações parecidas: em cada
+        # fila, a primeira pessoa cuja seguinte tem até 2 designações a mais
+        melhor = None
+        for fila in filas.values():
+            anterior = None
+            for quantidade in sorted(fila):
+                balde = fila[quantidade]
+                if anterior is not None and quantidade - contagem[anterior] <= 2:
+                    par = (anterior, balde[0])
+                elif len(balde) > 1:
+                    par = (balde[0], balde[1])
+                else:
+                    anterior = balde[0]
+                    continue
+                chave = (contagem[par[0]], par[0])
+                if melhor is None or chave < melhor[0]:
+                    melhor = (chave, par)
+                break
+        if melhor is not None:
+            return melhor[1]
+
+        # Sem dupla, fica só a pessoa menos designada
+        return min((contagem[pessoa], pessoa) for pessoa in livres)[1], None
+
+
+# Geração
+
+def gerar_dias(dados, data_inicial, semanas, progresso=None, cancelar=None):
+    """Valida os dados e retorna um gerador dos dias da escala (``DiaTPL``).
+
+    Só os dias com designações são produzidos. ``progresso(feitas, total)``
+    é chamado a cada semana, e acionar o evento ``cancelar`` interrompe o
+    gerador com ``progresso.GeracaoCancelada`` (ver o módulo ``progresso``).
+    """
+    if not dados.carrinhos:
+        raise ValueError("Não há carrinhos cadastrados")
+    with instrumentacao.atual().trecho('indices'):
+        horarios = HorariosTPL(dados)
+        disponibilidade = IndiceDisponibilidade(horarios.disponibilidade)
+    return _gerar_dias(dados, horarios, disponibilidade, data_inicial, semanas,
+                       progresso, cancelar)
+
+
+def _gerar_dias(dados, horarios, disponibilidade, data_inicial, semanas, progresso, cancelar):
+    instr = instrumentacao.atual()
+    textos = {}  # (inicio, fim) -> "HH:MM-HH:MM", montado só para as linhas
+    # Contadores da instrumentação, informados uma vez ao final
+    horarios_processados = 0
+    candidatos_examinados = 0
+    verificacoes_sobreposicao = 0
+    vagas_nao_preenchidas = 0
+
+    nomes = [pessoa['nome'] for pessoa in dados.pessoas]
+    pareamento = Pareamento(dados.pessoas)
+    ocupacao_pessoas = Ocupacao()  # Por índice da pessoa
+    ocupacao_carrinhos = Ocupacao()
+
+    data = data_inicial
+    for semana in range(semanas):
+        for _ in range(7):
+            progresso_geracao.verificar(cancelar)
+            with instr.trecho('dia', data=data.date()):
+                dia = data.weekday()
+                nome_dia = DIAS_SEMANA[dia]
+                linhas = []  # [(inicio, fim), carrinho, ponto, pessoa1, pessoa2]
+                ocupacao_pessoas.limpar()
+                ocupacao_carrinhos.limpar()
+
+                for nome_carrinho, pontos in horarios.carrinhos:
+                    ocupacao_carrinhos.liberar(nome_carrinho)
+
+                    for nome_ponto, horarios_ponto in pontos:
+                        for inicio, fim in horarios_ponto[dia]:
+                            verificacoes_sobreposicao += 1
+                            if not ocupacao_carrinhos.livre(nome_carrinho, inicio, fim):
+                                continue
+                            disponiveis = disponibilidade.consultar(dia, inicio, fim)
+                            horarios_processados += 1
+                            candidatos_examinados += len(disponiveis)
+                            verificacoes_sobreposicao += len(disponiveis)
+
+                            # Só quem ainda não foi designado neste horário
+                            par = pareamento.formar([
+                                pessoa for pessoa in disponiveis
+                                if ocupacao_pessoas.livre(pessoa, inicio, fim)
+                            ])
+                            if par is None:
+                                # Ninguém livre para este horário
+                                linhas.append([(inicio, fim), nome_carrinho, nome_ponto,
+                                               '-', '-'])
+                            else:
+                                pessoa1, pessoa2 = par
+                                linhas.append([
+                                    (inicio, fim),
+                                    nome_carrinho,
+                                    nome_ponto,
+                                    nomes[pessoa1],
+                                    nomes[pessoa2] if pessoa2 is not None else '?',
+                                ])
+                                for pessoa in par:
+                                    if pessoa is not None:
+                                        pareamento.registrar(pessoa)
+                                        ocupacao_pessoas.reservar(pessoa, inicio, fim)
+
+                            # O carrinho fica ocupado neste horário
+                            ocupacao_carrinhos.reservar(nome_carrinho, inicio, fim)
+
+                # Por carrinho e depois por horário
+                linhas.sort(key=lambda linha: (linha[1], linha[0]))
+                vagas_nao_preenchidas += sum(
+                    (linha[3] == '-') + (linha[4] in ('-', '?')) for linha in linhas)
+                for linha in linhas:
+                    intervalo = linha[0]
+                    texto = textos.get(intervalo)
+                    if texto is None:
+                        texto = textos[intervalo] = formatar_intervalo(*intervalo)
+                    linha[0] = texto
+
+            if linhas:  # Só os dias com designações
+                yield DiaTPL(data, nome_dia, linhas, (data - data_inicial).days + 1)
+
+            data += timedelta(days=1)
+        progresso_geracao.informar(progresso, semana + 1, semanas)
+
+    instr.contar('horarios_processados', horarios_processados)
+    instr.contar('candidatos_examinados', candidatos_examinados)
+    instr.contar('verificacoes_sobreposicao', verificacoes_sobreposicao)
+    instr.contar('vagas_nao_preenchidas', vagas_nao_preenchidas)
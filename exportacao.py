@@ -0,0 +1,255 @@
+"""Exportação das escalas para CSV, JSON, HTML e iCalendar, sem reportlab.
+
+Os exportadores gravam à medida que percorrem a escala: a escala de serviço
+semana a semana e a escala TPL dia a dia, a partir do gerador de
+``escala_tpl_motor.gerar_dias``. São bem mais rápidos que o PDF e servem para
+levar a escala a planilhas, páginas e calendários.
+
+O JSON da escala de serviço tem a estrutura de ``salvar_escala`` e pode ser
+lido por ``carregar_escala`` para estender ou retomar a escala.
+"""
+import csv
+import html
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+FORMATOS = ('csv', 'json', 'html', 'ics')
+# Para os diálogos de arquivo do tkinter
+TIPOS_ARQUIVO = [
+    ("Planilha CSV", "*.csv"),
+    ("JSON", "*.json"),
+    ("Página HTML", "*.html"),
+    ("Calendário (iCalendar)", "*.ics"),
+]
+
+_PRODID = "-//Meeting Schedulo//Escalas//PT"
+_ESTILO_HTML = (
+    "body{font-family:Helvetica,Arial,sans-serif;margin:20px}"
+    "h1,h2{background:#4a6da7;color:#fff;text-align:center;margin:0;padding:6px}"
+    "h3{text-align:center}"
+    "table{border-collapse:collapse;width:100%;margin-top:5px}"
+    "th,td{border:1px solid #999898;padding:3px;text-align:center}"
+    "th{background:#d9d9d9}"
+    "td.periodo{font-weight:bold}"
+    "tr.evento td{background:#FFEB9C;font-weight:bold}"
+)
+
+
+def formato_do_arquivo(caminho, padrao='pdf'):
+    """Formato indicado pela extensão do arquivo (``padrao`` se não houver)"""
+    return os.path.splitext(caminho)[1].lstrip('.').lower() or padrao
+
+
+def _verificar_formato(caminho, formato):
+    formato = formato or formato_do_arquivo(caminho)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato não suportado: {formato}")
+    return formato
+
+
+# Escala de serviço
+
+def exportar_servico(escala, caminho, formato=None):
+    """Grava uma ``Escala`` do motor em ``caminho`` (formato pela extensão)"""
+    formato = _verificar_formato(caminho, formato)
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        _EXPORTADORES_SERVICO[formato](escala, f)
+
+
+def _servico_json(escala, f):
+    # Uma semana por vez, no formato de Escala.para_dicionario (ver carregar_escala)
+    f.write('{\n')
+    cabecalho = {
+        'designações': list(escala.cargos),
+        'semente': escala.semente,
+        'contadores_iniciais': escala.contadores_iniciais.para_dicionario(),
+    }
+    for chave, valor in cabecalho.items():
+        f.write(f'    {json.dumps(chave, ensure_ascii=False)}: '
+                f'{json.dumps(valor, ensure_ascii=False)},\n')
+    f.write('    "semanas": [')
+    separador = '\n'
+    for semana in escala.semanas:
+        f.write(separador + '        ' + json.dumps(semana.para_dicionario(), ensure_ascii=False))
+        separador = ',\n'
+    f.write('\n    ]\n}\n')
+
+
+def _servico_csv(escala, f):
+    escritor = csv.writer(f)
+    escritor.writerow(['inicio', 'fim', 'periodo', *escala.cargos, 'evento_especial'])
+    for semana in escala.semanas:
+        if semana.evento_especial is not None:
+            pessoas = [''] * len(escala.cargos)
+        else:
+            pessoas = [semana.designacoes.get(cargo) or '-' for cargo in escala.cargos]
+        escritor.writerow([semana.inicio.strftime('%Y-%m-%d'), semana.fim.strftime('%Y-%m-%d'),
+                           semana.intervalo, *pessoas, semana.evento_especial or ''])
+
+
+def _servico_html(escala, f):
+    _inicio_html(f, "Designações de serviço para as reuniões")
+    f.write("<table>\n<tr><th>Período</th>")
+    f.writelines(f"<th>{html.escape(cargo)}</th>" for cargo in escala.cargos)
+    f.write("</tr>\n")
+    for semana in escala.semanas:
+        periodo = f'<td class="periodo">{html.escape(semana.intervalo)}</td>'
+        if semana.evento_especial is not None:
+            f.write(f'<tr class="evento">{periodo}<td colspan="{len(escala.cargos)}">'
+                    f'{html.escape(semana.evento_especial)}</td></tr>\n')
+        else:
+            celulas = ''.join(f"<td>{html.escape(semana.designacoes.get(cargo) or '-')}</td>"
+                              for cargo in escala.cargos)
+            f.write(f"<tr>{periodo}{celulas}</tr>\n")
+    f.write("</table>\n</body>\n</html>\n")
+
+
+def _servico_ics(escala, f):
+    """Um evento de dia inteiro por designação preenchida e por evento especial"""
+    carimbo = _carimbo_utc()
+    _linha_ics(f, "BEGIN:VCALENDAR")
+    _linha_ics(f, "VERSION:2.0")
+    _linha_ics(f, f"PRODID:{_PRODID}")
+    for semana in escala.semanas:
+        dia = semana.inicio.strftime('%Y%m%d')
+        if semana.evento_especial is not None:
+            itens = [('evento', semana.evento_especial, '')]
+        else:
+            itens = [(f"d{indice}", f"{cargo}: {semana.designacoes[cargo]}", semana.designacoes[cargo])
+                     for indice, cargo in enumerate(escala.cargos)
+                     if semana.designacoes.get(cargo)]
+        for sufixo, resumo, pessoa in itens:
+            _linha_ics(f, "BEGIN:VEVENT")
+            _linha_ics(f, f"UID:servico-{dia}-{sufixo}@meeting-schedulo")
+            _linha_ics(f, f"DTSTAMP:{carimbo}")
+            _linha_ics(f, f"DTSTART;VALUE=DATE:{dia}")
+            _linha_ics(f, f"DTEND;VALUE=DATE:{(semana.fim + timedelta(days=1)).strftime('%Y%m%d')}")
+            _linha_ics(f, f"SUMMARY:{_escapar_ics(resumo)}")
+            if pessoa:
+                _linha_ics(f, f"DESCRIPTION:{_escapar_ics(pessoa)}")
+            _linha_ics(f, "END:VEVENT")
+    _linha_ics(f, "END:VCALENDAR")
+
+
+_EXPORTADORES_SERVICO = {
+    'csv': _servico_csv,
+    'json': _servico_json,
+    'html': _servico_html,
+    'ics': _servico_ics,
+}
+
+
+# Escala TPL
+
+def exportar_tpl(dias, caminho, formato=None):
+    """Grava os dias de ``escala_tpl_motor.gerar_dias`` em ``caminho``"""
+    formato = _verificar_formato(caminho, formato)
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        _EXPORTADORES_TPL[formato](dias, f)
+
+
+def _tpl_csv(dias, f):
+    escritor = csv.writer(f)
+    escritor.writerow(['data', 'dia', 'horario', 'carrinho', 'ponto', 'pessoa1', 'pessoa2'])
+    for data, nome_dia, linhas, _ in dias:
+        data_iso = data.strftime('%Y-%m-%d')
+        escritor.writerows([data_iso, nome_dia, *linha] for linha in linhas)
+
+
+def _tpl_json(dias, f):
+    # Um dia por vez, para não montar a escala inteira em memória
+    f.write('{\n    "dias": [')
+    separador = '\n'
+    for data, nome_dia, linhas, _ in dias:
+        dia = {
+            'data': data.strftime('%Y-%m-%d'),
+            'dia': nome_dia,
+            'designacoes': [
+                dict(zip(('horario', 'carrinho', 'ponto', 'pessoa1', 'pessoa2'), linha))
+                for linha in linhas
+            ],
+        }
+        f.write(separador + '        ' + json.dumps(dia, ensure_ascii=False))
+        separador = ',\n'
+    f.write('\n    ]\n}\n')
+
+
+def _tpl_html(dias, f):
+    _inicio_html(f, "Escala de Carrinho")
+    for data, nome_dia, linhas, _ in dias:
+        f.write(f"<h3>{html.escape(nome_dia)} - {data.strftime('%d/%m/%Y')}</h3>\n<table>\n"
+                "<tr><th>Horário</th><th>Carrinho</th><th>Ponto</th>"
+                '<th colspan="2">Designações</th></tr>\n')
+        for linha in linhas:
+            f.write("<tr>" + ''.join(f"<td>{html.escape(celula)}</td>" for celula in linha) + "</tr>\n")
+        f.write("</table>\n")
+    f.write("</body>\n</html>\n")
+
+
+def _tpl_ics(dias, f):
+    """Um evento por horário de carrinho, em hora local (sem fuso)"""
+    carimbo = _carimbo_utc()
+    _linha_ics(f, "BEGIN:VCALENDAR")
+    _linha_ics(f, "VERSION:2.0")
+    _linha_ics(f, f"PRODID:{_PRODID}")
+    for data, _, linhas, _ in dias:
+        dia = data.strftime('%Y%m%d')
+        for indice, (horario, carrinho, ponto, pessoa1, pessoa2) in enumerate(linhas):
+            inicio, fim = (parte.strip().replace(':', '') for parte in horario.split('-'))
+            pessoas = ', '.join(p for p in (pessoa1, pessoa2) if p not in ('-', '?'))
+            _linha_ics(f, "BEGIN:VEVENT")
+            _linha_ics(f, f"UID:tpl-{dia}-{indice}@meeting-schedulo")
+            _linha_ics(f, f"DTSTAMP:{carimbo}")
+            _linha_ics(f, f"DTSTART:{dia}T{inicio}00")
+            _linha_ics(f, f"DTEND:{dia}T{fim}00")
+            _linha_ics(f, f"SUMMARY:{_escapar_ics(f'{carrinho} - {ponto}')}")
+            _linha_ics(f, f"LOCATION:{_escapar_ics(ponto)}")
+            if pessoas:
+                _linha_ics(f, f"DESCRIPTION:{_escapar_ics(pessoas)}")
+            _linha_ics(f, "END:VEVENT")
+    _linha_ics(f, "END:VCALENDAR")
+
+
+_EXPORTADORES_TPL = {
+    'csv': _tpl_csv,
+    'json': _tpl_json,
+    'html': _tpl_html,
+    'ics': _tpl_ics,
+}
+
+
+# Auxiliares
+
+def _inicio_html(f, subtitulo):
+    f.write('<!DOCTYPE html>\n<html lang="pt-BR">\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{html.escape(subtitulo)}</title>\n<style>{_ESTILO_HTML}</style>\n"
+            f"</head>\n<body>\n<h1>Congregação Coqueiros</h1>\n<h2>{html.escape(subtitulo)}</h2>\n")
+
+
+def _carimbo_utc():
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _escapar_ics(texto):
+    return (texto.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _linha_ics(f, linha):
+    """Escreve uma linha do iCalendar, dobrada em 75 octetos e terminada em CRLF"""
+    dados = linha.encode('utf-8')
+    if len(dados) <= 75:
+        f.write(linha + '\r\n')
+        return
+    partes = []
+    atual = ''
+    limite = 75
+    for caractere in linha:
+        if len((atual + caractere).encode('utf-8')) > limite:
+            partes.append(atual)
+            atual = ''
+            limite = 74  # As continuações começam com um espaço
+        atual += caractere
+    partes.append(atual)
+    f.write('\r\n '.join(partes) + '\r\n')
@@ -0,0 +1,148 @@
+"""Instrumentação opcional das etapas de geração das escalas.
+
+Registra trechos nomeados (carga, montagem de índices, cada semana ou dia,
+montagem de tabelas, ``doc.build``) e contadores (candidatos examinados,
+verificações de sobreposição, vagas não preenchidas). Quando desligada, as
+chamadas não fazem nada e o custo é desprezível.
+
+Para ligar:
+- pela variável de ambiente ``ESCALA_PERFIL``: ``arquivo.json`` grava um
+  trace no formato do Chrome/Perfetto ao sair; ``-`` imprime um resumo em
+  forma de tabela na saída de erro;
+- por código, com ``ativar()`` / ``desativar()`` ou ``with instrumentar():``.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+VARIAVEL_AMBIENTE = 'ESCALA_PERFIL'
+
+
+class Instrumentacao:
+    """Coleta trechos cronometrados e contadores de uma ou mais gerações"""
+    ativa = True
+
+    def __init__(self):
+        self._origem = time.perf_counter()
+        self._trechos = []
+        self._contadores = defaultdict(int)
+
+    @contextmanager
+    def trecho(self, nome, **atributos):
+        """Cronometra o bloco ``with`` com o nome informado"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            fim = time.perf_counter()
+            self._trechos.append((nome, inicio, fim, threading.get_ident(), atributos))
+
+    def contar(self, nome, quantidade=1):
+        self._contadores[nome] += quantidade
+
+    def resumo(self):
+        """Tempo total, número de ocorrências e máximo por trecho, e os contadores"""
+        trechos = {}
+        for nome, inicio, fim, _, _ in self._trechos:
+            duracao = fim - inicio
+            dados = trechos.setdefault(nome, {'ocorrencias': 0, 'total_s': 0.0, 'maximo_s': 0.0})
+            dados['ocorrencias'] += 1
+            dados['total_s'] += duracao
+            dados['maximo_s'] = max(dados['maximo_s'], duracao)
+        return {'trechos': trechos, 'contadores': dict(self._contadores)}
+
+    def para_trace(self):
+        """Eventos no formato de trace do Chrome (chrome://tracing, Perfetto)"""
+        eventos = [
+            {
+                'name': nome,
+                'ph': 'X',
+                'ts': round((inicio - self._origem) * 1e6, 3),
+                'dur': round((fim - inicio) * 1e6, 3),
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': {chave: str(valor) for chave, valor in atributos.items()},
+            }
+            for nome, inicio, fim, tid, atributos in self._trechos
+        ]
+        return {'traceEvents': eventos, 'resumo': self.resumo()}
+
+    def tabela(self):
+        """Resumo em texto, com os trechos mais demorados primeiro"""
+        resumo = self.resumo()
+        linhas = [f"{'Trecho':<30} {'Qtde':>8} {'Total (ms)':>12} {'Máx (ms)':>10}"]
+        for nome, dados in sorted(resumo['trechos'].items(), key=lambda item: -item[1]['total_s']):
+            linhas.append(f"{nome:<30} {dados['ocorrencias']:>8} "
+                          f"{dados['total_s'] * 1000:>12.2f} {dados['maximo_s'] * 1000:>10.2f}")
+        if resumo['contadores']:
+            linhas.append('')
+            linhas.append(f"{'Contador':<30} {'Valor':>8}")
+            for nome, valor in sorted(resumo['contadores'].items()):
+                linhas.append(f"{nome:<30} {valor:>8}")
+        return '\n'.join(linhas)
+
+    def salvar(self, destino):
+        """Grava o trace em ``destino`` (JSON) ou imprime a tabela se for ``-``"""
+        if destino == '-':
+            print(self.tabela(), file=sys.stderr)
+            return
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(self.para_trace(), f, ensure_ascii=False)
+
+
+class _InstrumentacaoDesligada:
+    """Substituta sem efeito usada quando a instrumentação está desligada"""
+    ativa = False
+    _contexto = nullcontext()
+
+    def trecho(self, nome, **atributos):
+        return self._contexto
+
+    def contar(self, nome, quantidade=1):
+        pass
+
+
+DESLIGADA = _InstrumentacaoDesligada()
+_atual = None
+
+
+def atual():
+    """Instrumentação em uso (a desligada, se nenhuma estiver ativa)"""
+    global _atual
+    if _atual is None:
+        _atual = DESLIGADA
+        destino = os.environ.get(VARIAVEL_AMBIENTE)
+        if destino:
+            instrumentacao = ativar()
+            atexit.register(instrumentacao.salvar, destino)
+    return _atual
+
+
+def ativar():
+    """Liga a instrumentação e retorna o coletor"""
+    global _atual
+    _atual = Instrumentacao()
+    return _atual
+
+
+def desativar():
+    global _atual
+    _atual = DESLIGADA
+
+
+@contextmanager
+def instrumentar():
+    """Liga a instrumentação dentro do bloco ``with`` e retorna o coletor"""
+    global _atual
+    anterior = _atual
+    coletor = Instrumentacao()
+    _atual = coletor
+    try:
+        yield coletor
+    finally:
+        _atual = anterior
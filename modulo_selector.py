@@ -1,7 +1,7 @@
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk
-import escala_servico_gui
-import escala_tpl_gui
+import aquecimento
 
 class ModuloSelector:
     def __init__(self, root):
@@ -55,6 +55,9 @@ class ModuloSelector:
         )
         btn_tpl.pack(fill='x', pady=5)
         
+        # Os dois módulos geram PDF: pré-carrega enquanto a tela está ociosa
+        aquecimento.agendar(self.root)
+        
     def center_window(self):
         """Centraliza a janela na tela"""
         self.root.update_idletasks()
@@ -66,6 +69,8 @@ class ModuloSelector:
         
     def abrir_escala_servico(self):
         """Abre o módulo de Escala de Serviço"""
+        # Importado só ao abrir o módulo, para a tela de seleção aparecer logo
+        import escala_servico_gui
         self.root.withdraw()  # Esconde a janela de seleção
         
         # Cria nova janela para o módulo
@@ -81,6 +86,7 @@ class ModuloSelector:
         
     def abrir_escala_tpl(self):
         """Abre o módulo de Escala TPL"""
+        import escala_tpl_gui
         self.root.withdraw()  # Esconde a janela de seleção
         
         # Cria nova janela para o módulo
@@ -95,6 +101,8 @@ class ModuloSelector:
         modulo_window.protocol("WM_DELETE_WINDOW", on_closing)
 
 if __name__ == '__main__':
+    # Necessário para o pool de processos no executável congelado (Windows)
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ModuloSelector(root)
     root.mainloop() 
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""Persistência dos arquivos de dados JSON: gravação atômica e adiada.
+
+Cada arquivo é gravado num temporário na mesma pasta, com ``fsync``, e só
+então renomeado sobre o original (``os.replace``): uma queda no meio da
+gravação deixa o arquivo antigo intacto, nunca um arquivo truncado.
+
+``salvar_json`` não grava na hora: guarda uma cópia serializada dos dados e
+agenda a gravação numa thread, depois de ``ATRASO_PADRAO`` segundos sem
+novas alterações no mesmo arquivo. Uma sequência de edições vira uma única
+gravação, fora da thread da interface. As gravações pendentes são feitas ao
+sair do programa, ou antes com ``descarregar()``.
+
+``ler`` e ``salvar`` escolhem o armazenamento: o banco SQLite de
+``armazenamento_sqlite`` quando ``ESCALA_BANCO`` aponta para um banco ou
+quando existe ``escalas.db`` na pasta do programa, e os arquivos JSON nos
+demais casos. No banco, as gravações passam pelo mesmo gravador adiado.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+ATRASO_PADRAO = 0.5
+
+ARQUIVO_BANCO = 'escalas.db'
+VARIAVEL_BANCO = 'ESCALA_BANCO'
+
+
+def gravar_json_atomico(caminho, dados):
+    """Grava ``dados`` em ``caminho`` de forma atômica, no formato dos arquivos de dados"""
+    _gravar_atomico(caminho, json.dumps(dados, indent=4, ensure_ascii=False))
+
+
+def _gravar_atomico(caminho, texto):
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(
+        prefix=f".{os.path.basename(caminho)}.", suffix='.tmp', dir=pasta)
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            f.write(texto)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # Garante que a renomeação também chegue ao disco (POSIX)
+        descritor = os.open(pasta, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descritor)
+        finally:
+            os.close(descritor)
+
+
+class GravadorAdiado:
+    """Agrupa as alterações de cada destino e as grava numa thread em segundo plano.
+
+    O destino é identificado por uma chave: o caminho do arquivo JSON ou,
+    com ``gravar``, qualquer texto (um documento do banco, por exemplo).
+    """
+
+    def __init__(self, atraso=ATRASO_PADRAO):
+        self.atraso = atraso
+        self.ultimo_erro = None
+        self._pendentes = {}  # chave -> (prazo, texto JSON compacto, gravar)
+        self._gravando = {}  # chave -> texto sendo gravado agora
+        self._condicao = threading.Condition()
+        self._thread = None
+
+    def agendar(self, chave, dados, gravar=None):
+        """Agenda a gravação de ``dados``; substitui a pendente da mesma chave.
+
+        Sem ``gravar``, ``chave`` é o arquivo gravado; com ``gravar``, a
+        thread chama ``gravar(dados)`` com uma cópia dos dados.
+        """
+        # Serializa já (o codificador compacto é o rápido, em C), para que a
+        # interface possa continuar alterando os dados enquanto a gravação espera
+        texto = json.dumps(dados, ensure_ascii=False)
+        with self._condicao:
+            self._pendentes[chave] = (time.monotonic() + self.atraso, texto, gravar)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='gravador-json',
+                                                daemon=True)
+                self._thread.start()
+            self._condicao.notify_all()
+
+    def pendente(self, chave):
+        """Dados ainda não gravados de ``chave``, ou None"""
+        with self._condicao:
+            item = self._pendentes.get(chave)
+            texto = item[1] if item is not None else self._gravando.get(chave)
+        return None if texto is None else json.loads(texto)
+
+    def descarregar(self):
+        """Grava agora tudo o que estiver pendente e espera as gravações em andamento"""
+        with self._condicao:
+            # Uma gravação em andamento pode ser de uma versão anterior do mesmo arquivo
+            while self._gravando:
+                self._condicao.wait()
+            pendentes = self._pendentes
+            self._pendentes = {}
+            # Registradas como em andamento, para a thread não gravar por cima
+            # uma versão agendada depois desta
+            for chave, (_, texto, _) in pendentes.items():
+                self._gravando[chave] = texto
+        try:
+            for chave, (_, texto, gravar) in pendentes.items():
+                self._gravar(chave, texto, gravar)
+        finally:
+            with self._condicao:
+                for chave in pendentes:
+                    del self._gravando[chave]
+                self._condicao.notify_all()
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                # Uma chave sendo gravada por descarregar espera a gravação terminar
+                prontos = [item for item in self._pendentes.items()
+                           if item[0] not in self._gravando]
+                if not prontos:
+                    self._condicao.wait()
+                    continue
+                chave, (prazo, texto, gravar) = min(prontos, key=lambda item: item[1][0])
+                espera = prazo - time.monotonic()
+                if espera > 0:
+                    self._condicao.wait(espera)
+                    continue
+                del self._pendentes[chave]
+                self._gravando[chave] = texto
+            try:
+                self._gravar(chave, texto, gravar)
+            finally:
+                with self._condicao:
+                    del self._gravando[chave]
+                    self._condicao.notify_all()
+
+    def _gravar(self, chave, texto, gravar):
+        try:
+            if gravar is not None:
+                gravar(json.loads(texto))
+            else:
+                # Reindentado aqui, fora da thread da interface
+                _gravar_atomico(chave, json.dumps(json.loads(texto), indent=4, ensure_ascii=False))
+        except Exception as e:
+            self.ultimo_erro = e
+            print(f"Erro ao salvar {chave}: {e}")
+
+
+_gravador = None
+_trava = threading.Lock()
+
+
+def gravador():
+    """Gravador adiado compartilhado pelo processo, descarregado ao sair"""
+    global _gravador
+    with _trava:
+        if _gravador is None:
+            _gravador = GravadorAdiado()
+            atexit.register(_gravador.descarregar)
+        return _gravador
+
+
+def salvar_json(caminho, dados):
+    """Agenda a gravação atômica de ``dados`` em ``caminho``"""
+    gravador().agendar(caminho, dados)
+
+
+def ler_json(caminho):
+    """Lê ``caminho``, considerando uma gravação ainda pendente do mesmo arquivo"""
+    if _gravador is not None:
+        pendente = _gravador.pendente(caminho)
+        if pendente is not None:
+            return pendente
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def descarregar():
+    """Grava agora as alterações pendentes"""
+    if _gravador is not None:
+        _gravador.descarregar()
+
+
+_banco = None
+
+
+def banco():
+    """Banco SQLite em uso, ou None quando os dados ficam nos arquivos JSON"""
+    global _banco
+    with _trava:
+        if _banco is None:
+            caminho = os.environ.get(VARIAVEL_BANCO)
+            if not caminho and os.path.exists(ARQUIVO_BANCO):
+                caminho = ARQUIVO_BANCO
+            if caminho:
+                # Importado só aqui: o banco é opcional
+                import armazenamento_sqlite
+                _banco = armazenamento_sqlite.BancoEscalas(caminho)
+            else:
+                _banco = False
+        return _banco or None
+
+
+def _chave_banco(atual, documento):
+    return f"{atual.caminho}:{documento}"
+
+
+def ler(documento, caminho):
+    """Lê um documento (``servico``, ``pessoas``, ``carrinhos``, ``pontos``, ``config``).
+
+    Sem banco, lê o arquivo JSON ``caminho``, que lança ``FileNotFoundError``
+    se ainda não existir. Nos dois casos, considera uma gravação pendente.
+    """
+    atual = banco()
+    if atual is None:
+        return ler_json(caminho)
+    if _gravador is not None:
+        pendente = _gravador.pendente(_chave_banco(atual, documento))
+        if pendente is not None:
+            return pendente
+    return atual.ler(documento)
+
+
+def salvar(documento, caminho, dados, adiado=True):
+    """Grava um documento: no banco (só o que mudou) ou no arquivo JSON ``caminho``.
+
+    A gravação é adiada e feita em segundo plano, salvo com ``adiado=False``,
+    que grava na hora, depois das pendentes.
+    """
+    atual = banco()
+    if adiado:
+        if atual is not None:
+            gravador().agendar(_chave_banco(atual, documento), dados,
+                               lambda copia: atual.salvar(documento, copia))
+        else:
+            salvar_json(caminho, dados)
+        return
+    # Uma pendente mais antiga do mesmo documento não pode gravar por cima desta
+    descarregar()
+    if atual is not None:
+        atual.salvar(documento, dados)
+    else:
+        gravar_json_atomico(caminho, dados)
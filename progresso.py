@@ -0,0 +1,27 @@
+"""Progresso e cancelamento cooperativo das gerações de escala.
+
+Os motores recebem dois parâmetros opcionais: ``progresso(feitas, total)``,
+chamado a cada semana gerada, e ``cancelar``, um ``threading.Event`` (ou
+qualquer objeto com ``is_set()``) consultado entre as semanas ou dias.
+Quando ``cancelar`` é acionado, o motor interrompe a geração lançando
+``GeracaoCancelada``. Este módulo não depende de interface: as janelas de
+progresso ficam em ``tarefa_gui``.
+"""
+
+
+class GeracaoCancelada(Exception):
+    """A geração foi interrompida a pedido do usuário"""
+
+    def __init__(self, mensagem="Geração cancelada"):
+        super().__init__(mensagem)
+
+
+def verificar(cancelar):
+    """Lança ``GeracaoCancelada`` se ``cancelar`` tiver sido acionado"""
+    if cancelar is not None and cancelar.is_set():
+        raise GeracaoCancelada()
+
+
+def informar(progresso, feitas, total):
+    if progresso is not None:
+        progresso(feitas, total)
@@ -0,0 +1,310 @@
+"""Renderização em PDF compartilhada pela escala de serviço e pela escala TPL.
+
+Os estilos de parágrafo, os estilos de tabela fixos e as larguras das colunas
+são montados uma única vez por processo e reaproveitados entre gerações; só
+os comandos que dependem dos dados (linhas de evento, cores por carrinho) são
+criados a cada documento. Células sem marcação usam texto simples em vez de
+``Paragraph``, que é bem mais caro de montar e de medir.
+
+Os documentos são montados em fluxo: os elementos vêm de geradores e
+``construir`` os entrega a ``doc.build`` aos poucos, de modo que só as
+tabelas da página em montagem ficam em memória, qualquer que seja o
+horizonte da escala. A tabela da escala de serviço é dividida em blocos do
+tamanho de uma página, cada um com o seu cabeçalho.
+"""
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+import instrumentacao
+
+# Elementos mantidos à frente de doc.build; o suficiente para keepWithNext
+RESERVA_FLUXO = 8
+
+TITULO = "Congregação Coqueiros"
+SUBTITULO_SERVICO = "Designações de serviço para as reuniões"
+SUBTITULO_TPL = "Escala de Carrinho"
+
+COR_BORDA = colors.HexColor('#999898')
+COR_CABECALHO = colors.HexColor('#d9d9d9')
+COR_TITULO = colors.HexColor('#4a6da7')
+COR_EVENTO = colors.HexColor('#FFEB9C')
+COR_CABECALHO_TPL = (colors.HexColor('#0070c0'), colors.HexColor('#ffc101'))  # Azul, amarelo
+COR_TEXTO_CABECALHO_TPL = (colors.white, colors.black)
+COR_LINHA_TPL = (colors.HexColor('#dfeaf7'), colors.HexColor('#fef2cb'))  # Azul e amarelo claros
+
+CABECALHO_TPL = ('Horário', 'Carrinho', 'Ponto', 'Designações')
+# Cinco colunas (as duas pessoas), embora o cabeçalho mostre quatro
+LARGURAS_TPL = (2.5 * cm, 3.5 * cm, 7 * cm, 3.5 * cm, 3.5 * cm)
+
+
+class _FluxoFlowables(list):
+    """Lista que ``doc.build`` consome pela frente, reabastecida de um gerador.
+
+    O reportlab remove cada elemento do início da lista ao desenhá-lo e
+    reinsere as partes que não couberam na página; basta manter alguns
+    elementos à frente para que ele nunca veja a lista inteira.
+    """
+
+    def __init__(self, flowables, reserva=RESERVA_FLUXO):
+        super().__init__()
+        self._fonte = iter(flowables)
+        self._reserva = reserva
+
+    def _abastecer(self):
+        while self._fonte is not None and list.__len__(self) < self._reserva:
+            try:
+                self.append(next(self._fonte))
+            except StopIteration:
+                self._fonte = None
+
+    def __len__(self):
+        self._abastecer()
+        return list.__len__(self)
+
+    def __getitem__(self, indice):
+        self._abastecer()
+        return list.__getitem__(self, indice)
+
+
+def construir(doc, flowables):
+    """``doc.build`` com os elementos produzidos sob demanda por ``flowables``"""
+    with instrumentacao.atual().trecho('doc.build'):
+        doc.build(_FluxoFlowables(flowables))
+
+
+@lru_cache(maxsize=None)
+def estilos():
+    """Estilos de parágrafo usados nos dois documentos"""
+    base = getSampleStyleSheet()
+    return {
+        'titulo': ParagraphStyle(
+            'CustomTitle', parent=base['Heading1'], fontSize=18, alignment=1,
+            spaceAfter=0, textColor=colors.white, leading=20),
+        'subtitulo': ParagraphStyle(
+            'CustomSubtitle', parent=base['Heading2'], fontSize=14, alignment=1,
+            spaceAfter=0, textColor=colors.white, leading=5),
+        'cabecalho': ParagraphStyle(
+            'HeaderStyle', parent=base['Normal'], fontSize=8.5, alignment=1,
+            textColor=colors.black, leading=10),
+        'evento': ParagraphStyle(
+            'EventoStyle', parent=base['Normal'], fontSize=9, alignment=1,
+            textColor=colors.black, leading=12),
+        'dia': ParagraphStyle(
+            'DayTitle', parent=base['Heading3'], fontSize=12, textColor=colors.black,
+            alignment=1, spaceAfter=0, spaceBefore=20),
+    }
+
+
+@lru_cache(maxsize=None)
+def _estilo_faixa(padding_superior, padding_inferior):
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), COR_TITULO),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), padding_superior),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), padding_inferior),
+    ])
+
+
+def cabecalho_documento(subtitulo, largura):
+    """Faixas de título e subtítulo com fundo colorido, seguidas de um espaço"""
+    estilo = estilos()
+    titulo = Table([[Paragraph(f"<b>{TITULO}</b>", estilo['titulo'])]], colWidths=[largura])
+    titulo.setStyle(_estilo_faixa(6, 6))
+    faixa_subtitulo = Table([[Paragraph(f"<b>{subtitulo}</b>", estilo['subtitulo'])]],
+                            colWidths=[largura])
+    faixa_subtitulo.setStyle(_estilo_faixa(2, 20))
+    return [titulo, faixa_subtitulo, Spacer(1, 5)]
+
+
+# Escala de serviço
+
+ALTURA_CABECALHO_SERVICO = 40
+ALTURA_LINHA_SERVICO = 25
+# Espaçamento interno padrão do quadro do SimpleDocTemplate (em cima e embaixo)
+PADDING_QUADRO = 6
+
+
+def documento_servico(nome_arquivo):
+    return SimpleDocTemplate(nome_arquivo, pagesize=A4, rightMargin=20, leftMargin=20,
+                             topMargin=20, bottomMargin=30)
+
+
+@lru_cache(maxsize=None)
+def larguras_colunas_servico(largura, num_cargos):
+    """Período com 12% da largura; o restante dividido entre as designações"""
+    return (largura * 0.12,) + (largura * 0.88 / num_cargos,) * num_cargos
+
+
+@lru_cache(maxsize=None)
+def _comandos_tabela_servico():
+    return (
+        ('BACKGROUND', (0, 0), (-1, 0), COR_CABECALHO),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('TOPPADDING', (0, 0), (-1, 0), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+        ('LEFTPADDING', (0, 0), (-1, 0), 2),
+        ('RIGHTPADDING', (0, 0), (-1, 0), 2),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, COR_BORDA),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 1), (-1, -1), 3),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
+        ('LEFTPADDING', (0, 1), (-1, -1), 2),
+        ('RIGHTPADDING', (0, 1), (-1, -1), 2),
+        ('WORDWRAP', (0, 0), (-1, 0), True),
+        # Coluna Período em negrito
+        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    )
+
+
+def tabela_servico(linhas, cargos, largura):
+    """Tabela da escala de serviço a partir das linhas no formato de ``SemanaEscala.como_linha``"""
+    estilo_cabecalho = estilos()['cabecalho']
+    estilo_evento = estilos()['evento']
+    # Só o cabeçalho e os eventos precisam de Paragraph, para quebrar textos longos
+    dados_tabela = [[Paragraph("<b>Período</b>", estilo_cabecalho)]
+                    + [Paragraph(f"<b>{cargo}</b>", estilo_cabecalho) for cargo in cargos]]
+    comandos = list(_comandos_tabela_servico())
+    vazias = [''] * (len(cargos) - 1)
+    for indice, linha in enumerate(linhas, 1):
+        if 'evento_especial' in linha:
+            # As colunas após o período são mescladas numa faixa amarela
+            evento = Paragraph(f"<b>{linha['evento_especial']}</b>", estilo_evento)
+            dados_tabela.append([linha['intervalo'], evento] + vazias)
+            comandos.append(('SPAN', (1, indice), (-1, indice)))
+            comandos.append(('BACKGROUND', (0, indice), (-1, indice), COR_EVENTO))
+        else:
+            dados_tabela.append([linha['intervalo']] + [linha.get(c, '-') for c in cargos])
+
+    tabela = Table(dados_tabela, colWidths=larguras_colunas_servico(largura, len(cargos)),
+                   rowHeights=[ALTURA_CABECALHO_SERVICO] + [ALTURA_LINHA_SERVICO] * len(linhas),
+                   repeatRows=1)
+    tabela.setStyle(TableStyle(comandos))
+    return tabela
+
+
+def _linhas_por_pagina(altura):
+    return max(1, int((altura - ALTURA_CABECALHO_SERVICO) // ALTURA_LINHA_SERVICO))
+
+
+def elementos_servico(linhas, cargos, doc):
+    """Cabeçalho do documento e a escala em tabelas de uma página cada"""
+    instr = instrumentacao.atual()
+    cabecalho = cabecalho_documento(SUBTITULO_SERVICO, doc.width)
+    altura_pagina = doc.height - 2 * PADDING_QUADRO
+    altura_primeira = altura_pagina - sum(f.wrap(doc.width, altura_pagina)[1] for f in cabecalho)
+    yield from cabecalho
+
+    limite = _linhas_por_pagina(altura_primeira)
+    bloco = []
+    vazia = True
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) == limite:
+            with instr.trecho('tabela'):
+                tabela = tabela_servico(bloco, cargos, doc.width)
+            yield tabela
+            bloco = []
+            vazia = False
+            limite = _linhas_por_pagina(altura_pagina)
+    if bloco or vazia:
+        with instr.trecho('tabela'):
+            tabela = tabela_servico(bloco, cargos, doc.width)
+        yield tabela
+
+
+def gerar_pdf_servico(linhas, cargos, nome_arquivo):
+    """Grava o PDF da escala de serviço; ``linhas`` pode ser um gerador"""
+    doc = documento_servico(nome_arquivo)
+    construir(doc, elementos_servico(linhas, cargos, doc))
+
+
+# Escala TPL
+
+def documento_tpl(nome_arquivo):
+    return SimpleDocTemplate(nome_arquivo, pagesize=landscape(A4))
+
+
+@lru_cache(maxsize=None)
+def _comandos_tabela_tpl(alternado):
+    return (
+        ('BACKGROUND', (0, 0), (-1, 0), COR_CABECALHO_TPL[alternado]),
+        ('TEXTCOLOR', (0, 0), (-1, 0), COR_TEXTO_CABECALHO_TPL[alternado]),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, COR_BORDA),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        # Cabeçalho "Designações" sobre as duas colunas de pessoas
+        ('SPAN', (3, 0), (4, 0)),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    )
+
+
+def bloco_dia_tpl(titulo, linhas, numero_dia):
+    """Título e tabela de um dia da escala TPL, mantidos juntos na mesma página.
+
+    ``linhas`` são ``[horário, carrinho, ponto, pessoa1, pessoa2]`` já
+    ordenadas por carrinho; ``numero_dia`` (a partir de 1) alterna a cor do
+    cabeçalho.
+    """
+    tabela = Table([list(CABECALHO_TPL)] + linhas, colWidths=LARGURAS_TPL, repeatRows=1)
+    comandos = list(_comandos_tabela_tpl(numero_dia % 2 == 0))
+    # Cor das linhas alterna a cada carrinho
+    carrinho_atual = None
+    cor = 0
+    for i, linha in enumerate(linhas, 1):
+        if linha[1] != carrinho_atual:
+            carrinho_atual = linha[1]
+            cor = 1 - cor
+        comandos.append(('BACKGROUND', (0, i), (-1, i), COR_LINHA_TPL[cor]))
+    tabela.setStyle(TableStyle(comandos))
+    return KeepTogether([
+        Paragraph(f"<b>{titulo}</b>", estilos()['dia']),
+        Spacer(1, 5),
+        tabela,
+    ])
+
+
+def elementos_tpl(dias, doc):
+    """Cabeçalho do documento e um bloco por dia de ``escala_tpl_motor.gerar_dias``"""
+    instr = instrumentacao.atual()
+    yield from cabecalho_documento(SUBTITULO_TPL, doc.width)
+    for data, nome_dia, linhas, numero_dia in dias:
+        with instr.trecho('tabela'):
+            bloco = bloco_dia_tpl(f"{nome_dia} - {data.strftime('%d/%m/%Y')}", linhas, numero_dia)
+        yield bloco
+
+
+def gerar_pdf_tpl(dias, nome_arquivo):
+    """Grava o PDF da escala TPL; os dias são gerados à medida que as páginas são montadas"""
+    doc = documento_tpl(nome_arquivo)
+    construir(doc, elementos_tpl(dias, doc))
+
+
+def aquecer():
+    """Monta os estilos e carrega as fontes de antemão (ver aquecimento.py)"""
+    for fonte in ('Helvetica', 'Helvetica-Bold'):
+        stringWidth('0', fonte, 10)
+    _estilo_faixa(6, 6)
+    _estilo_faixa(2, 20)
+    _comandos_tabela_servico()
+    _comandos_tabela_tpl(False)
+    _comandos_tabela_tpl(True)
+    # Medir um parágrafo carrega o interpretador de marcação do reportlab
+    Paragraph("<b>Período</b>", estilos()['cabecalho']).wrap(100, 100)
@@ -0,0 +1,167 @@
+"""Repositório dos dados da escala de serviço, em retratos imutáveis versionados.
+
+O repositório guarda o retrato atual (``DadosEscala``) e nunca o altera:
+cada edição monta um novo retrato, com a versão seguinte, e o publica de uma
+vez só. Quem gera uma escala pega ``repositorio.retrato`` no início e usa
+sempre o mesmo, mesmo que a interface continue editando em outra thread;
+várias gerações podem rodar ao mesmo tempo, cada uma com a sua versão.
+
+As edições são feitas sob uma trava e gravadas na ordem das versões, com
+``persistencia.salvar`` (banco SQLite ou arquivo JSON, com gravação adiada).
+"""
+import threading
+from dataclasses import replace
+
+import escala_servico_motor
+import instrumentacao
+import persistencia
+from escala_servico_motor import DadosEscala
+
+
+class RepositorioServico:
+    """Designações, pessoas e datas especiais, com um retrato por versão"""
+
+    def __init__(self, caminho, documento='servico'):
+        self.caminho = caminho
+        self.documento = documento
+        self._trava = threading.RLock()
+        self._retrato = DadosEscala()
+
+    @property
+    def retrato(self):
+        """Retrato atual; não muda depois de obtido, mesmo com novas edições"""
+        return self._retrato
+
+    @property
+    def versao(self):
+        return self._retrato.versao
+
+    def carregar(self):
+        """Relê os dados do armazenamento; cria o arquivo inicial se não existir"""
+        with self._trava:
+            try:
+                with instrumentacao.atual().trecho('carregar', arquivo=self.caminho):
+                    dados = persistencia.ler(self.documento, self.caminho)
+                    novo = DadosEscala.de_dicionarios(
+                        dados.get('designações', []),
+                        dados.get('pessoas', {}),
+                        dados.get('datas_especiais', {}),
+                    )
+            except FileNotFoundError:
+                self._publicar(DadosEscala())  # Criar arquivo inicial
+                return self._retrato
+            except Exception as e:
+                print(f"Erro ao carregar dados: {e}")
+                self._publicar(DadosEscala())
+                return self._retrato
+            # Recém-lido: não precisa gravar de volta
+            self._publicar(novo, gravar=False)
+            return self._retrato
+
+    def salvar(self):
+        """Grava o retrato atual"""
+        with self._trava:
+            self._gravar(self._retrato)
+
+    # Edições: cada uma publica um novo retrato
+
+    def adicionar_cargo(self, nome):
+        """Adiciona uma designação; False se já existir"""
+        with self._trava:
+            atual = self._retrato
+            if nome in atual.cargos:
+                return False
+            self._publicar(replace(atual, cargos=atual.cargos + (nome,)))
+            return True
+
+    def excluir_cargo(self, nome):
+        """Exclui uma designação e a retira das pessoas.
+
+        Retorna as pessoas que ficaram sem designação, ou None se ``nome``
+        não existir.
+        """
+        with self._trava:
+            atual = self._retrato
+            if nome not in atual.cargos:
+                return None
+            pessoas = dict(atual.pessoas)
+            sem_designacao = []
+            for pessoa, lista in atual.pessoas.items():
+                if nome in lista:
+                    pessoas[pessoa] = tuple(c for c in lista if c != nome)
+                    if not pessoas[pessoa]:
+                        sem_designacao.append(pessoa)
+            self._publicar(replace(atual, cargos=tuple(c for c in atual.cargos if c != nome),
+                                   pessoas=pessoas))
+            return sem_designacao
+
+    def definir_pessoa(self, nome, cargos, nome_anterior=None):
+        """Cadastra ou atualiza uma pessoa; com ``nome_anterior``, também a renomeia"""
+        with self._trava:
+            atual = self._retrato
+            pessoas = dict(atual.pessoas)
+            if nome_anterior is not None and nome_anterior != nome:
+                pessoas.pop(nome_anterior, None)
+            pessoas[nome] = tuple(cargos)
+            self._publicar(replace(atual, pessoas=pessoas))
+
+    def excluir_pessoa(self, nome):
+        """Exclui uma pessoa; False se não existir"""
+        with self._trava:
+            atual = self._retrato
+            if nome not in atual.pessoas:
+                return False
+            pessoas = dict(atual.pessoas)
+            del pessoas[nome]
+            self._publicar(replace(atual, pessoas=pessoas))
+            return True
+
+    def definir_data_especial(self, chave, evento):
+        """Cadastra ou altera o evento de uma data especial"""
+        with self._trava:
+            atual = self._retrato
+            datas = dict(atual.datas_especiais)
+            datas[chave] = evento
+            self._publicar(replace(atual, datas_especiais=datas))
+
+    def excluir_data_especial(self, chave):
+        """Exclui uma data especial; False se não existir"""
+        with self._trava:
+            atual = self._retrato
+            if chave not in atual.datas_especiais:
+                return False
+            datas = dict(atual.datas_especiais)
+            del datas[chave]
+            self._publicar(replace(atual, datas_especiais=datas))
+            return True
+
+    def limpar_datas_especiais(self):
+        with self._trava:
+            atual = self._retrato
+            if atual.datas_especiais:
+                self._publicar(replace(atual, datas_especiais={}))
+
+    def migrar_datas_especiais(self, ano):
+        """Adiciona o ano às datas especiais no formato antigo (DD/MM); retorna quantas mudaram"""
+        with self._trava:
+            atual = self._retrato
+            migradas = escala_servico_motor.migrar_datas_especiais(atual.datas_especiais, ano)
+            alteradas = len(set(migradas) - set(atual.datas_especiais))
+            if alteradas:
+                self._publicar(replace(atual, datas_especiais=migradas))
+            return alteradas
+
+    def _publicar(self, novo, gravar=True):
+        # Chamado sob a trava: a versão é sempre a seguinte à publicada
+        novo = replace(novo, versao=self._retrato.versao + 1)
+        self._retrato = novo
+        if gravar:
+            self._gravar(novo)
+
+    def _gravar(self, retrato):
+        try:
+            # Gravação adiada e em segundo plano, em que edições seguidas viram
+            # uma só; no banco, só o que mudou, e no arquivo, gravação atômica
+            persistencia.salvar(self.documento, self.caminho, retrato.para_dicionario())
+        except Exception as e:
+            print(f"Erro ao salvar dados: {e}")
@@ -0,0 +1,123 @@
+"""Execução das gerações em segundo plano, com barra de progresso e Cancelar.
+
+``executar`` roda a tarefa numa thread e mostra uma janela modal com a barra
+de progresso. A thread nunca toca no Tk: o progresso e o resultado passam
+por uma fila, que a janela consulta com ``after()``, e os retornos
+(``ao_concluir``, ``ao_falhar``, ``ao_cancelar``) são chamados na thread da
+interface. Cancelar aciona o evento repassado à tarefa, que o motor consulta
+entre as semanas ou dias (ver o módulo ``progresso``).
+"""
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from progresso import GeracaoCancelada
+
+INTERVALO_CONSULTA_MS = 50
+
+
+class DialogoProgresso:
+    """Janela modal com a barra de progresso de uma tarefa e o botão Cancelar"""
+
+    def __init__(self, parent, titulo, mensagem):
+        self.cancelar = threading.Event()
+
+        self.top = tk.Toplevel(parent)
+        self.top.title(titulo)
+        self.top.resizable(False, False)
+        self.top.transient(parent)
+        # Devolvida ao fechar, se a geração foi aberta de outro diálogo modal
+        self._grab_anterior = self.top.grab_current()
+        self.top.grab_set()
+        # Fechar a janela equivale a cancelar
+        self.top.protocol("WM_DELETE_WINDOW", self.solicitar_cancelamento)
+
+        main_frame = ttk.Frame(self.top, padding="15")
+        main_frame.pack(fill='both', expand=True)
+
+        self.label = ttk.Label(main_frame, text=mensagem, width=45)
+        self.label.pack(pady=(0, 10))
+        self.barra = ttk.Progressbar(main_frame, mode='indeterminate', length=320)
+        self.barra.pack(fill='x')
+        self.barra.start(15)
+        self.botao = ttk.Button(main_frame, text="Cancelar", command=self.solicitar_cancelamento)
+        self.botao.pack(pady=(10, 0))
+
+        # Centralizar sobre a janela principal
+        self.top.update_idletasks()
+        x = parent.winfo_rootx() + (parent.winfo_width() - self.top.winfo_width()) // 2
+        y = parent.winfo_rooty() + (parent.winfo_height() - self.top.winfo_height()) // 2
+        self.top.geometry(f'+{max(x, 0)}+{max(y, 0)}')
+
+    def atualizar(self, feitas, total, unidade):
+        if self.cancelar.is_set() or not total:
+            return
+        if str(self.barra['mode']) != 'determinate':
+            self.barra.stop()
+            self.barra.configure(mode='determinate', maximum=total)
+        self.barra.configure(maximum=total, value=feitas)
+        self.label.configure(text=f"{feitas} de {total} {unidade}")
+
+    def solicitar_cancelamento(self):
+        self.cancelar.set()
+        self.botao.state(['disabled'])
+        self.label.configure(text="Cancelando...")
+
+    def fechar(self):
+        self.barra.stop()
+        self.top.grab_release()
+        self.top.destroy()
+        anterior = self._grab_anterior
+        if anterior is not None and anterior.winfo_exists():
+            anterior.grab_set()
+
+
+def executar(parent, tarefa, ao_concluir, ao_falhar, ao_cancelar=None,
+             titulo="Gerando escala", mensagem="Preparando...", unidade="semanas"):
+    """Roda ``tarefa(progresso, cancelar)`` numa thread, com uma janela de progresso.
+
+    ``ao_concluir(resultado)``, ``ao_falhar(erro)`` e ``ao_cancelar()`` são
+    chamados na thread da interface quando a tarefa termina.
+    """
+    dialogo = DialogoProgresso(parent, titulo, mensagem)
+    eventos = queue.Queue()
+
+    def progresso(feitas, total):
+        eventos.put(('progresso', (feitas, total)))
+
+    def trabalhar():
+        try:
+            resultado = tarefa(progresso, dialogo.cancelar)
+        except GeracaoCancelada:
+            eventos.put(('cancelada', None))
+        except Exception as e:
+            eventos.put(('erro', e))
+        else:
+            eventos.put(('concluida', resultado))
+
+    def consultar():
+        ultimo = None
+        while True:
+            try:
+                tipo, valor = eventos.get_nowait()
+            except queue.Empty:
+                break
+            if tipo == 'progresso':
+                ultimo = valor  # Só o mais recente interessa à barra
+                continue
+            dialogo.fechar()
+            if tipo == 'concluida':
+                ao_concluir(valor)
+            elif tipo == 'erro':
+                ao_falhar(valor)
+            elif ao_cancelar is not None:
+                ao_cancelar()
+            return
+        if ultimo is not None:
+            dialogo.atualizar(*ultimo, unidade)
+        parent.after(INTERVALO_CONSULTA_MS, consultar)
+
+    threading.Thread(target=trabalhar, name='geracao-escala', daemon=True).start()
+    parent.after(INTERVALO_CONSULTA_MS, consultar)
+    return dialogo
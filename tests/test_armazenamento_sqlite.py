@@ -0,0 +1,159 @@
+"""Testes do armazenamento em SQLite"""
+import json
+import sqlite3
+
+import pytest
+
+import armazenamento_sqlite
+from armazenamento_sqlite import BancoEscalas
+
+SERVICO = {
+    'designações': ['Indicador', 'Leitor', 'Presidente'],
+    'pessoas': {'Ana': ['Leitor'], 'João': ['Indicador', 'Presidente'], 'Zé': []},
+    'datas_especiais': {'20/06/2026 a 22/06/2026': 'Congresso', '25/12': 'Natal'},
+}
+
+PESSOAS_TPL = [
+    {'nome': 'João', 'sexo': 'M', 'has_spouse': True, 'spouse': 'Maria',
+     'horarios': {'Segunda': ['07:00-09:00'], 'Sábado': ['08:00-10:00']}},
+    {'nome': 'Maria', 'sexo': 'F', 'has_spouse': True, 'spouse': 'João',
+     'horarios': {'Segunda': ['07:00-09:00']}},
+]
+
+
+@pytest.fixture
+def caminho_banco(tmp_path):
+    return str(tmp_path / 'escalas.db')
+
+
+@pytest.fixture
+def banco(caminho_banco):
+    banco = BancoEscalas(caminho_banco)
+    yield banco
+    banco.fechar()
+
+
+def _reabrir(caminho, documento):
+    banco = BancoEscalas(caminho)
+    try:
+        return banco.ler(documento)
+    finally:
+        banco.fechar()
+
+
+def test_documentos_vazios(banco):
+    assert banco.ler('servico') == {'designações': [], 'pessoas': {}, 'datas_especiais': {}}
+    assert banco.ler('pessoas') == []
+    assert banco.ler('config') == {}
+
+
+def test_ida_e_volta_de_todos_os_documentos(banco, caminho_banco):
+    documentos = {
+        'servico': SERVICO,
+        'pessoas': PESSOAS_TPL,
+        'pontos': [{'nome': 'Praça', 'horarios': {'Segunda': ['07:00-11:00']}}],
+        'carrinhos': [{'nome': 'Carrinho 1', 'pontos': ['Praça']}],
+        'config': {'duracao_padrao': 120},
+    }
+    for documento, dados in documentos.items():
+        banco.salvar(documento, dados)
+    for documento, dados in documentos.items():
+        assert banco.ler(documento) == dados
+        assert _reabrir(caminho_banco, documento) == dados
+
+
+def test_alteracoes_mantem_a_ordem(banco, caminho_banco):
+    banco.salvar('servico', SERVICO)
+    alterado = json.loads(json.dumps(SERVICO))
+    del alterado['pessoas']['Ana']
+    alterado['pessoas'] = {'Beto': ['Leitor'], **alterado['pessoas']}  # Renomeação muda a ordem
+    alterado['pessoas']['João'].remove('Presidente')
+    alterado['designações'].append('Volante')
+    alterado['datas_especiais']['01/01/2027'] = 'Ano novo'
+    banco.salvar('servico', alterado)
+
+    relido = _reabrir(caminho_banco, 'servico')
+    assert relido == alterado
+    assert list(relido['pessoas']) == ['Beto', 'João', 'Zé']
+
+
+def test_leitura_devolve_copia(banco):
+    banco.salvar('pessoas', PESSOAS_TPL)
+    lidas = banco.ler('pessoas')
+    lidas[0]['sexo'] = 'F'
+    banco.salvar('pessoas', lidas)
+    assert banco.ler('pessoas')[0]['sexo'] == 'F'
+
+
+def test_horario_invalido_nao_impede_a_gravacao(banco, caminho_banco):
+    pessoas = json.loads(json.dumps(PESSOAS_TPL))
+    pessoas[1]['horarios']['Segunda'].append('lixo')
+    pessoas[1]['horarios']['Terça'] = ['10:00', None]
+    banco.salvar('pessoas', pessoas)
+    assert _reabrir(caminho_banco, 'pessoas') == pessoas
+
+
+def test_nomes_repetidos_como_no_json(banco, caminho_banco):
+    repetidas = PESSOAS_TPL + [dict(PESSOAS_TPL[0], sexo='F')]
+    banco.salvar('pessoas', repetidas)
+    assert _reabrir(caminho_banco, 'pessoas') == repetidas
+    banco.salvar('pessoas', repetidas[1:])
+    assert _reabrir(caminho_banco, 'pessoas') == repetidas[1:]
+
+
+def test_falha_desfaz_a_transacao(banco, caminho_banco):
+    banco.salvar('pessoas', PESSOAS_TPL)
+    alteradas = [dict(PESSOAS_TPL[0], sexo='F'), dict(PESSOAS_TPL[1], horarios=object())]
+    with pytest.raises(TypeError):
+        banco.salvar('pessoas', alteradas)
+    assert _reabrir(caminho_banco, 'pessoas') == PESSOAS_TPL
+    # A comparação seguinte parte do que está no banco
+    banco.salvar('pessoas', PESSOAS_TPL[:1])
+    assert _reabrir(caminho_banco, 'pessoas') == PESSOAS_TPL[:1]
+
+
+def test_migrar_de_json(tmp_path, banco):
+    arquivo_servico = tmp_path / 'dados_servico.json'
+    arquivo_servico.write_text(json.dumps(SERVICO), encoding='utf-8')
+    pasta_tpl = tmp_path / 'data_tpl'
+    pasta_tpl.mkdir()
+    (pasta_tpl / 'pessoas.json').write_text(json.dumps(PESSOAS_TPL), encoding='utf-8')
+
+    migrados = armazenamento_sqlite.migrar_de_json(banco, str(arquivo_servico), str(pasta_tpl))
+    assert len(migrados) == 2
+    assert banco.ler('servico') == SERVICO
+    assert banco.ler('pessoas') == PESSOAS_TPL
+    assert banco.ler('pontos') == []
+
+
+def test_converte_banco_da_versao_1(caminho_banco):
+    # Esquema antigo: o nome como chave, posições com lacunas e tabelas auxiliares
+    conexao = sqlite3.connect(caminho_banco)
+    conexao.executescript("""
+        CREATE TABLE pessoas_tpl (nome TEXT PRIMARY KEY, posicao INTEGER NOT NULL,
+                                  dados TEXT NOT NULL, sexo TEXT);
+        CREATE TABLE disponibilidade_tpl (pessoa TEXT NOT NULL, dia TEXT NOT NULL,
+                                          inicio INTEGER NOT NULL, fim INTEGER NOT NULL);
+        CREATE TABLE datas_especiais (nome TEXT PRIMARY KEY, posicao INTEGER NOT NULL,
+                                      dados TEXT NOT NULL, inicio TEXT, fim TEXT);
+        PRAGMA user_version = 1;
+    """)
+    conexao.executemany("INSERT INTO pessoas_tpl (nome, posicao, dados) VALUES (?, ?, ?)",
+                        [(p['nome'], 2 + 3 * i, json.dumps(p)) for i, p in enumerate(PESSOAS_TPL)][::-1])
+    conexao.execute("INSERT INTO datas_especiais (nome, posicao, dados) VALUES ('25/12', 0, '\"Natal\"')")
+    conexao.commit()
+    conexao.close()
+
+    banco = BancoEscalas(caminho_banco)
+    try:
+        assert banco.ler('pessoas') == PESSOAS_TPL
+        assert banco.ler('servico') == {'designações': [], 'pessoas': {},
+                                        'datas_especiais': {'25/12': 'Natal'}}
+        banco.salvar('pessoas', PESSOAS_TPL[1:])
+    finally:
+        banco.fechar()
+    assert _reabrir(caminho_banco, 'pessoas') == PESSOAS_TPL[1:]
+    conexao = sqlite3.connect(caminho_banco)
+    tabelas = {nome for nome, in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conexao.close()
+    assert 'disponibilidade_tpl' not in tabelas
@@ -0,0 +1,444 @@
+"""Testes do motor da escala de serviço"""
+import itertools
+import os
+import random
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import escala_servico_motor as motor
+from escala_servico_motor import DadosEscala, IndiceDatasEspeciais
+
+DATA_INICIAL = datetime(2026, 1, 5)  # Uma segunda-feira
+
+
+def _dados(num_cargos=5, num_pessoas=14, semente=1, datas_especiais=None):
+    rng = random.Random(semente)
+    cargos = [f"Cargo {c}" for c in range(num_cargos)]
+    pessoas = {
+        f"Pessoa {p}": rng.sample(cargos, rng.randint(1, num_cargos))
+        for p in range(num_pessoas)
+    }
+    return DadosEscala.de_dicionarios(cargos, pessoas, datas_especiais or {})
+
+
+# Escala como dados
+
+def test_gerar_escala_devolve_uma_semana_por_intervalo():
+    dados = _dados()
+    escala = motor.gerar_escala(dados, DATA_INICIAL, 6, semente=1)
+    assert escala.cargos == dados.cargos
+    assert [(semana.inicio, semana.fim) for semana in escala.semanas] == [
+        (DATA_INICIAL + timedelta(weeks=i), DATA_INICIAL + timedelta(weeks=i, days=6))
+        for i in range(6)
+    ]
+    for semana in escala.semanas:
+        assert list(semana.designacoes) == list(dados.cargos)
+        designadas = [pessoa for pessoa in semana.designacoes.values() if pessoa is not None]
+        # Cada pessoa no máximo uma vez por semana, só nas designações que pode exercer
+        assert len(set(designadas)) == len(designadas)
+        for cargo, pessoa in semana.designacoes.items():
+            assert pessoa is None or cargo in dados.pessoas[pessoa]
+
+
+def test_linhas_no_formato_da_renderizacao():
+    dados = DadosEscala.de_dicionarios(['Leitor', 'Indicador'], {'Ana': ['Leitor']},
+                                       {'14/01/2026': 'Assembleia'})
+    linhas = motor.gerar_escala(dados, DATA_INICIAL, 2, semente=1).linhas()
+    assert linhas == [
+        {'intervalo': '05/01 a 11/01', 'Leitor': 'Ana', 'Indicador': '-'},
+        {'intervalo': '12/01 a 18/01', 'evento_especial': 'Assembleia'},
+    ]
+
+
+def test_sem_designacoes_ou_sem_pessoas_validas():
+    with pytest.raises(Exception):
+        motor.gerar_escala(DadosEscala.de_dicionarios([], {'Ana': []}, {}), DATA_INICIAL, 1)
+    with pytest.raises(Exception):
+        motor.gerar_escala(DadosEscala.de_dicionarios(['Leitor'], {'Ana': []}, {}),
+                           DATA_INICIAL, 1)
+
+
+def test_gerar_escala_nao_carrega_o_reportlab():
+    # Num processo novo, para não depender do que outros testes já importaram
+    codigo = (
+        "import sys\n"
+        "from datetime import datetime\n"
+        "import escala_servico_motor as motor\n"
+        "dados = motor.DadosEscala.de_dicionarios(['Leitor'], {'Ana': ['Leitor']}, {})\n"
+        "motor.gerar_escala(dados, datetime(2026, 1, 5), 4, semente=1)\n"
+        "print('reportlab' in sys.modules)\n"
+    )
+    pasta = os.path.dirname(os.path.abspath(motor.__file__))
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=pasta, capture_output=True,
+                           text=True, check=True)
+    assert saida.stdout.strip() == 'False'
+
+
+# Equivalência com o laço original
+
+def _emparelhamento_maximo(cargos, pessoas):
+    """Tamanho do emparelhamento máximo designação-pessoa (caminhos aumentantes)"""
+    elegiveis = [[nome for nome, lista in pessoas.items() if cargo in lista] for cargo in cargos]
+    dono = {}
+
+    def aumentar(c, visitadas):
+        for nome in elegiveis[c]:
+            if nome in visitadas:
+                continue
+            visitadas.add(nome)
+            if nome not in dono or aumentar(dono[nome], visitadas):
+                dono[nome] = c
+                return True
+        return False
+
+    return sum(aumentar(c, set()) for c in range(len(cargos)))
+
+
+def _gerar_referencia(dados, semanas, semente):
+    """O laço original de gerar_escala_com_data (varredura de todas as pessoas e
+    ordenação completa dos candidatos), com o sorteio por semana do motor"""
+    validos = {p: c for p, c in dados.pessoas.items() if c}
+    uso_pessoa = {p: 0 for p in validos}
+    uso_pessoa_designacao = {p: {} for p in validos}
+    escala = []
+    for inicio, fim in motor.gerar_intervalo_datas(DATA_INICIAL, semanas):
+        alocados = set()
+        linha = {'intervalo': motor.formatar_intervalo_data(inicio, fim)}
+        cargos_sorteio = list(dados.cargos)
+        random.Random(semente * 1000003 + inicio.toordinal()).shuffle(cargos_sorteio)
+        for cargo in cargos_sorteio:
+            candidatos = [p for p in validos if cargo in validos[p] and p not in alocados]
+            if not candidatos:
+                linha[cargo] = "-"
+                continue
+            candidatos.sort(key=lambda x: (uso_pessoa_designacao[x].get(cargo, 0), uso_pessoa[x]))
+            escolhido = candidatos[0]
+            linha[cargo] = escolhido
+            alocados.add(escolhido)
+            uso_pessoa[escolhido] += 1
+            uso_pessoa_designacao[escolhido][cargo] = uso_pessoa_designacao[escolhido].get(cargo, 0) + 1
+        escala.append(linha)
+    return escala
+
+
+def test_indice_elegibilidade_igual_a_varredura():
+    dados = _dados(num_cargos=8, num_pessoas=40, semente=3)
+    pessoas = dict(dados.pessoas, **{'Sem designação': (), 'Só inexistente': ('Cargo 99',)})
+    indice = motor.IndiceElegibilidade.construir(dados.cargos, pessoas)
+    assert indice.nomes == tuple(nome for nome, lista in pessoas.items() if lista)
+    for c, cargo in enumerate(dados.cargos):
+        aptos = [indice.nomes[p] for p in motor.iterar_bits(indice.mascaras[c])]
+        assert aptos == [nome for nome, lista in pessoas.items() if cargo in lista]
+
+
+@pytest.mark.parametrize('num_cargos,num_pessoas', [(5, 14), (8, 6), (12, 60)])
+@pytest.mark.parametrize('semente', range(4))
+def test_modo_guloso_igual_ao_laco_original(num_cargos, num_pessoas, semente):
+    dados = _dados(num_cargos, num_pessoas, semente)
+    escala = motor.gerar_escala(dados, DATA_INICIAL, 26, motor.MODO_GULOSO, semente=semente)
+    assert escala.linhas() == _gerar_referencia(dados, 26, semente)
+
+
+@pytest.mark.parametrize('semente', range(3))
+def test_filas_candidatos_iguais_a_ordenacao_completa(semente):
+    rng = random.Random(semente)
+    dados = _dados(num_cargos=6, num_pessoas=30, semente=semente)
+    indice = motor.IndiceElegibilidade.construir(dados.cargos, dados.pessoas)
+    contadores = motor.Contadores()
+    for _ in range(40):
+        contadores.registrar(rng.choice(indice.nomes), rng.choice(dados.cargos))
+    filas = motor.FilasCandidatos(indice, dados.cargos, contadores)
+    uso = [contadores.uso_pessoa.get(nome, 0) for nome in indice.nomes]
+    uso_cargo = [[contadores.uso_pessoa_designacao.get(nome, {}).get(cargo, 0)
+                  for cargo in dados.cargos] for nome in indice.nomes]
+
+    # Muitas designações, para que os heaps sejam compactados no caminho
+    for _ in range(3000):
+        c = rng.randrange(len(dados.cargos))
+        alocados = sum(1 << p for p in range(len(indice.nomes)) if rng.random() < 0.3)
+        candidatos = [p for p in motor.iterar_bits(indice.mascaras[c]) if not alocados >> p & 1]
+        candidatos.sort(key=lambda p: (uso_cargo[p][c], uso[p]))
+        escolhido = filas.escolher(c, alocados)
+        assert escolhido == (candidatos[0] if candidatos else None)
+        if escolhido is not None:
+            filas.registrar(escolhido, c)
+            uso[escolhido] += 1
+            uso_cargo[escolhido][c] += 1
+    assert filas.uso_pessoa == uso
+
+
+def test_modo_guloso_igual_ao_laco_original_em_horizonte_longo():
+    dados = _dados(num_cargos=20, num_pessoas=300, semente=9)
+    escala = motor.gerar_escala(dados, DATA_INICIAL, 104, motor.MODO_GULOSO, semente=9)
+    assert escala.linhas() == _gerar_referencia(dados, 104, 9)
+
+
+# Modo ótimo
+
+@pytest.mark.parametrize('semente', range(8))
+def test_modo_otimo_preenche_tanto_quanto_o_emparelhamento_maximo(semente):
+    rng = random.Random(semente)
+    cargos = [f"Cargo {c}" for c in range(6)]
+    # Poucas pessoas e poucas designações por pessoa, para haver vagas inevitáveis
+    pessoas = {f"Pessoa {p}": rng.sample(cargos, rng.randint(1, 2)) for p in range(rng.randint(3, 7))}
+    dados = DadosEscala.de_dicionarios(cargos, pessoas, {})
+    maximo = _emparelhamento_maximo(cargos, pessoas)
+
+    escala = motor.gerar_escala(dados, DATA_INICIAL, 6, motor.MODO_OTIMO, semente=semente)
+    for semana in escala.semanas:
+        designadas = [pessoa for pessoa in semana.designacoes.values() if pessoa is not None]
+        assert len(designadas) == maximo
+        assert len(set(designadas)) == len(designadas)
+        for cargo, pessoa in semana.designacoes.items():
+            assert pessoa is None or cargo in pessoas[pessoa]
+
+
+def test_modo_otimo_nunca_preenche_menos_que_o_guloso():
+    dados = _dados(num_cargos=6, num_pessoas=7, semente=11)
+    otima = motor.gerar_escala(dados, DATA_INICIAL, 20, motor.MODO_OTIMO, semente=1)
+    gulosa = motor.gerar_escala(dados, DATA_INICIAL, 20, motor.MODO_GULOSO, semente=1)
+    assert otima.vagas_nao_preenchidas() <= gulosa.vagas_nao_preenchidas()
+
+
+@pytest.mark.parametrize('semente', range(20))
+def test_atribuicao_custo_minimo_igual_a_forca_bruta(semente):
+    rng = random.Random(semente)
+    n = rng.randint(1, 5)
+    m = rng.randint(n, 6)
+    custos = [[rng.randint(0, 9) for _ in range(m)] for _ in range(n)]
+    atribuicao = motor.atribuicao_custo_minimo(custos)
+    assert len(set(atribuicao)) == n
+    melhor = min(sum(custos[i][j] for i, j in enumerate(colunas))
+                 for colunas in itertools.permutations(range(m), n))
+    assert sum(custos[i][j] for i, j in enumerate(atribuicao)) == melhor
+
+
+@pytest.mark.parametrize('semente', range(20))
+def test_semana_otima_igual_a_forca_bruta(semente):
+    # Com todas as pessoas, sem o corte das mais baratas de cada designação
+    rng = random.Random(semente)
+    dados = _dados(num_cargos=4, num_pessoas=rng.randint(1, 7), semente=semente)
+    indice = motor.IndiceElegibilidade.construir(dados.cargos, dados.pessoas)
+    filas = motor.FilasCandidatos(indice, dados.cargos)
+    for _ in range(rng.randint(0, 15)):
+        c = rng.randrange(len(dados.cargos))
+        p = filas.escolher(c, 0)
+        if p is not None:
+            filas.registrar(p, c)
+    peso = max(filas.uso_pessoa) + 1
+
+    def custo(atribuicao):
+        vagas = len(dados.cargos) - len(atribuicao)
+        return vagas, sum(filas.uso_pessoa_designacao[p][c] * peso + filas.uso_pessoa[p]
+                          for c, p in atribuicao.items())
+
+    opcoes = [[None] + list(motor.iterar_bits(mascara)) for mascara in indice.mascaras]
+    melhor = min(
+        custo({c: p for c, p in enumerate(escolha) if p is not None})
+        for escolha in itertools.product(*opcoes)
+        if len({p for p in escolha if p is not None}) == sum(p is not None for p in escolha)
+    )
+    assert custo(motor._atribuir_semana_otima(indice, filas, len(dados.cargos))) == melhor
+
+
+# Datas especiais
+
+def test_interpretar_data_especial():
+    assert motor.interpretar_data_especial('20/06/2026') == (date(2026, 6, 20), date(2026, 6, 20))
+    assert motor.interpretar_data_especial('30/12/2026 a 02/01/2027') == (
+        date(2026, 12, 30), date(2027, 1, 2))
+    assert motor.interpretar_data_especial('29/02') == (None, (29, 2))
+    for invalida in ('32/01/2026', '02/01/2027 a 30/12/2026', 'amanhã'):
+        with pytest.raises(ValueError):
+            motor.interpretar_data_especial(invalida)
+
+
+def test_indice_datas_especiais_intervalos_com_ano():
+    indice = IndiceDatasEspeciais({
+        '14/01/2026': 'Dia único',
+        '30/01/2026 a 03/02/2026': 'Vários dias',
+        'inválida': 'Ignorada',
+    }, date(2026, 1, 1), date(2026, 3, 1))
+    assert indice.consultar(date(2026, 1, 5), date(2026, 1, 11)) is None
+    assert indice.consultar(date(2026, 1, 12), date(2026, 1, 18)) == 'Dia único'
+    # Começa no fim de uma semana e continua na seguinte
+    assert indice.consultar(date(2026, 1, 26), date(2026, 2, 1)) == 'Vários dias'
+    assert indice.consultar(date(2026, 2, 2), date(2026, 2, 8)) == 'Vários dias'
+    assert indice.consultar(date(2026, 2, 9), date(2026, 2, 15)) is None
+
+
+def test_indice_datas_especiais_primeiro_evento_da_semana():
+    indice = IndiceDatasEspeciais({
+        '10/06/2026': 'Depois',
+        '01/06/2026 a 08/06/2026': 'Em andamento',
+    }, date(2026, 6, 1), date(2026, 6, 30))
+    assert indice.consultar(date(2026, 6, 8), date(2026, 6, 14)) == 'Em andamento'
+    assert indice.consultar(date(2026, 6, 9), date(2026, 6, 15)) == 'Depois'
+
+
+def test_indice_datas_especiais_formato_antigo_todo_ano():
+    indice = IndiceDatasEspeciais({'01/01': 'Ano novo', '29/02': 'Bissexto'},
+                                  date(2026, 12, 1), date(2028, 3, 31))
+    assert indice.consultar(date(2026, 12, 28), date(2027, 1, 3)) == 'Ano novo'
+    assert indice.consultar(date(2027, 12, 27), date(2028, 1, 2)) == 'Ano novo'
+    # 29/02 só existe em 2028
+    assert indice.consultar(date(2027, 2, 22), date(2027, 3, 7)) is None
+    assert indice.consultar(date(2028, 2, 28), date(2028, 3, 5)) == 'Bissexto'
+
+
+def _evento_dia_a_dia(datas_especiais, inicio, fim):
+    """A varredura original, dia a dia, estendida às chaves com ano"""
+    interpretadas = [(chave, *motor.interpretar_data_especial(chave), evento)
+                     for chave, evento in datas_especiais.items()]
+    dia = inicio
+    while dia <= fim:
+        for chave, data_inicio, data_fim, evento in interpretadas:
+            if data_inicio is None:
+                if dia.strftime('%d/%m') == chave:
+                    return evento
+            elif data_inicio <= dia <= data_fim:
+                return evento
+        dia += timedelta(days=1)
+    return None
+
+
+@pytest.mark.parametrize('semente', range(10))
+def test_indice_datas_especiais_igual_a_varredura_dia_a_dia(semente):
+    rng = random.Random(semente)
+    inicio = date(2026, 1, 5)
+    # Eventos sem sobreposição: cada dia tem no máximo um
+    dias = sorted(rng.sample(range(3 * 365), 30))
+    datas_especiais = {}
+    ocupados = set()
+    for n, deslocamento in enumerate(dias):
+        dia = inicio + timedelta(days=deslocamento)
+        duracao = rng.choice([1, 1, 2, 5])
+        periodo = {dia + timedelta(days=d) for d in range(duracao)}
+        antigo = rng.random() < 0.3
+        if antigo:
+            periodo = {date(ano, dia.month, dia.day) for ano in (2026, 2027, 2028, 2029)
+                       if not (dia.month, dia.day) == (2, 29) or ano == 2028}
+        if periodo & ocupados:
+            continue
+        ocupados |= periodo
+        if antigo:
+            chave = dia.strftime('%d/%m')
+        else:
+            chave = motor.formatar_data_especial(dia, max(periodo))
+        datas_especiais[chave] = f'Evento {n}'
+
+    intervalos = motor.gerar_intervalo_datas(datetime(2026, 1, 5), 156)
+    indice = IndiceDatasEspeciais(datas_especiais, intervalos[0][0], intervalos[-1][1])
+    eventos = [indice.consultar(semana_inicio, semana_fim) for semana_inicio, semana_fim in intervalos]
+    assert eventos == [_evento_dia_a_dia(datas_especiais, semana_inicio.date(), semana_fim.date())
+                       for semana_inicio, semana_fim in intervalos]
+    assert any(eventos)
+
+
+def test_semana_com_evento_fica_sem_designacoes():
+    dados = _dados(datas_especiais={'14/01/2026': 'Assembleia'})
+    escala = motor.gerar_escala(dados, DATA_INICIAL, 3, semente=1)
+    assert [semana.evento_especial for semana in escala.semanas] == [None, 'Assembleia', None]
+    assert escala.semanas[1].designacoes == {}
+
+
+# Reprodutibilidade
+
+@pytest.mark.parametrize('modo', motor.MODOS)
+def test_mesma_semente_gera_a_mesma_escala(modo):
+    dados = _dados()
+    primeira = motor.gerar_escala(dados, DATA_INICIAL, 20, modo, semente=42)
+    segunda = motor.gerar_escala(dados, DATA_INICIAL, 20, modo, semente=42)
+    assert primeira.semente == 42
+    assert primeira.para_dicionario() == segunda.para_dicionario()
+
+
+def test_sementes_diferentes_mudam_o_sorteio():
+    dados = _dados()
+    escalas = {
+        str(motor.gerar_escala(dados, DATA_INICIAL, 20, semente=semente).linhas())
+        for semente in range(5)
+    }
+    assert len(escalas) > 1
+
+
+def test_melhor_escala_reprodutivel_e_igual_em_paralelo():
+    dados = _dados()
+    serial = motor.gerar_melhor_escala(dados, DATA_INICIAL, 8, 6, semente=7, processos=1)
+    de_novo = motor.gerar_melhor_escala(dados, DATA_INICIAL, 8, 6, semente=7, processos=1)
+    paralela = motor.gerar_melhor_escala(dados, DATA_INICIAL, 8, 6, semente=7, processos=2)
+    assert serial.para_dicionario() == de_novo.para_dicionario()
+    assert serial.para_dicionario() == paralela.para_dicionario()
+
+
+def test_melhor_escala_e_a_de_menor_pontuacao():
+    dados = _dados(num_cargos=6, num_pessoas=8, semente=4)
+    melhor = motor.gerar_melhor_escala(dados, DATA_INICIAL, 10, 12, semente=3, processos=1)
+    rng = random.Random(3)
+    pontuacoes = [
+        motor.pontuar_escala(motor.gerar_escala(dados, DATA_INICIAL, 10, semente=rng.getrandbits(32)), dados)
+        for _ in range(12)
+    ]
+    assert motor.pontuar_escala(melhor, dados) == min(pontuacoes)
+    # A vencedora sai de novo da sua própria semente
+    assert motor.gerar_escala(dados, DATA_INICIAL, 10, semente=melhor.semente).para_dicionario() == (
+        melhor.para_dicionario())
+
+
+# Estender e retomar
+
+@pytest.mark.parametrize('modo', motor.MODOS)
+def test_estender_escala_igual_a_gerar_direto(modo):
+    dados = _dados()
+    direta = motor.gerar_escala(dados, DATA_INICIAL, 16, modo, semente=5)
+    inicio = motor.gerar_escala(dados, DATA_INICIAL, 6, modo, semente=5)
+    estendida = motor.gerar_escala(dados, None, 16, modo, base=inicio)
+    assert estendida.para_dicionario() == direta.para_dicionario()
+
+
+@pytest.mark.parametrize('modo', motor.MODOS)
+def test_retomar_escala_igual_a_gerar_direto(modo):
+    dados = _dados()
+    direta = motor.gerar_escala(dados, DATA_INICIAL, 16, modo, semente=5)
+    retomada = motor.gerar_escala(dados, None, 16, modo, base=direta, a_partir_de=7)
+    assert retomada.para_dicionario() == direta.para_dicionario()
+    assert motor.semanas_alteradas(direta, retomada) == []
+
+
+def test_retomar_depois_de_uma_mudanca_so_altera_o_fim():
+    dados = _dados()
+    anterior = motor.gerar_escala(dados, DATA_INICIAL, 12, semente=5)
+    alterados = DadosEscala.de_dicionarios(dados.cargos, dados.pessoas,
+                                           {'04/03/2026': 'Visita'})  # Semana 9
+    nova = motor.gerar_escala(alterados, None, 12, base=anterior, a_partir_de=8)
+    assert nova.semanas[:8] == anterior.semanas[:8]
+    assert nova.semanas[8].evento_especial == 'Visita'
+    assert motor.semanas_alteradas(anterior, nova)[0] == 8
+
+
+def test_contadores_continuam_o_historico():
+    dados = _dados()
+    direta = motor.gerar_escala(dados, DATA_INICIAL, 10, semente=5)
+    historico = motor.gerar_escala(dados, DATA_INICIAL, 4, semente=5).contadores()
+    continuacao = motor.gerar_escala(dados, DATA_INICIAL + timedelta(weeks=4), 6, semente=5,
+                                     contadores=historico)
+    assert continuacao.semanas == direta.semanas[4:]
+
+
+def test_estender_escala_salva_em_arquivo(tmp_path):
+    dados = _dados()
+    direta = motor.gerar_escala(dados, DATA_INICIAL, 12, semente=3)
+    caminho = tmp_path / 'escala.json'
+    motor.salvar_escala(motor.gerar_escala(dados, DATA_INICIAL, 4, semente=3), caminho)
+    estendida = motor.gerar_escala(dados, None, 12, base=motor.carregar_escala(caminho))
+    assert estendida.para_dicionario() == direta.para_dicionario()
+
+
+def test_retomar_com_data_diferente_da_base():
+    dados = _dados()
+    base = motor.gerar_escala(dados, DATA_INICIAL, 4, semente=3)
+    with pytest.raises(ValueError):
+        motor.gerar_escala(dados, datetime(2026, 1, 12), 8, base=base)
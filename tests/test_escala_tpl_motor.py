@@ -0,0 +1,384 @@
+"""Testes do motor da escala TPL"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import escala_tpl_motor as motor
+from escala_tpl_motor import DadosTPL, Ocupacao, Pareamento
+
+DATA_INICIAL = datetime(2026, 1, 5)  # Uma segunda-feira
+
+
+def _pessoa(nome, sexo, conjuge=None, horarios=None):
+    pessoa = {'nome': nome, 'sexo': sexo, 'has_spouse': conjuge is not None,
+              'horarios': horarios or {}}
+    if conjuge is not None:
+        pessoa['spouse'] = conjuge
+    return pessoa
+
+
+# Referência: o laço original de TPLApp.create_schedule_pdf, sem o PDF
+
+def _minutos(texto):
+    horas, mins = map(int, texto.split(':'))
+    return horas * 60 + mins
+
+
+def _faixa(horario):
+    inicio, fim = horario.split('-')
+    return _minutos(inicio), _minutos(fim)
+
+
+def _dividir(horario, duracao):
+    inicio, fim = _faixa(horario)
+    horarios = []
+    while inicio + duracao <= fim:
+        horarios.append(f"{inicio // 60:02d}:{inicio % 60:02d}-"
+                        f"{(inicio + duracao) // 60:02d}:{(inicio + duracao) % 60:02d}")
+        inicio += duracao
+    return horarios
+
+
+def _sobrepoe(horario1, horario2):
+    inicio1, fim1 = _faixa(horario1)
+    inicio2, fim2 = _faixa(horario2)
+    return not (fim1 <= inicio2 or fim2 <= inicio1)
+
+
+def _disponiveis(pessoas, nome_dia, horario):
+    disponiveis = []
+    for pessoa in pessoas:
+        for faixa in pessoa.get('horarios', {}).get(nome_dia, []):
+            try:
+                if _sobrepoe(faixa, horario):
+                    disponiveis.append(pessoa)
+                    break
+            except Exception:
+                continue  # Horário inválido
+    return disponiveis
+
+
+def _livre(ocupados, horario):
+    inicio, fim = _faixa(horario)
+    return all(fim <= a or inicio >= b for a, b in ocupados)
+
+
+def _formar_pares_referencia(livres, contagem):
+    """create_balanced_pairs: ordena todas, procura o cônjuge e compara duas a duas"""
+    ordenadas = sorted(livres, key=lambda p: contagem[p['nome']])
+    for pessoa in ordenadas:
+        if pessoa.get('has_spouse'):
+            conjuge = next((p for p in ordenadas if p['nome'] == pessoa.get('spouse')), None)
+            if conjuge:
+                media = sum(contagem.values()) / len(contagem)
+                if (contagem[pessoa['nome']] + contagem[conjuge['nome']]) / 2 <= media + 2:
+                    return pessoa, conjuge
+    for i, pessoa1 in enumerate(ordenadas):
+        for pessoa2 in ordenadas[i + 1:]:
+            if (pessoa1['sexo'] == pessoa2['sexo']
+                    and abs(contagem[pessoa1['nome']] - contagem[pessoa2['nome']]) <= 2):
+                return pessoa1, pessoa2
+    return (ordenadas[0], None) if ordenadas else None
+
+
+def _gerar_referencia(dados, data_inicial, semanas):
+    contagem = {pessoa['nome']: 0 for pessoa in dados.pessoas}
+    ocupacao_pessoas = {}  # nome -> data -> [(inicio, fim)]
+    dias = []
+    data = data_inicial
+    for _ in range(semanas * 7):
+        nome_dia = motor.DIAS_SEMANA[data.weekday()]
+        linhas = []
+        ocupacao_carrinhos = {}
+        for carrinho in dados.carrinhos:
+            ocupacao_carrinhos[carrinho['nome']] = []
+            for ponto in [p for p in dados.pontos if p['nome'] in carrinho['pontos']]:
+                for faixa in ponto.get('horarios', {}).get(nome_dia, []):
+                    for horario in _dividir(faixa, dados.duracao_minutos):
+                        if not _livre(ocupacao_carrinhos[carrinho['nome']], horario):
+                            continue
+                        livres = [
+                            p for p in _disponiveis(dados.pessoas, nome_dia, horario)
+                            if _livre(ocupacao_pessoas.get(p['nome'], {}).get(data, []), horario)
+                        ]
+                        par = _formar_pares_referencia(livres, contagem)
+                        if par is None:
+                            linhas.append([horario, carrinho['nome'], ponto['nome'], '-', '-'])
+                        else:
+                            pessoa1, pessoa2 = par
+                            linhas.append([horario, carrinho['nome'], ponto['nome'], pessoa1['nome'],
+                                           pessoa2['nome'] if pessoa2 else '?'])
+                            for pessoa in par:
+                                if pessoa:
+                                    contagem[pessoa['nome']] += 1
+                                    ocupacao_pessoas.setdefault(pessoa['nome'], {}).setdefault(
+                                        data, []).append(_faixa(horario))
+                        ocupacao_carrinhos[carrinho['nome']].append(_faixa(horario))
+        linhas.sort(key=lambda linha: (linha[1], linha[0]))
+        if linhas:
+            dias.append((data, nome_dia, linhas))
+        data += timedelta(days=1)
+    return dias
+
+
+def _horario_aleatorio(rng, passo=30):
+    inicio = rng.randrange(6 * 60, 18 * 60, passo)
+    fim = min(inicio + rng.randrange(passo, 6 * 60, passo), 23 * 60)
+    return f"{inicio // 60:02d}:{inicio % 60:02d}-{fim // 60:02d}:{fim % 60:02d}"
+
+
+def _dados_aleatorios(semente, invalidos=False, duracoes=(60,)):
+    """Pessoas, pontos e carrinhos sintéticos com casais e horários variados"""
+    rng = random.Random(semente)
+    pessoas = [_pessoa(f"P{i}", rng.choice('MF')) for i in range(rng.randint(4, 30))]
+    for i in range(0, len(pessoas) - 1, 2):
+        if rng.random() < 0.4:
+            pessoas[i].update(has_spouse=True, spouse=pessoas[i + 1]['nome'])
+            pessoas[i + 1].update(has_spouse=True, spouse=pessoas[i]['nome'])
+    for pessoa in pessoas:
+        for dia in rng.sample(motor.DIAS_SEMANA, rng.randint(1, 7)):
+            pessoa['horarios'][dia] = [_horario_aleatorio(rng) for _ in range(rng.randint(1, 2))]
+            if invalidos and rng.random() < 0.1:
+                pessoa['horarios'][dia].append(rng.choice(['lixo', '8h-9h', '07:00']))
+    pontos = [
+        {'nome': f"Ponto {i}",
+         'horarios': {dia: [_horario_aleatorio(rng) for _ in range(rng.randint(1, 2))]
+                      for dia in rng.sample(motor.DIAS_SEMANA, rng.randint(1, 7))}}
+        for i in range(rng.randint(1, 6))
+    ]
+    carrinhos = [
+        {'nome': f"Carrinho {i}",
+         'pontos': [ponto['nome'] for ponto in rng.sample(pontos, rng.randint(1, len(pontos)))]}
+        for i in range(rng.randint(1, 4))
+    ]
+    return DadosTPL.de_listas(pessoas, pontos, carrinhos,
+                              {'duracao_padrao': rng.choice(duracoes)})
+
+
+def _dias(dados, semanas):
+    return [(dia.data, dia.nome_dia, dia.linhas)
+            for dia in motor.gerar_dias(dados, DATA_INICIAL, semanas)]
+
+
+# Geração
+
+def _dados_tpl():
+    manha = {dia: ['07:00-11:00'] for dia in motor.DIAS_SEMANA[:5]}
+    pessoas = [
+        _pessoa('João', 'M', 'Maria', manha),
+        _pessoa('Maria', 'F', 'João', manha),
+        _pessoa('Pedro', 'M', horarios={'Segunda': ['07:00-09:00'], 'Quarta': ['08:30-09:30']}),
+        _pessoa('Paulo', 'M', horarios=manha),
+        _pessoa('Ana', 'F', horarios={'Terça': ['07:00-11:00', 'inválido']}),
+    ]
+    pontos = [{'nome': 'Praça', 'horarios': manha}, {'nome': 'Feira', 'horarios': {'Sábado': ['07:00-09:00']}}]
+    carrinhos = [{'nome': 'Carrinho 1', 'pontos': ['Praça', 'Feira']}]
+    return DadosTPL.de_listas(pessoas, pontos, carrinhos, {'duracao_padrao': 60})
+
+
+@pytest.mark.parametrize('semente', range(12))
+def test_gerar_dias_igual_ao_laco_original(semente):
+    dados = _dados_aleatorios(semente)
+    assert _dias(dados, 3) == _gerar_referencia(dados, DATA_INICIAL, 3)
+
+
+def test_gerar_dias_respeita_disponibilidade_e_ocupacao():
+    dados = _dados_tpl()
+    disponibilidade = {pessoa['nome']: pessoa['horarios'] for pessoa in dados.pessoas}
+    dias = _dias(dados, 2)
+    assert dias and all(linhas for _, _, linhas in dias)
+
+    for _, nome_dia, linhas in dias:
+        reservas = {}
+        for horario, carrinho, _, pessoa1, pessoa2 in linhas:
+            for nome in (pessoa1, pessoa2):
+                if nome in ('-', '?'):
+                    continue
+                # Disponível em algum intervalo que se sobrepõe ao horário
+                assert any(_sobrepoe(faixa, horario)
+                           for faixa in disponibilidade[nome].get(nome_dia, []) if faixa != 'inválido')
+                # Nunca em dois horários sobrepostos no mesmo dia
+                assert all(not _sobrepoe(outro, horario) for outro in reservas.get(nome, []))
+                reservas.setdefault(nome, []).append(horario)
+
+
+def test_gerar_dias_deterministico_e_em_ordem():
+    dados = _dados_tpl()
+    primeira = list(motor.gerar_dias(dados, DATA_INICIAL, 3))
+    assert primeira == list(motor.gerar_dias(dados, DATA_INICIAL, 3))
+    for dia in primeira:
+        assert dia.linhas == sorted(dia.linhas, key=lambda linha: (linha[1], linha[0]))
+        assert dia.numero == (dia.data - DATA_INICIAL).days + 1
+
+
+def test_gerar_dias_sem_carrinhos():
+    with pytest.raises(ValueError):
+        motor.gerar_dias(DadosTPL(), DATA_INICIAL, 1)
+
+
+# Horários em minutos
+
+@pytest.mark.parametrize('duracao', [25, 30, 45, 60, 90])
+def test_dividir_intervalo_igual_ao_texto(duracao):
+    rng = random.Random(duracao)
+    for _ in range(200):
+        horario = _horario_aleatorio(rng, passo=5)
+        divididos = motor.dividir_intervalo(*motor.intervalo_minutos(horario), duracao)
+        assert [motor.formatar_intervalo(*par) for par in divididos] == _dividir(horario, duracao)
+
+
+def test_horarios_invalidos_de_pessoas_sao_ignorados():
+    dados = DadosTPL.de_listas(
+        [_pessoa('Ana', 'F', horarios={'Segunda': ['07:00-09:00', 'lixo', '10:00', '10:30-12:00'],
+                                       'Domingo': ['8h-9h']})],
+        [], [])
+    disponibilidade = motor.HorariosTPL(dados).disponibilidade[0]
+    assert disponibilidade[0] == ((420, 540), (630, 720))
+    assert disponibilidade[6] == ()
+
+
+def test_horario_invalido_de_ponto():
+    dados = DadosTPL.de_listas([], [{'nome': 'Praça', 'horarios': {'Segunda': ['7h']}}],
+                               [{'nome': 'Carrinho', 'pontos': ['Praça']}])
+    # Falha ao começar, não no meio da geração
+    with pytest.raises(ValueError):
+        motor.gerar_dias(dados, DATA_INICIAL, 1)
+
+
+@pytest.mark.parametrize('semente', range(12))
+def test_gerar_dias_igual_ao_laco_original_com_horarios_irregulares(semente):
+    # Horários inválidos de pessoas e durações que não dividem as faixas
+    dados = _dados_aleatorios(semente, invalidos=True, duracoes=(30, 45, 60, 90))
+    assert _dias(dados, 3) == _gerar_referencia(dados, DATA_INICIAL, 3)
+
+
+# Disponibilidade por dia da semana
+
+@pytest.mark.parametrize('semente', range(6))
+def test_indice_disponibilidade_igual_a_varredura(semente):
+    rng = random.Random(semente)
+    dados = _dados_aleatorios(semente, invalidos=True)
+    indice = motor.IndiceDisponibilidade(motor.HorariosTPL(dados).disponibilidade)
+    indices = {id(pessoa): i for i, pessoa in enumerate(dados.pessoas)}
+    # Horários repetidos também, que saem da memória do índice
+    horarios = [_horario_aleatorio(rng, passo=15) for _ in range(40)] * 2
+    for dia, nome_dia in enumerate(motor.DIAS_SEMANA):
+        for horario in horarios:
+            esperado = tuple(indices[id(pessoa)]
+                             for pessoa in _disponiveis(dados.pessoas, nome_dia, horario))
+            assert indice.consultar(dia, *motor.intervalo_minutos(horario)) == esperado
+
+
+# Ocupação
+
+def test_ocupacao_sobreposicao():
+    ocupacao = Ocupacao()
+    ocupacao.reservar('A', 480, 540)
+    ocupacao.reservar('A', 600, 660)
+    assert not ocupacao.livre('A', 500, 520)
+    assert not ocupacao.livre('A', 530, 610)
+    assert ocupacao.livre('A', 540, 600)
+    assert ocupacao.livre('B', 500, 520)
+    ocupacao.liberar('A')
+    assert ocupacao.livre('A', 500, 520)
+    ocupacao.reservar('B', 500, 520)
+    ocupacao.limpar()
+    assert ocupacao.livre('B', 500, 520)
+
+
+@pytest.mark.parametrize('semente', range(10))
+def test_ocupacao_igual_a_lista_de_reservas(semente):
+    rng = random.Random(semente)
+    ocupacao = Ocupacao()
+    reservas = {}  # As listas verificadas uma a uma, como em is_person_available
+    for _ in range(2000):
+        recurso = rng.randrange(5)
+        inicio = rng.randrange(0, 24 * 60, 15)
+        fim = inicio + rng.choice([15, 30, 60, 90, 120])
+        livre = all(fim <= a or inicio >= b for a, b in reservas.get(recurso, []))
+        assert ocupacao.livre(recurso, inicio, fim) == livre
+        if livre:
+            ocupacao.reservar(recurso, inicio, fim)
+            reservas.setdefault(recurso, []).append((inicio, fim))
+        if rng.random() < 0.01:
+            ocupacao.liberar(recurso)
+            reservas.pop(recurso, None)
+
+
+# Pareamento
+
+def _pareamento(pessoas, contagens):
+    pareamento = Pareamento(pessoas)
+    for indice, quantidade in enumerate(contagens):
+        for _ in range(quantidade):
+            pareamento.registrar(indice)
+    return pareamento
+
+
+def _nomes(pessoas, par):
+    if par is None:
+        return None
+    pessoa1, pessoa2 = par
+    return pessoas[pessoa1]['nome'], pessoas[pessoa2]['nome'] if pessoa2 is not None else None
+
+
+def test_casal_tem_preferencia():
+    pessoas = [_pessoa('Ana', 'F'), _pessoa('João', 'M', 'Maria'), _pessoa('Bia', 'F'),
+               _pessoa('Maria', 'F', 'João')]
+    pareamento = _pareamento(pessoas, [0, 0, 0, 0])
+    assert _nomes(pessoas, pareamento.formar([0, 1, 2, 3])) == ('João', 'Maria')
+
+
+def test_casal_muito_designado_da_lugar_ao_mesmo_sexo():
+    pessoas = [_pessoa('João', 'M', 'Maria'), _pessoa('Maria', 'F', 'João'),
+               _pessoa('Ana', 'F'), _pessoa('Bia', 'F')] + [
+        _pessoa(f'Outro {i}', 'M') for i in range(6)]
+    # Média geral 1; o casal tem média 5, mais de 2 acima
+    pareamento = _pareamento(pessoas, [5, 5, 0, 0] + [0] * 6)
+    assert _nomes(pessoas, pareamento.formar([0, 1, 2, 3])) == ('Ana', 'Bia')
+
+
+def test_conjuge_ocupado_nao_forma_casal():
+    pessoas = [_pessoa('João', 'M', 'Maria'), _pessoa('Maria', 'F', 'João'), _pessoa('Pedro', 'M')]
+    pareamento = _pareamento(pessoas, [0, 0, 0])
+    assert _nomes(pessoas, pareamento.formar([0, 2])) == ('João', 'Pedro')
+
+
+def test_mesmo_sexo_com_ate_duas_designacoes_de_diferenca():
+    pessoas = [_pessoa('Ana', 'F'), _pessoa('Pedro', 'M'), _pessoa('Bia', 'F')]
+    assert _nomes(pessoas, _pareamento(pessoas, [0, 0, 2]).formar([0, 1, 2])) == ('Ana', 'Bia')
+    # Com 3 de diferença, Ana fica sem dupla
+    assert _nomes(pessoas, _pareamento(pessoas, [0, 1, 3]).formar([0, 1, 2])) == ('Ana', None)
+
+
+def test_empate_fica_com_a_ordem_de_cadastro():
+    pessoas = [_pessoa(nome, 'M') for nome in ('Carlos', 'André', 'Bruno')]
+    pareamento = _pareamento(pessoas, [1, 1, 1])
+    assert _nomes(pessoas, pareamento.formar([0, 1, 2])) == ('Carlos', 'André')
+    assert _nomes(pessoas, pareamento.formar([1, 2])) == ('André', 'Bruno')
+
+
+def test_sem_pessoas_livres():
+    assert Pareamento([_pessoa('Ana', 'F')]).formar([]) is None
+
+
+@pytest.mark.parametrize('semente', range(200))
+def test_pareamento_igual_a_create_balanced_pairs(semente):
+    rng = random.Random(semente)
+    quantidade = rng.randint(1, 14)
+    pessoas = [_pessoa(f'P{i}', rng.choice('MF')) for i in range(quantidade)]
+    for i in range(0, quantidade - 1, 2):
+        if rng.random() < 0.5:
+            pessoas[i].update(has_spouse=True, spouse=pessoas[i + 1]['nome'])
+            if rng.random() < 0.9:
+                pessoas[i + 1].update(has_spouse=True, spouse=pessoas[i]['nome'])
+    if rng.random() < 0.2:
+        pessoas[0].update(has_spouse=True, spouse='Sem cadastro')
+    contagens = [rng.randint(0, 6) for _ in pessoas]
+    livres = sorted(rng.sample(range(quantidade), rng.randint(0, quantidade)))
+
+    contagem = {pessoa['nome']: n for pessoa, n in zip(pessoas, contagens)}
+    par = _formar_pares_referencia([pessoas[i] for i in livres], contagem)
+    esperado = None if par is None else (par[0]['nome'], par[1]['nome'] if par[1] else None)
+    assert _nomes(pessoas, _pareamento(pessoas, contagens).formar(livres)) == esperado
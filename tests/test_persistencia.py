@@ -0,0 +1,117 @@
+"""Testes da gravação atômica e adiada dos arquivos de dados"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import persistencia
+from persistencia import GravadorAdiado
+
+
+def _arquivos(pasta):
+    return sorted(os.listdir(pasta))
+
+
+def test_gravacao_atomica(tmp_path):
+    caminho = tmp_path / 'dados.json'
+    persistencia.gravar_json_atomico(caminho, {'nome': 'Ação', 'lista': [1, 2]})
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == {'nome': 'Ação', 'lista': [1, 2]}
+    assert _arquivos(tmp_path) == ['dados.json']
+
+
+def test_falha_na_gravacao_mantem_o_arquivo_anterior(tmp_path, monkeypatch):
+    caminho = tmp_path / 'dados.json'
+    persistencia.gravar_json_atomico(caminho, {'versao': 1})
+
+    def falhar(descritor):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(persistencia.os, 'fsync', falhar)
+    with pytest.raises(OSError):
+        persistencia.gravar_json_atomico(caminho, {'versao': 2})
+    monkeypatch.undo()
+
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == {'versao': 1}
+    # O temporário foi removido
+    assert _arquivos(tmp_path) == ['dados.json']
+
+
+def test_dados_nao_serializaveis_nao_tocam_o_arquivo(tmp_path):
+    caminho = tmp_path / 'dados.json'
+    persistencia.gravar_json_atomico(caminho, {'versao': 1})
+    with pytest.raises(TypeError):
+        persistencia.gravar_json_atomico(caminho, {'versao': object()})
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == {'versao': 1}
+    assert _arquivos(tmp_path) == ['dados.json']
+
+
+def test_gravador_adiado_agrupa_edicoes(tmp_path):
+    caminho = str(tmp_path / 'dados.json')
+    gravador = GravadorAdiado(atraso=60)
+    dados = {'versao': 0}
+    for versao in range(1, 4):
+        dados['versao'] = versao
+        gravador.agendar(caminho, dados)
+    # Alterar os dados depois de agendar não muda o que será gravado
+    dados['versao'] = 99
+    assert not os.path.exists(caminho)
+    assert gravador.pendente(caminho) == {'versao': 3}
+
+    gravador.descarregar()
+    assert gravador.pendente(caminho) is None
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == {'versao': 3}
+
+
+def test_gravador_adiado_grava_em_segundo_plano(tmp_path):
+    caminho = str(tmp_path / 'dados.json')
+    gravador = GravadorAdiado(atraso=0)
+    recebidos = []
+    gravador.agendar('banco:documento', [1, 2], recebidos.append)
+    gravador.agendar(caminho, {'ok': True})
+    # Espera as gravações da thread e faz as que ainda não começaram
+    gravador.descarregar()
+    assert recebidos == [[1, 2]]
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == {'ok': True}
+
+
+def test_descarregar_nao_perde_versao_mais_nova():
+    gravador = GravadorAdiado(atraso=60)
+    gravados = []
+    comecou = threading.Event()
+    continuar = threading.Event()
+
+    def gravar_devagar(dados):
+        comecou.set()
+        continuar.wait(5)
+        gravados.append(dados)
+
+    gravador.agendar('banco:documento', {'versao': 1}, gravar_devagar)
+    descarga = threading.Thread(target=gravador.descarregar)
+    descarga.start()
+    comecou.wait(5)
+    # Agendada durante a descarga: a thread não pode gravá-la antes da antiga
+    gravador.atraso = 0
+    gravador.agendar('banco:documento', {'versao': 2}, gravados.append)
+    time.sleep(0.1)
+    continuar.set()
+    descarga.join(5)
+    gravador.descarregar()
+    assert gravados == [{'versao': 1}, {'versao': 2}]
+
+
+def test_leitura_considera_a_gravacao_pendente(tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'dados.json')
+    persistencia.gravar_json_atomico(caminho, {'versao': 1})
+    monkeypatch.setattr(persistencia, '_gravador', GravadorAdiado(atraso=60))
+    persistencia.salvar_json(caminho, {'versao': 2})
+    assert persistencia.ler_json(caminho) == {'versao': 2}
+    persistencia.descarregar()
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == {'versao': 2}